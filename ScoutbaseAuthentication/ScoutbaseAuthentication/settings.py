@@ -10,15 +10,67 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import datetime
 import os
+import sys
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# True while the test suite runs (manage.py test)
+TESTING = len(sys.argv) > 1 and sys.argv[1] == 'test'
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media is served by users.media.MediaView. In production, set
+# MEDIA_X_ACCEL_REDIRECT_PREFIX to an nginx internal location aliased to
+# MEDIA_ROOT (or MEDIA_X_SENDFILE for Apache/lighttpd) so the proxy streams the
+# bytes instead of a Django worker. Content-addressed files are cached forever;
+# other files for MEDIA_CACHE_MAX_AGE seconds
+MEDIA_REQUIRE_AUTHENTICATION = os.environ.get('MEDIA_REQUIRE_AUTHENTICATION', '').lower() in ('1', 'true', 'yes')
+MEDIA_X_ACCEL_REDIRECT_PREFIX = os.environ.get('MEDIA_X_ACCEL_REDIRECT_PREFIX', '')
+MEDIA_X_SENDFILE = os.environ.get('MEDIA_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+MEDIA_CACHE_MAX_AGE = int(os.environ.get('MEDIA_CACHE_MAX_AGE', 24 * 60 * 60))
+
+# Profile pictures are stored under their content hash, so identical uploads
+# share one file (see users/storage.py)
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'profile_pictures': {
+        'BACKEND': 'users.storage.ContentAddressedStorage',
+    },
+}
+
+# Setting PROFILE_PICTURE_BUCKET moves profile pictures to S3-compatible object
+# storage (users/s3.py), so app nodes keep no local files. Credentials come
+# from the usual boto3 sources (AWS_ACCESS_KEY_ID, instance roles); set
+# PROFILE_PICTURE_S3_ENDPOINT_URL for MinIO and other S3-compatible stores.
+# Objects stay private and picture URLs are signed, unless
+# PROFILE_PICTURE_S3_PUBLIC says a bucket policy (or CDN) makes them readable
+PROFILE_PICTURE_BUCKET = os.environ.get('PROFILE_PICTURE_BUCKET', '')
+PROFILE_PICTURE_S3_PUBLIC = os.environ.get('PROFILE_PICTURE_S3_PUBLIC', '').lower() in ('1', 'true', 'yes')
+if PROFILE_PICTURE_BUCKET:
+    STORAGES['profile_pictures'] = {
+        'BACKEND': 'users.s3.S3ContentAddressedStorage',
+        'OPTIONS': {
+            'bucket_name': PROFILE_PICTURE_BUCKET,
+            'endpoint_url': os.environ.get('PROFILE_PICTURE_S3_ENDPOINT_URL') or None,
+            'region_name': os.environ.get('PROFILE_PICTURE_S3_REGION') or None,
+            'custom_domain': os.environ.get('PROFILE_PICTURE_S3_CUSTOM_DOMAIN') or None,
+            # Unsigned URLs only work for publicly readable objects
+            'querystring_auth': MEDIA_REQUIRE_AUTHENTICATION or not PROFILE_PICTURE_S3_PUBLIC,
+        },
+    }
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -82,24 +134,143 @@ WSGI_APPLICATION = 'ScoutbaseAuthentication.wsgi.application'
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
+#
+# Connection settings come from DB_* environment variables, defaulting to the
+# development database. DB_ENGINE selects the driver: mysql.connector
+# ('mysql.connector.django', the default) or mysqlclient
+# ('django.db.backends.mysql'); benchmarks/database_drivers.py compares them.
+#
+# Connections persist for DB_CONN_MAX_AGE seconds ('none' for no limit)
+# instead of paying a TCP, TLS and auth handshake per request, and are
+# checked before reuse (DB_CONN_HEALTH_CHECKS). With mysql.connector,
+# DB_POOL_SIZE > 0 instead keeps a bounded per-process pool: Django returns
+# each connection to the pool when the request ends, and the pool pings it
+# and resets its session on the next checkout. Size it to at least the
+# threads per worker, as an exhausted pool fails rather than waits.
+
+# No credentials are committed: DB_HOST and DB_PASSWORD must be set unless
+# DEBUG or TESTING is on, where a local MySQL server is used by default.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'mysql.connector.django')
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 0))
+DB_CONN_MAX_AGE = os.environ.get('DB_CONN_MAX_AGE', '60')
+
+if not (DEBUG or TESTING):
+    missing = [name for name in ('DB_HOST', 'DB_PASSWORD') if not os.environ.get(name)]
+    if missing:
+        raise ImproperlyConfigured(f"{' and '.join(missing)} must be set when DEBUG is off")
+
+if DB_ENGINE == 'django.db.backends.mysql':
+    if DB_POOL_SIZE:
+        raise ImproperlyConfigured('DB_POOL_SIZE needs DB_ENGINE=mysql.connector.django')
+    # mysqlclient takes the SQL mode as a statement run on connect
+    DB_OPTIONS = {'init_command': "SET sql_mode='STRICT_TRANS_TABLES'"}
+else:
+    DB_OPTIONS = {'sql_mode': 'STRICT_TRANS_TABLES'}
+    if DB_POOL_SIZE:
+        DB_OPTIONS.update(pool_name='scoutbase', pool_size=DB_POOL_SIZE, pool_reset_session=True)
 
 DATABASES = {
     'default': {
-        'ENGINE': 'mysql.connector.django',
-        'NAME': 'rkcrp2c5tw8zqhp0',
-        'USER': 'd1gc0wmclexigoft',
-        'PASSWORD': 'xfxky8ao97o4gely',
-        'HOST': 'o3iyl77734b9n3tg.cbetxkdyhwsb.us-east-1.rds.amazonaws.com',
-        'PORT': 3306,
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('DB_NAME', 'scoutbase'),
+        'USER': os.environ.get('DB_USER', 'scoutbase'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+        'HOST': os.environ.get('DB_HOST', '127.0.0.1'),
+        'PORT': int(os.environ.get('DB_PORT', 3306)),
+        # Pooled connections must be handed back after every request
+        'CONN_MAX_AGE': 0 if DB_POOL_SIZE else (None if DB_CONN_MAX_AGE.lower() == 'none' else int(DB_CONN_MAX_AGE)),
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_CONN_HEALTH_CHECKS', 'true').lower() in ('1', 'true', 'yes'),
         'TEST': {
-            'NAME': 'rkcrp2c5tw8zqhp0',
-        },
-        'OPTIONS': {
-            'sql_mode': 'STRICT_TRANS_TABLES',
+            'NAME': os.environ.get('DB_TEST_NAME', os.environ.get('DB_NAME', 'scoutbase')),
         },
+        'OPTIONS': DB_OPTIONS,
     }
 }
 
+# Django REST Framework
+# https://www.django-rest-framework.org/api-guide/settings/
+# Every view authenticates from the JWT (Authorization: Bearer or jwt cookie)
+# unless it overrides authentication_classes.
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'users.authentication.JWTAuthentication',
+    ],
+}
+
+# Access tokens are short-lived; clients renew them with a refresh token
+# (POST /scoutbase/token/refresh) instead of logging in again
+JWT_ACCESS_TOKEN_LIFETIME = datetime.timedelta(minutes=15)
+JWT_REFRESH_TOKEN_LIFETIME = datetime.timedelta(days=30)
+
+# Access tokens are signed with the first key in JWT_SIGNING_KEYS and accepted
+# if signed by any of them; every key is published at /.well-known/jwks.json.
+# JWT_SIGNING_KEYS is a comma-separated list of kid=/path/to/key.pem entries.
+# RSA keys sign with RS256 and Ed25519 keys with EdDSA. An entry may hold a
+# public key only, to keep verifying tokens from a retired private key.
+# Without any keys, a development Ed25519 key derived from SECRET_KEY is used
+# when DEBUG or TESTING is on; otherwise issuing a token raises
+# ImproperlyConfigured.
+JWT_SIGNING_KEYS = [
+    {'kid': kid, 'key': Path(path).read_text()}
+    for kid, _, path in (
+        entry.strip().partition('=') for entry in os.environ.get('JWT_SIGNING_KEYS', '').split(',') if entry.strip()
+    )
+]
+
+# Verifiers may cache the JWKS for this many seconds, so a new key must be
+# published (listed after the active key) at least this long before it signs
+JWT_JWKS_MAX_AGE = int(os.environ.get('JWT_JWKS_MAX_AGE', 24 * 60 * 60))
+
+# Resolved users are cached per process for this many seconds, keyed by
+# (user id, token issue time), holding at most JWT_USER_CACHE_SIZE users
+JWT_USER_CACHE_TTL = 60
+JWT_USER_CACHE_SIZE = 1024
+
+# The Role table is cached per process for this many seconds; changes made in
+# this process invalidate it immediately (see users/signals.py)
+ROLE_CACHE_TTL = 300
+
+# Most user ids accepted by one batch lookup (GET /scoutbase/users/batch)
+USER_BATCH_MAX_IDS = 100
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Search responses and their invalidation counters are cached here, so every
+# worker must share the backend: set CACHE_BACKEND (e.g.
+# django.core.cache.backends.redis.RedisCache) and CACHE_LOCATION. Without a
+# shared backend the search cache is off, since a per-process cache would keep
+# serving results another worker had already invalidated. Tests use locmem.
+
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', '')
+PER_PROCESS_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+if TESTING:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'scoutbase'}}
+elif CACHE_BACKEND:
+    CACHES = {'default': {'BACKEND': CACHE_BACKEND, 'LOCATION': os.environ.get('CACHE_LOCATION', 'scoutbase')}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+SEARCH_CACHE_ENABLED = TESTING or CACHES['default']['BACKEND'] not in PER_PROCESS_CACHE_BACKENDS
+
+# Seconds a cached search response may live before it is recomputed
+SEARCH_CACHE_TIMEOUT = 300
+
+# Run the test suite against a throwaway local SQLite database so tests never
+# touch the shared MySQL instance.
+if TESTING:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        }
+    }
+
 
 
 
@@ -123,6 +294,64 @@ AUTH_PASSWORD_VALIDATORS = [
 ]
 
 
+# Password hashing
+# https://docs.djangoproject.com/en/5.1/topics/auth/passwords/
+# PASSWORD_HASHER selects the hasher used for new passwords (e.g.
+# django.contrib.auth.hashers.Argon2PasswordHasher, which needs argon2-cffi).
+# Hashes made by any other listed hasher still verify and are transparently
+# rehashed with the preferred one on the user's next successful login.
+
+PREFERRED_PASSWORD_HASHER = os.environ.get(
+    'PASSWORD_HASHER', 'django.contrib.auth.hashers.PBKDF2PasswordHasher'
+)
+PASSWORD_HASHERS = [PREFERRED_PASSWORD_HASHER] + [
+    hasher for hasher in [
+        'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+        'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+    ]
+    if hasher != PREFERRED_PASSWORD_HASHER
+]
+
+# Use a fast hasher to keep the test suite quick
+if TESTING:
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Login and registration hash passwords in a bounded per-process thread pool;
+# once WORKERS hashes are running and QUEUE_DEPTH more are waiting, further
+# requests get 503 instead of starving the rest of the worker
+PASSWORD_HASHING_WORKERS = int(os.environ.get('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1))
+PASSWORD_HASHING_QUEUE_DEPTH = int(os.environ.get('PASSWORD_HASHING_QUEUE_DEPTH', 16))
+
+# Uploaded profile pictures get resized copies (longest side in pixels) in
+# each format, rendered in a per-process pool of IMAGE_PROCESSING_WORKERS
+# processes (0 renders in the request thread)
+PROFILE_PICTURE_SIZES = (64, 256, 1024)
+PROFILE_PICTURE_FORMATS = ('webp', 'jpg')
+IMAGE_PROCESSING_WORKERS = int(os.environ.get('IMAGE_PROCESSING_WORKERS', min(4, os.cpu_count() or 1)))
+
+# Uploads stream to temporary files and are rejected once they pass
+# PROFILE_PICTURE_MAX_UPLOAD_BYTES. Pictures whose pixels would take more than
+# MAX_DECODE_BYTES to decode are rejected from their header: 64 MB allows
+# 16 megapixels of PNG or WebP, and much larger JPEGs, which decode at
+# reduced scale. Pictures larger than MAX_DIMENSION on either side are
+# downsized before they are stored
+FILE_UPLOAD_HANDLERS = [
+    'users.uploads.CappedUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+PROFILE_PICTURE_MAX_UPLOAD_BYTES = int(os.environ.get('PROFILE_PICTURE_MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+PROFILE_PICTURE_MAX_DECODE_BYTES = int(os.environ.get('PROFILE_PICTURE_MAX_DECODE_BYTES', 64 * 1024 * 1024))
+PROFILE_PICTURE_MAX_DIMENSION = 2048
+
+# Clients may instead upload straight to storage with a presigned form
+# (POST /scoutbase/profile-picture/upload), valid for DIRECT_UPLOAD_EXPIRES
+# seconds, then confirm it (POST /scoutbase/profile-picture/confirm)
+DIRECT_UPLOAD_EXPIRES = 10 * 60
+
+
 # Internationalization
 # https://docs.djangoproject.com/en/5.1/topics/i18n/
 
@@ -3,14 +3,15 @@
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
+from users.media import MediaView
+from users.views import JWKSView
 
 # Define the URL patterns for the project
 # The URL patterns all begin with http://localhost:8000/
 # Followed by the path listed below
 urlpatterns = [
     path('scoutbase/', include('users.urls')),
-]
-
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
+    path('.well-known/jwks.json', JWKSView.as_view()),
+    # Uploaded files; see MediaView for proxy offload and caching
+    path(f'{settings.MEDIA_URL.lstrip("/")}<path:name>', MediaView.as_view()),
+]
\ No newline at end of file
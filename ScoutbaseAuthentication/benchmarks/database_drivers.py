@@ -0,0 +1,229 @@
+################################################################################
+# Database Driver Benchmark
+# Compares MySQL drivers and connection handling on the API's request mix.
+#
+# Each configuration (driver x new connection per request / persistent /
+# pooled) runs in its own process, configured through the same DB_*
+# environment variables as production. Requests go through Django's
+# WSGIHandler, so connections are closed or kept exactly as they would be
+# behind gunicorn. Reports throughput, latency percentiles and how many
+# connections each configuration opened.
+#
+# Needs a scratch MySQL database: it is migrated and seeded with athletes.
+#
+# Usage (from the ScoutbaseAuthentication directory):
+#   DB_HOST=127.0.0.1 DB_USER=bench DB_PASSWORD=... \
+#       python benchmarks/database_drivers.py --database scoutbase_bench
+#   python benchmarks/database_drivers.py --database scoutbase_bench --threads 4 --seconds 30
+################################################################################
+
+# Standard library imports
+import argparse
+import importlib.util
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ScoutbaseAuthentication.settings')
+
+CONNECTOR = 'mysql.connector.django'
+MYSQLCLIENT = 'django.db.backends.mysql'
+
+# (label, DB_* overrides); DB_POOL_SIZE is filled in from --threads
+CONFIGURATIONS = [
+    ('mysql.connector, connect per request', {'DB_ENGINE': CONNECTOR, 'DB_CONN_MAX_AGE': '0'}),
+    ('mysql.connector, persistent', {'DB_ENGINE': CONNECTOR, 'DB_CONN_MAX_AGE': '600'}),
+    ('mysql.connector, pooled', {'DB_ENGINE': CONNECTOR, 'DB_POOL_SIZE': None}),
+    ('mysqlclient, connect per request', {'DB_ENGINE': MYSQLCLIENT, 'DB_CONN_MAX_AGE': '0'}),
+    ('mysqlclient, persistent', {'DB_ENGINE': MYSQLCLIENT, 'DB_CONN_MAX_AGE': '600'}),
+]
+
+# Driver module each engine imports
+DRIVER_MODULES = {CONNECTOR: 'mysql.connector', MYSQLCLIENT: 'MySQLdb'}
+
+STATES = ['TX', 'CA', 'FL', 'GA', 'NC']
+SEED_BATCH_SIZE = 5000
+
+
+def setup_django():
+    """Configures Django for benchmarking and returns the WSGI handler"""
+    from django.conf import settings
+    # Keep query logging and the search cache out of the measurements
+    settings.DEBUG = False
+    settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+    import django
+    django.setup()
+
+    from django.core.handlers.wsgi import WSGIHandler
+    return WSGIHandler()
+
+
+def seed(rows):
+    """Migrates the scratch database and fills it with rows athletes"""
+    from django.core.management import call_command
+    from users.models import AthleteProfile, Role, User
+
+    call_command('migrate', verbosity=0)
+    existing = AthleteProfile.objects.count()
+    role = Role.objects.get(name='Athlete')
+    for start in range(existing, rows, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, rows)
+        users = User.objects.bulk_create([
+            User(email=f'athlete{i}@example.com', name=f'Athlete {i}', password='!', role=role)
+            for i in range(start, stop)
+        ])
+        AthleteProfile.objects.bulk_create([
+            AthleteProfile(
+                user=user,
+                name=user.name,
+                high_school_name=f'High School {i % 500}',
+                positions='SS/2B',
+                height=5.5 + (i % 12) / 10,
+                weight=150 + i % 80,
+                state=STATES[i % len(STATES)],
+            )
+            for i, user in zip(range(start, stop), users)
+        ])
+    return max(rows, existing)
+
+
+def request_mix(user_ids):
+    """
+    Returns:
+        list: (weight, build) pairs; build(rng) returns (method, path, body)
+            for one request
+    """
+    def search(rng):
+        return 'GET', f'/scoutbase/searchforathlete/?state={rng.choice(STATES)}&weight_min={rng.randint(150, 229)}', None
+
+    def me(rng):
+        return 'GET', '/scoutbase/me', None
+
+    def fetch_role(rng):
+        return 'GET', f'/scoutbase/fetchrole?user_id={rng.choice(user_ids)}', None
+
+    def attributes(rng):
+        return 'GET', f'/scoutbase/fetch-user-attributes/{rng.choice(user_ids)}/', None
+
+    def edit(rng):
+        return 'PUT', f'/scoutbase/editathlete/{rng.choice(user_ids)}/', {'bio': f'Updated {rng.random()}'}
+
+    return [(4, search), (2, me), (2, fetch_role), (1, attributes), (1, edit)]
+
+
+def worker(seconds, threads):
+    """Runs the request mix against the configured database; prints JSON"""
+    handler = setup_django()
+
+    from django.db.backends.signals import connection_created
+    from django.test import RequestFactory
+    from users.models import User
+    from users.tokens import issue_access_token
+
+    user_ids = list(User.objects.filter(athlete_profile__isnull=False).values_list('id', flat=True)[:1000])
+    token = issue_access_token(User.objects.get(pk=user_ids[0]))
+    mix = request_mix(user_ids)
+    weights = [weight for weight, _ in mix]
+    factory = RequestFactory(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    opened = []
+    connection_created.connect(lambda **kwargs: opened.append(1), weak=False)
+
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def run(seed_value):
+        rng = random.Random(seed_value)
+        local = []
+        while time.perf_counter() < deadline:
+            method, path, body = rng.choices(mix, weights)[0][1](rng)
+            if body is None:
+                environ = factory.generic(method, path).environ
+            else:
+                environ = factory.generic(method, path, json.dumps(body), content_type='application/json').environ
+            started = time.perf_counter()
+            response = handler(environ, lambda status, headers: None)
+            b''.join(response)
+            # Sends request_finished, which closes or keeps the connection
+            response.close()
+            local.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                with lock:
+                    errors.append(f'{method} {path}: {response.status_code}')
+        with lock:
+            latencies.extend(local)
+
+    # Opening the first connection is part of setup, not the measurement
+    opened.clear()
+    started = time.perf_counter()
+    pool = [threading.Thread(target=run, args=(number,)) for number in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(json.dumps({
+        'requests': len(latencies),
+        'rate': len(latencies) / elapsed,
+        'p50': latencies[len(latencies) // 2] * 1000 if latencies else 0,
+        'p95': latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0,
+        'connections': len(opened),
+        'errors': errors[:5],
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare MySQL drivers and connection reuse on the request mix.')
+    parser.add_argument('--database', required=True, help='Scratch database to migrate, seed and query')
+    parser.add_argument('--rows', type=int, default=20_000, help='Athletes to seed (default: 20,000)')
+    parser.add_argument('--seconds', type=float, default=15, help='Measurement time per configuration')
+    parser.add_argument('--threads', type=int, default=1, help='Request threads per process, as gthread workers')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ['DB_NAME'] = args.database
+    if args.worker:
+        worker(args.seconds, args.threads)
+        return
+
+    setup_django()
+    rows = seed(args.rows)
+    print(f'{args.database}: {rows:,} athletes; {args.threads} thread(s), {args.seconds:.0f}s per configuration')
+    print(f'{"configuration":<38} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"connections":>12}')
+
+    for label, overrides in CONFIGURATIONS:
+        if importlib.util.find_spec(DRIVER_MODULES[overrides['DB_ENGINE']]) is None:
+            print(f'{label:<38} skipped: {DRIVER_MODULES[overrides["DB_ENGINE"]]} is not installed')
+            continue
+        environment = dict(os.environ, **{
+            name: str(args.threads) if value is None else value for name, value in overrides.items()
+        })
+        completed = subprocess.run(
+            [sys.executable, __file__, '--worker', '--database', args.database,
+             '--seconds', str(args.seconds), '--threads', str(args.threads)],
+            env=environment, capture_output=True, text=True
+        )
+        if completed.returncode:
+            print(f'{label:<38} failed: {completed.stderr.strip().splitlines()[-1]}')
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f'{label:<38} {result["rate"]:>8,.0f} {result["p50"]:>8.2f} {result["p95"]:>8.2f} '
+            f'{result["connections"]:>12,}'
+        )
+        for error in result['errors']:
+            print(f'{"":<38} error: {error}')
+
+
+if __name__ == '__main__':
+    main()
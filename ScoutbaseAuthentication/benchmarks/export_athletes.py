@@ -0,0 +1,115 @@
+################################################################################
+# Athlete Export Benchmark
+# Measures export throughput and peak memory for a large athlete table.
+#
+# Seeds a throwaway SQLite database with --rows athletes (default 1,000,000),
+# then runs each export format end to end, discarding the output.
+#
+# Usage (from the ScoutbaseAuthentication directory):
+#   python benchmarks/export_athletes.py
+#   python benchmarks/export_athletes.py --rows 100000 --batch-size 5000
+################################################################################
+
+# Standard library imports
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ScoutbaseAuthentication.settings')
+
+SEED_BATCH_SIZE = 10000
+
+
+def setup_database(path):
+    """Points Django at a fresh SQLite file and migrates it"""
+    from django.conf import settings
+    settings.DATABASES['default'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': path}
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+def seed(rows):
+    """Bulk-inserts rows users with athlete profiles"""
+    from users.models import User, AthleteProfile
+
+    states = ['TX', 'CA', 'FL', 'GA', 'NC']
+    for start in range(0, rows, SEED_BATCH_SIZE):
+        stop = min(start + SEED_BATCH_SIZE, rows)
+        users = User.objects.bulk_create([
+            User(email=f'athlete{i}@example.com', name=f'Athlete {i}', password='!')
+            for i in range(start, stop)
+        ])
+        AthleteProfile.objects.bulk_create([
+            AthleteProfile(
+                user=user,
+                name=user.name,
+                high_school_name=f'High School {i % 500}',
+                positions='SS/2B',
+                height=5.5 + (i % 12) / 10,
+                weight=150 + i % 80,
+                bio='Hard-working middle infielder with a strong arm.',
+                state=states[i % len(states)],
+            )
+            for i, user in zip(range(start, stop), users)
+        ])
+
+
+def run(output, batch_size, trace_memory):
+    """Runs one export and returns (rows, seconds, peak traced bytes)"""
+    from users.export import EXPORT_ENCODERS
+    from users.search import filter_athletes
+
+    rows = 0
+
+    def count_rows(size):
+        nonlocal rows
+        rows += size
+
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    for chunk in EXPORT_ENCODERS[output](filter_athletes({}), batch_size=batch_size, progress=count_rows):
+        pass
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    return rows, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark athlete export throughput.')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        setup_database(os.path.join(directory, 'bench.sqlite3'))
+
+        started = time.perf_counter()
+        seed(args.rows)
+        print(f'Seeded {args.rows:,} athletes in {time.perf_counter() - started:.1f}s')
+
+        for output in ('ndjson', 'csv'):
+            rows, elapsed, _ = run(output, args.batch_size, trace_memory=False)
+            print(f'{output:>6}: {rows:,} rows in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)')
+
+            # A second, traced pass reports peak Python allocations
+            _, _, peak = run(output, args.batch_size, trace_memory=True)
+            print(f'{output:>6}: peak traced memory {peak / 1024 / 1024:.1f} MiB')
+
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(f'Process max RSS {maxrss / 1024:.0f} MiB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+################################################################################
+# Password Hashing Benchmark
+# Measures login password verifications per second, per core, for each hasher.
+#
+# For every hasher it runs verify_password() (the work LoginView does per
+# login) serially, then through a BoundedHashingPool sized to the machine,
+# and reports throughput per core for both.
+#
+# Usage (from the ScoutbaseAuthentication directory):
+#   python benchmarks/password_hashing.py
+#   python benchmarks/password_hashing.py --seconds 10 --workers 4
+################################################################################
+
+# Standard library imports
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ScoutbaseAuthentication.settings')
+
+HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+]
+
+
+def measure(run_batch, seconds):
+    """Calls run_batch() until seconds elapse; returns completed logins per second"""
+    completed = 0
+    started = time.perf_counter()
+    while time.perf_counter() - started < seconds:
+        completed += run_batch()
+    return completed / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark password verification throughput.')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Duration of each measurement')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Hashing pool size')
+    args = parser.parse_args()
+
+    import django
+    django.setup()
+
+    from django.contrib.auth.hashers import get_hasher
+    from django.test.utils import override_settings
+    from django.utils.module_loading import import_string
+    from users.hashing import BoundedHashingPool, verify_password
+
+    pool = BoundedHashingPool(args.workers, args.workers)
+    print(f'{args.workers} worker(s), {args.seconds:.0f}s per measurement')
+
+    for path in HASHERS:
+        hasher_class = import_string(path)
+        try:
+            encoded = hasher_class().encode('correct horse battery staple', get_hasher().salt())
+        except ValueError as error:
+            print(f'{hasher_class.algorithm:>14}: skipped ({error})')
+            continue
+
+        # Make the measured hasher the preferred one so no login triggers a rehash
+        preferred = override_settings(PASSWORD_HASHERS=[path])
+        preferred.enable()
+
+        def serial():
+            verify_password('correct horse battery staple', encoded)
+            return 1
+
+        def pooled():
+            futures = [
+                pool.submit(verify_password, 'correct horse battery staple', encoded)
+                for _ in range(args.workers)
+            ]
+            for future in futures:
+                future.result()
+            return len(futures)
+
+        serial_rate = measure(serial, args.seconds)
+        pooled_rate = measure(pooled, args.seconds)
+        print(
+            f'{hasher_class.algorithm:>14}: {serial_rate:8.1f} logins/s serial, '
+            f'{pooled_rate:8.1f} logins/s pooled, {pooled_rate / args.workers:8.1f} logins/s/core'
+        )
+        preferred.disable()
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,10 @@ from django.apps import AppConfig
 ## The name of the app is used to refer to it in other parts of the project
 ## The default auto field is used to define the primary key field type
 ## In this case, the primary key field type is BigAutoField
+## ready() registers the app's signal handlers once the models are loaded
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from . import signals  # noqa: F401
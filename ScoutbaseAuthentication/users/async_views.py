@@ -0,0 +1,130 @@
+################################################################################
+# Async Authentication Views
+# ASGI-native variants of the login and registration endpoints.
+#
+# Features:
+# - Password hashing awaited on the bounded hashing pool, so the event loop
+#   keeps serving other requests while hashes are computed
+# - 503 with Retry-After when the hashing pool is saturated
+# - Same request/response contract as LoginView and RegisterView
+#
+# These are plain Django async views (DRF's APIView is synchronous); run the
+# project under an ASGI server (asgi.py) to benefit from them.
+################################################################################
+
+# Standard library imports
+import json
+
+# Django imports
+from asgiref.sync import sync_to_async
+from django.contrib.auth.hashers import make_password
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+# Local application imports
+from .hashing import HashingPoolSaturated, get_hashing_pool, verify_password
+from .models import User
+from .serializers import UserSerializer
+from .tokens import issue_access_token, issue_refresh_token
+from .views import set_token_cookies
+
+
+def _request_data(request):
+    """Parses a JSON or form-encoded request body; None unless it is an object"""
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _error(detail, status):
+    response = JsonResponse({'detail': detail}, status=status)
+    if status == 401:
+        response['WWW-Authenticate'] = 'Bearer'
+    return response
+
+
+def _busy():
+    response = _error(HashingPoolSaturated.default_detail, HashingPoolSaturated.status_code)
+    response['Retry-After'] = '1'
+    return response
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginView(View):
+    """
+    Async variant of LoginView.
+
+    Endpoints:
+        POST /async/login: Authenticates user and returns JWT tokens
+
+    Request Body:
+        - email: string
+        - password: string
+    """
+    async def post(self, request):
+        data = _request_data(request)
+        if not data or not data.get('email') or data.get('password') is None:
+            return _error('email and password are required', 400)
+        if not isinstance(data['email'], str) or not isinstance(data['password'], str):
+            return _error('email and password must be strings', 400)
+
+        user = await User.objects.filter_by_email(data['email']).afirst()
+        if user is None:
+            return _error('User not found', 401)
+
+        # Verify in the bounded hashing pool, upgrading outdated hashes
+        try:
+            valid, upgraded_hash = await get_hashing_pool().arun(verify_password, data['password'], user.password)
+        except HashingPoolSaturated:
+            return _busy()
+        if not valid:
+            return _error('Invalid password', 401)
+        if upgraded_hash:
+            await User.objects.filter(pk=user.pk).aupdate(password=upgraded_hash)
+
+        # The role claim may need the Role table, so issue the token off the loop
+        access_token = await sync_to_async(issue_access_token)(user)
+        refresh_token = await sync_to_async(issue_refresh_token)(user)
+        response = JsonResponse({'jwt': access_token, 'refresh': refresh_token})
+        return set_token_cookies(response, access_token, refresh_token)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncRegisterView(View):
+    """
+    Async variant of RegisterView.
+
+    Endpoints:
+        POST /async/register: Creates a new user account
+
+    Request Body:
+        - email: string
+        - password: string
+        - [additional fields based on UserSerializer]
+    """
+    async def post(self, request):
+        data = _request_data(request)
+        if data is None:
+            return _error('Malformed request body', 400)
+
+        serializer = UserSerializer(data=data)
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=400)
+
+        # Hash the password in the bounded pool, then save
+        try:
+            password_hash = await get_hashing_pool().arun(make_password, serializer.validated_data.get('password'))
+        except HashingPoolSaturated:
+            return _busy()
+
+        def save():
+            serializer.save(password_hash=password_hash)
+            return serializer.data
+
+        return JsonResponse(await sync_to_async(save)())
@@ -0,0 +1,141 @@
+################################################################################
+# JWT Authentication
+# This module authenticates API requests from the JWT issued by LoginView.
+#
+# Features:
+# - Token read from the "Authorization: Bearer" header or the jwt cookie
+# - Single decode per request, shared by every view
+# - Invalid or expired tokens leave the request anonymous; IsAuthenticated
+#   views reject it with 401
+# - Small in-process TTL/LRU cache of resolved users keyed by (user_id, iat)
+################################################################################
+
+# Standard library imports
+import threading
+import time
+from collections import OrderedDict
+
+# Django and DRF imports
+from django.conf import settings
+from rest_framework.authentication import BaseAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+# Local application imports
+from .models import User
+from .tokens import decode_access_token
+
+
+class UserCache:
+    """
+    Thread-safe TTL + LRU cache of User instances.
+
+    Entries are keyed by ``(user_id, iat)`` so that a freshly issued token
+    never reuses a user resolved for an older one, and are dropped for a
+    user whenever that user is saved or deleted (see signals.py). The cache
+    is per process, so other workers may serve a changed user for up to
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return user
+
+    def set(self, key, user):
+        with self._lock:
+            self._entries[key] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == user_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(settings.JWT_USER_CACHE_SIZE, settings.JWT_USER_CACHE_TTL)
+
+
+def get_token(request):
+    """
+    Extracts the raw JWT from a request.
+
+    Args:
+        request: Django or DRF request
+
+    Returns:
+        string: The bearer token or jwt cookie, or None if neither is present
+    """
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() == 'bearer' and token:
+        return token.strip()
+    return request.COOKIES.get('jwt')
+
+
+class JWTAuthentication(BaseAuthentication):
+    """
+    DRF authentication backend for Scoutbase JWTs.
+
+    Sets ``request.user`` to the token's user and ``request.auth`` to the
+    decoded payload. Requests without a valid token (none, expired, invalid
+    or for an inactive user) are left anonymous so that permission classes
+    decide whether they are allowed: browsers keep sending the jwt cookie
+    after it expires, and public endpoints must keep answering them.
+    """
+
+    def authenticate(self, request):
+        token = get_token(request)
+        if not token:
+            return None
+
+        try:
+            payload = decode_access_token(token)
+        except AuthenticationFailed:
+            return None
+        key = (payload.get('id'), payload.get('iat'))
+        user = user_cache.get(key)
+        if user is None:
+            user = User.objects.filter(id=payload.get('id'), is_active=True).first()
+            if user is None:
+                return None
+            user_cache.set(key, user)
+        return user, payload
+
+    def authenticate_header(self, request):
+        return 'Bearer'
+
+
+class NoAuthentication(BaseAuthentication):
+    """
+    Authentication backend for endpoints that must ignore any token.
+
+    Used by register, login, token refresh and logout, which must keep
+    working when the client still holds an expired or revoked token. Unlike
+    an empty authentication_classes list it still supplies a
+    WWW-Authenticate challenge, so AuthenticationFailed maps to 401, not 403.
+    """
+
+    def authenticate(self, request):
+        return None
+
+    def authenticate_header(self, request):
+        return 'Bearer'
@@ -0,0 +1,150 @@
+################################################################################
+# Search Response Cache
+# This module caches serialized search responses in Django's cache framework.
+#
+# Features:
+# - Cache keys derived from the normalized query parameters
+# - Per-model generation counters bumped on every write (see signals.py)
+# - Hit/miss counters shared across workers through the cache backend
+# - ETags derived from the cache key for conditional GETs
+# - Off unless SEARCH_CACHE_ENABLED, i.e. unless every worker shares the
+#   cache backend; uncached responses fall back to content ETags
+################################################################################
+
+# Standard library imports
+import hashlib
+import time
+from urllib.parse import urlencode
+
+# Django and DRF imports
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+# Local application imports
+from .conditional import etag_matches, not_modified, value_etag
+
+HITS_KEY = 'search:stats:hits'
+MISSES_KEY = 'search:stats:misses'
+
+
+def _generation_key(model):
+    return f'search:generation:{model._meta.label_lower}'
+
+
+def get_generation(model):
+    """
+    Returns the current cache generation for a model.
+
+    A missing counter (first use or eviction) is seeded from the clock so it
+    can never fall back to a value that older cache entries were keyed on.
+
+    Args:
+        model: Model class whose search results are cached
+
+    Returns:
+        int: Current generation
+    """
+    key = _generation_key(model)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(model):
+    """
+    Invalidates every cached search response for a model.
+
+    Args:
+        model: Model class whose rows changed
+    """
+    try:
+        cache.incr(_generation_key(model))
+    except ValueError:
+        cache.add(_generation_key(model), time.time_ns(), timeout=None)
+
+
+def _increment(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_cache_stats():
+    """
+    Returns:
+        dict: Search cache 'hits' and 'misses' since the counters were created
+    """
+    stats = cache.get_many([HITS_KEY, MISSES_KEY])
+    return {'hits': stats.get(HITS_KEY, 0), 'misses': stats.get(MISSES_KEY, 0)}
+
+
+def search_cache_key(model, request):
+    """
+    Builds the cache key for a search request.
+
+    Query parameters are sorted so that equivalent requests share an entry.
+    The host is included because paginated responses embed absolute URLs.
+
+    Args:
+        model: Model class being searched
+        request: DRF request
+
+    Returns:
+        string: Cache key
+    """
+    params = urlencode(sorted(
+        (key, value) for key in request.query_params for value in request.query_params.getlist(key)
+    ))
+    digest = hashlib.sha256(f'{request.get_host()}{request.path}?{params}'.encode()).hexdigest()
+    return f'search:{model._meta.label_lower}:{get_generation(model)}:{digest}'
+
+
+class CachedSearchMixin:
+    """
+    Caches the serialized output of a ListAPIView.
+
+    Attributes:
+        cache_model: Model whose generation counter invalidates the cache
+
+    Responses carry an ``X-Cache: HIT`` or ``X-Cache: MISS`` header and an
+    ETag that changes whenever the model's generation does, so a matching
+    If-None-Match is answered with 304 without touching the database.
+
+    With SEARCH_CACHE_ENABLED off, responses are computed on every request
+    and carry no X-Cache header. Their ETag is a content hash, so a matching
+    If-None-Match still gets a 304, saving the body but not the query.
+    """
+    cache_model = None
+
+    def list(self, request, *args, **kwargs):
+        if not settings.SEARCH_CACHE_ENABLED:
+            # No shared generation to key on; tag the page by its content
+            response = super().list(request, *args, **kwargs)
+            etag = value_etag(response.data)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+            response['ETag'] = etag
+            return response
+
+        key = search_cache_key(self.cache_model, request)
+        etag = f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        data = cache.get(key)
+        if data is not None:
+            _increment(HITS_KEY)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+        else:
+            _increment(MISSES_KEY)
+            response = super().list(request, *args, **kwargs)
+            cache.set(key, response.data, settings.SEARCH_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+        response['ETag'] = etag
+        return response
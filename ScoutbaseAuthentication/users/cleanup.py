@@ -0,0 +1,190 @@
+################################################################################
+# Orphaned Picture Collection
+# This module finds and removes profile picture files no profile refers to.
+#
+# Features:
+# - Referenced names read with a chunked database iterator, so only their
+#   roots (name without extension) are held in memory
+# - Files under MEDIA_ROOT/profile_pictures streamed with os.scandir and
+#   removed in batches; resized derivatives of content-addressed pictures
+#   count as referenced when their original is
+# - Grace period (min_age) so files uploaded moments before their profile
+#   row is saved are never collected, checked again just before each removal
+#   since saving the same content again touches the file
+# - Direct uploads (uploads/) never confirmed within min_age swept as well
+# - Dry-run and quarantine modes, and throughput statistics
+#
+# Replaced content-addressed pictures are released by ProfilePictureField, but
+# legacy pictures, rolled-back uploads and releases lost to a crash leave files
+# behind; this is the backstop that reclaims that space. It scans the local
+# filesystem; with object storage, expire uploads/ with a bucket lifecycle
+# rule instead.
+################################################################################
+
+# Standard library imports
+import itertools
+import os
+import posixpath
+import shutil
+import time
+
+# Local application imports
+from .images import profile_picture_storage
+from .models import AthleteProfile, CoachProfile, StoredFile
+from .storage import CONTENT_NAME_RE
+from .uploads import DIRECT_UPLOAD_DIRECTORY
+
+PICTURE_DIRECTORY = 'profile_pictures'
+COLLECTION_BATCH_SIZE = 1000
+
+
+class CollectionStats:
+    """Counters reported by collect_orphans()"""
+
+    def __init__(self):
+        self.scanned = 0
+        self.orphans = 0
+        self.orphan_bytes = 0
+        self.skipped_recent = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Files scanned per second"""
+        return self.scanned / self.elapsed if self.elapsed else 0.0
+
+
+def file_root(name):
+    """
+    Args:
+        name: Storage name of a file
+
+    Returns:
+        string: Root of the original picture the file belongs to; only
+            content-addressed names can be derivatives, so a legacy name
+            such as IMG_1024.jpg is its own original
+    """
+    match = CONTENT_NAME_RE.search(name)
+    if match and match.group('suffix'):
+        return name[:match.start('suffix')]
+    return os.path.splitext(name)[0]
+
+
+def referenced_roots(batch_size=COLLECTION_BATCH_SIZE):
+    """
+    Returns:
+        set: Roots of every picture name stored on a profile
+    """
+    roots = set()
+    for model in (AthleteProfile, CoachProfile):
+        names = model.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='')
+        for name in names.values_list('profile_picture', flat=True).iterator(chunk_size=batch_size):
+            roots.add(os.path.splitext(name)[0])
+    return roots
+
+
+def iter_files(location, directory):
+    """
+    Walks a directory tree without listing it all up front.
+
+    Yields:
+        tuple: (storage name, os.DirEntry) for every file below directory
+    """
+    stack = [directory]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(location, current))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = posixpath.join(current, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry
+
+
+def collect_orphans(dry_run=False, quarantine=None, min_age=3600, batch_size=COLLECTION_BATCH_SIZE, log=None):
+    """
+    Deletes (or quarantines) picture files that no profile references.
+
+    Args:
+        dry_run: Only count orphans, leaving every file in place
+        quarantine: Directory orphans are moved to instead of being deleted,
+            keeping their relative paths
+        min_age: Files modified fewer than this many seconds ago are kept
+        batch_size: Files removed (and database rows read) per batch
+        log: Optional callable receiving the name of each orphan
+
+    Returns:
+        CollectionStats: Counts and timing for the run
+
+    Raises:
+        NotImplementedError: If profile pictures are not stored on the local
+            filesystem
+    """
+    stats = CollectionStats()
+    started = time.perf_counter()
+    location = profile_picture_storage().path('')
+
+    # Snapshot references before scanning; anything uploaded later is newer
+    # than min_age and so is skipped below
+    roots = referenced_roots(batch_size)
+    cutoff = time.time() - min_age
+
+    # Unconfirmed direct uploads are never referenced, so they go once stale
+    files = itertools.chain(iter_files(location, PICTURE_DIRECTORY), iter_files(location, DIRECT_UPLOAD_DIRECTORY))
+    batch = []
+    for name, entry in files:
+        stats.scanned += 1
+        if file_root(name) in roots:
+            continue
+        info = entry.stat(follow_symlinks=False)
+        if info.st_mtime > cutoff:
+            stats.skipped_recent += 1
+            continue
+
+        stats.orphans += 1
+        stats.orphan_bytes += info.st_size
+        if log:
+            log(name)
+        batch.append(name)
+        if len(batch) >= batch_size:
+            _remove(location, batch, dry_run, quarantine, cutoff, stats)
+            batch = []
+    _remove(location, batch, dry_run, quarantine, cutoff, stats)
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _remove(location, names, dry_run, quarantine, cutoff, stats):
+    """Deletes or quarantines one batch of orphans and their StoredFile rows"""
+    if dry_run or not names:
+        return
+    removed = []
+    for name in names:
+        source = os.path.join(location, name)
+        try:
+            # The same content may have been uploaded again since the scan,
+            # which touches the file; it is then in use, not an orphan
+            info = os.stat(source, follow_symlinks=False)
+            if info.st_mtime > cutoff:
+                stats.orphans -= 1
+                stats.orphan_bytes -= info.st_size
+                stats.skipped_recent += 1
+                continue
+            if quarantine:
+                target = os.path.join(quarantine, name)
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                shutil.move(source, target)
+            else:
+                os.remove(source)
+        except FileNotFoundError:
+            # Gone already, or being rewritten by an upload that now owns
+            # its row; leave the row alone either way
+            continue
+        removed.append(name)
+    StoredFile.objects.filter(name__in=removed).delete()
@@ -0,0 +1,115 @@
+################################################################################
+# Conditional GET Helpers
+# This module implements ETag / If-None-Match handling for read endpoints.
+#
+# Features:
+# - Strong ETags derived from a row's updated_at column
+# - Content ETags for small responses computed without touching the database
+# - 304 responses decided from the version column alone, before the full
+#   row is loaded or anything is serialized
+################################################################################
+
+# Standard library imports
+import hashlib
+import json
+
+# Django and DRF imports
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+from rest_framework.status import HTTP_304_NOT_MODIFIED
+
+
+def row_etag(pk, updated_at):
+    """
+    Builds a strong ETag for a single row version.
+
+    Args:
+        pk: Primary key of the row
+        updated_at: The row's updated_at timestamp
+
+    Returns:
+        string: Quoted ETag value
+    """
+    return f'"{pk}-{int(updated_at.timestamp() * 1_000_000)}"'
+
+
+def value_etag(value):
+    """
+    Builds a strong ETag from a response's content.
+
+    Args:
+        value: JSON-serializable response data
+
+    Returns:
+        string: Quoted ETag value
+    """
+    digest = hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def etag_matches(request, etag):
+    """
+    Args:
+        request: DRF request
+        etag: Quoted ETag of the current representation
+
+    Returns:
+        bool: True if the request's If-None-Match covers the ETag
+    """
+    if_none_match = request.headers.get('If-None-Match')
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    return '*' in etags or etag in etags
+
+
+def not_modified(etag):
+    """
+    Args:
+        etag: Quoted ETag to echo back
+
+    Returns:
+        Response: Empty 304 response carrying the ETag
+    """
+    response = Response(status=HTTP_304_NOT_MODIFIED)
+    response['ETag'] = etag
+    return response
+
+
+def check_not_modified(request, model, pk):
+    """
+    Answers a conditional GET from the row's version column only.
+
+    Only runs when the client sent If-None-Match, so unconditional requests
+    do not pay for the extra lookup.
+
+    Args:
+        request: DRF request
+        model: Model class with an updated_at column
+        pk: Primary key of the requested row
+
+    Returns:
+        Response: A 304 response if the client's copy is current, else None
+    """
+    if not request.headers.get('If-None-Match'):
+        return None
+    updated_at = model.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    etag = row_etag(pk, updated_at)
+    return not_modified(etag) if etag_matches(request, etag) else None
+
+
+def with_etag(response, instance):
+    """
+    Sets the ETag header for a response built from a single row.
+
+    Args:
+        response: Response to annotate
+        instance: Model instance the response was built from
+
+    Returns:
+        Response: The same response
+    """
+    response['ETag'] = row_etag(instance.pk, instance.updated_at)
+    return response
@@ -0,0 +1,117 @@
+################################################################################
+# Bulk Export
+# This module streams athlete profiles out as NDJSON or CSV.
+#
+# Features:
+# - Keyset-batched reads (WHERE id > last ORDER BY id LIMIT n), so memory use
+#   is bounded by the batch size rather than the number of matching rows
+# - Incremental NDJSON and CSV encoders suitable for StreamingHttpResponse
+################################################################################
+
+# Standard library imports
+import csv
+import io
+import json
+
+# Columns included in every export, in output order
+ATHLETE_EXPORT_FIELDS = [
+    'id',
+    'user_id',
+    'name',
+    'high_school_name',
+    'positions',
+    'youtube_video_link',
+    'profile_picture',
+    'height',
+    'weight',
+    'bio',
+    'state',
+    'batting_arm',
+    'throwing_arm',
+    'updated_at',
+]
+
+EXPORT_BATCH_SIZE = 2000
+
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def iter_batches(queryset, fields, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """
+    Yields rows of a queryset in primary-key order, one batch at a time.
+
+    Each batch is a separate indexed range query, so no database cursor is
+    held open between batches and no driver-side result buffering grows
+    with the size of the export.
+
+    Args:
+        queryset: Filtered queryset to export
+        fields: Column names to fetch; must include 'id'
+        batch_size: Maximum rows fetched per query
+        progress: Optional callable invoked with the size of each batch
+
+    Yields:
+        list: Up to batch_size row dicts
+    """
+    queryset = queryset.order_by('id').values(*fields)
+    last_id = 0
+    while True:
+        batch = list(queryset.filter(id__gt=last_id)[:batch_size])
+        if not batch:
+            return
+        if progress is not None:
+            progress(len(batch))
+        yield batch
+        last_id = batch[-1]['id']
+
+
+def _export_value(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def iter_ndjson(queryset, fields=ATHLETE_EXPORT_FIELDS, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """
+    Encodes a queryset as newline-delimited JSON.
+
+    Arguments are as for iter_batches().
+
+    Yields:
+        string: One chunk of NDJSON lines per batch
+    """
+    for batch in iter_batches(queryset, fields, batch_size, progress):
+        yield ''.join(
+            json.dumps({field: _export_value(row[field]) for field in fields}) + '\n'
+            for row in batch
+        )
+
+
+def iter_csv(queryset, fields=ATHLETE_EXPORT_FIELDS, batch_size=EXPORT_BATCH_SIZE, progress=None):
+    """
+    Encodes a queryset as CSV with a header row.
+
+    Arguments are as for iter_batches().
+
+    Yields:
+        string: The header, then one chunk of CSV rows per batch
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    yield buffer.getvalue()
+
+    for batch in iter_batches(queryset, fields, batch_size, progress):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_export_value(row[field]) for field in fields] for row in batch)
+        yield buffer.getvalue()
+
+
+EXPORT_ENCODERS = {
+    'ndjson': iter_ndjson,
+    'csv': iter_csv,
+}
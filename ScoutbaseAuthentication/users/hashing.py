@@ -0,0 +1,109 @@
+################################################################################
+# Password Hashing Pool
+# This module runs password hashing off the request thread in a bounded pool.
+#
+# Features:
+# - Fixed number of hashing threads per process
+# - Bounded queue; callers get a 503 instead of piling up when saturated
+# - Verification that also produces an upgraded hash when the preferred
+#   hasher (PASSWORD_HASHERS[0]) changes, e.g. from PBKDF2 to Argon2
+#
+# Threads rather than processes are used because the expensive work
+# (hashlib.pbkdf2_hmac, argon2-cffi) releases the GIL, so hashes do run in
+# parallel while the pool still caps how many CPU cores logins can occupy.
+################################################################################
+
+# Standard library imports
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Django and DRF imports
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework.exceptions import APIException
+
+
+class HashingPoolSaturated(APIException):
+    """Raised when the hashing pool's queue is full"""
+    status_code = 503
+    default_detail = 'Server busy, please retry shortly.'
+    default_code = 'service_unavailable'
+
+
+class BoundedHashingPool:
+    """
+    Thread pool that rejects work once too many jobs are in flight.
+
+    Args:
+        workers: Number of hashing threads
+        max_pending: Jobs allowed to wait for a free thread
+    """
+
+    def __init__(self, workers, max_pending):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def submit(self, fn, *args):
+        """
+        Schedules a job.
+
+        Returns:
+            Future: The job's result
+
+        Raises:
+            HashingPoolSaturated: If workers + max_pending jobs are in flight
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        """Runs a job in the pool and blocks until it finishes"""
+        return self.submit(fn, *args).result()
+
+    async def arun(self, fn, *args):
+        """Runs a job in the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """
+    Returns:
+        BoundedHashingPool: The process-wide pool, created on first use
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = BoundedHashingPool(
+                    settings.PASSWORD_HASHING_WORKERS,
+                    settings.PASSWORD_HASHING_QUEUE_DEPTH
+                )
+    return _pool
+
+
+def verify_password(raw_password, encoded):
+    """
+    Checks a password and rehashes it if its hasher is out of date.
+
+    Args:
+        raw_password: Password supplied by the client
+        encoded: Stored password hash
+
+    Returns:
+        tuple: (is_valid, upgraded hash or None)
+    """
+    upgraded = []
+    valid = check_password(raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, (upgraded[0] if upgraded else None)
@@ -0,0 +1,499 @@
+################################################################################
+# Profile Picture Derivatives
+# This module renders and stores resized copies of uploaded profile pictures.
+#
+# Features:
+# - Fixed-size renditions (PROFILE_PICTURE_SIZES) in WebP and JPEG, stored
+#   next to the original as <name>_<size>.<format>
+# - Rendering in a per-process pool of worker processes, one job per size,
+#   so large decodes neither hold the GIL nor run one size after another
+# - ProfilePictureField, an ImageField that renders derivatives whenever a
+#   new picture is saved and removes them with the original, keeps
+#   placeholder columns (BlurHash, dominant colour) in step with the picture,
+#   and releases the content reference of a replaced picture or deleted row
+# - Parallel backfill of placeholders for pictures saved before they existed
+# - Backfill of derivatives for legacy pictures, by storing them again
+#   through the field
+#
+# Derivative names are derived from the original's name, so serializers can
+# build their URLs without storing anything extra. Content-addressed pictures
+# always have their derivatives; legacy names (stored before content
+# addressing) are assumed not to, so no storage lookup is needed per row.
+################################################################################
+
+# Standard library imports
+import io
+import itertools
+import multiprocessing
+import os
+import posixpath
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Third-party imports
+from PIL import Image, ImageOps
+
+# Django imports
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from django.db.models import signals
+from django.db.models.fields.files import ImageField, ImageFieldFile
+from django.utils import timezone
+
+# Local application imports
+from .placeholders import render_placeholder
+from .storage import CONTENT_NAME_RE
+
+# Pillow format names for each derivative file extension
+DERIVATIVE_FORMATS = {
+    'webp': 'WEBP',
+    'jpg': 'JPEG',
+}
+
+
+def profile_picture_storage():
+    """
+    Returns:
+        Storage: The storage configured as STORAGES['profile_pictures']
+    """
+    return storages['profile_pictures']
+
+
+def derivative_name(name, size, extension):
+    """
+    Args:
+        name: Storage name of the original picture
+        size: Longest side of the derivative in pixels
+        extension: Derivative file extension, a key of DERIVATIVE_FORMATS
+
+    Returns:
+        string: Storage name of the derivative
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{size}.{extension}'
+
+
+def has_derivatives(name):
+    """
+    Args:
+        name: Storage name of the original picture
+
+    Returns:
+        bool: True if the picture is content-addressed, and so had its
+            derivatives rendered when it was stored
+    """
+    match = CONTENT_NAME_RE.search(name)
+    return bool(match) and not match.group('suffix')
+
+
+def derivative_names(name):
+    """
+    Returns:
+        list: Storage names of every derivative of the original picture
+    """
+    return [
+        derivative_name(name, size, extension)
+        for size in settings.PROFILE_PICTURE_SIZES
+        for extension in settings.PROFILE_PICTURE_FORMATS
+    ]
+
+
+def render_derivatives(data, size, extensions):
+    """
+    Renders one size of an image in several formats.
+
+    Runs in a worker process, so it takes and returns only bytes.
+
+    Args:
+        data: Encoded original image
+        size: Longest side of the output in pixels; smaller images are not
+            enlarged
+        extensions: Output file extensions, keys of DERIVATIVE_FORMATS
+
+    Returns:
+        dict: Encoded image bytes by extension
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        # Let the JPEG decoder downscale while decoding
+        original.draft('RGB', (size, size))
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((size, size), Image.Resampling.LANCZOS)
+
+    rendered = {}
+    for extension in extensions:
+        output = image
+        if DERIVATIVE_FORMATS[extension] == 'JPEG' and output.mode not in ('RGB', 'L'):
+            output = output.convert('RGB')
+        buffer = io.BytesIO()
+        output.save(buffer, DERIVATIVE_FORMATS[extension], quality=80)
+        rendered[extension] = buffer.getvalue()
+    return rendered
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def create_image_pool(workers):
+    """
+    Returns:
+        ProcessPoolExecutor: A new pool of worker processes
+    """
+    # Spawned workers don't inherit the server's threads and locks
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def get_image_pool():
+    """
+    Returns:
+        ProcessPoolExecutor: The process-wide rendering pool, created on first
+            use, or None when IMAGE_PROCESSING_WORKERS is 0
+    """
+    global _pool
+    if settings.IMAGE_PROCESSING_WORKERS <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = create_image_pool(settings.IMAGE_PROCESSING_WORKERS)
+    return _pool
+
+
+def save_derivatives(storage, name, data):
+    """
+    Renders every derivative of a picture and stores it next to the original.
+
+    Args:
+        storage: Storage holding the original
+        name: Storage name of the original
+        data: Encoded original image
+    """
+    extensions = tuple(settings.PROFILE_PICTURE_FORMATS)
+    pool = get_image_pool()
+    if pool is None:
+        results = [render_derivatives(data, size, extensions) for size in settings.PROFILE_PICTURE_SIZES]
+    else:
+        futures = [pool.submit(render_derivatives, data, size, extensions) for size in settings.PROFILE_PICTURE_SIZES]
+        results = [future.result() for future in futures]
+
+    for size, rendered in zip(settings.PROFILE_PICTURE_SIZES, results):
+        for extension, content in rendered.items():
+            target = derivative_name(name, size, extension)
+            # Replace rather than let the storage pick an alternative name
+            if storage.exists(target):
+                storage.delete(target)
+            storage.save(target, ContentFile(content))
+
+
+def delete_derivatives(storage, name):
+    """Deletes every derivative of a picture, skipping ones that don't exist"""
+    for target in derivative_names(name):
+        storage.delete(target)
+
+
+def release_picture(storage, name):
+    """
+    Releases a profile's reference to a content-addressed picture once the
+    current transaction commits, so a rollback keeps the reference.
+
+    Legacy names are left for collect_orphan_pictures, since nothing records
+    whether another row still points at them.
+
+    Args:
+        storage: Storage holding the picture
+        name: Storage name the profile no longer refers to
+    """
+    match = CONTENT_NAME_RE.search(name or '')
+    if match and not match.group('suffix'):
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+def read_placeholder_source(storage, name):
+    """
+    Reads the cheapest file to compute a picture's placeholders from.
+
+    Args:
+        storage: Storage holding the picture
+        name: Storage name of the original
+
+    Returns:
+        bytes: The smallest derivative, else the original, or None if
+            neither exists
+    """
+    smallest = derivative_name(name, min(settings.PROFILE_PICTURE_SIZES), settings.PROFILE_PICTURE_FORMATS[0])
+    for target in (smallest, name):
+        if storage.exists(target):
+            with storage.open(target) as file:
+                return file.read()
+    return None
+
+
+class ProfilePictureFieldFile(ImageFieldFile):
+    """Image file that keeps its derivatives and placeholders in step with the original"""
+
+    def save(self, name, content, save=True):
+        super().save(name, content, save=False)
+        # Storing took a reference; the row's old one goes when it is saved
+        self.field.mark_acquired(self.instance)
+        # Content-addressed storage may already hold this picture's derivatives
+        if not all(self.storage.exists(target) for target in derivative_names(self.name)):
+            content.seek(0)
+            save_derivatives(self.storage, self.name, content.read())
+        self.field.update_placeholder_fields(self.instance, self)
+        if save:
+            self.instance.save()
+
+    save.alters_data = True
+
+    def delete(self, save=True):
+        if self.name:
+            delete_derivatives(self.storage, self.name)
+        # The reference is released here, not again when the row is saved
+        self.field.set_stored_name(self.instance, None)
+        super().delete(save)
+
+    delete.alters_data = True
+
+
+class ProfilePictureField(ImageField):
+    """
+    ImageField whose uploads get resized WebP and JPEG derivatives.
+
+    Like ImageField's width_field and height_field, blurhash_field and
+    color_field name model fields that are set from each new picture and
+    cleared when it is removed.
+    """
+    attr_class = ProfilePictureFieldFile
+
+    def __init__(self, *args, blurhash_field=None, color_field=None, **kwargs):
+        self.blurhash_field = blurhash_field
+        self.color_field = color_field
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.blurhash_field:
+            kwargs['blurhash_field'] = self.blurhash_field
+        if self.color_field:
+            kwargs['color_field'] = self.color_field
+        return name, path, args, kwargs
+
+    def contribute_to_class(self, cls, name, **kwargs):
+        super().contribute_to_class(cls, name, **kwargs)
+        if not cls._meta.abstract:
+            signals.post_init.connect(self.remember_stored_name, sender=cls)
+            signals.post_save.connect(self.release_replaced_name, sender=cls)
+            signals.post_delete.connect(self.release_stored_name, sender=cls)
+
+    def pre_save(self, model_instance, add):
+        file = super().pre_save(model_instance, add)
+        # Placeholder fields are declared after this one, so clearing them
+        # here still reaches the same INSERT or UPDATE
+        if not file:
+            self.update_placeholder_fields(model_instance, file)
+        return file
+
+    def set_stored_name(self, instance, name):
+        """Records the picture name the instance's row holds"""
+        instance.__dict__[f'_{self.attname}_stored'] = name
+        instance.__dict__[f'_{self.attname}_acquired'] = False
+
+    def mark_acquired(self, instance):
+        """
+        Records that a new reference was taken for the instance's picture.
+
+        The row's old reference is then released when it is saved, even if
+        the name is unchanged because the same content was uploaded again.
+        """
+        instance.__dict__[f'_{self.attname}_acquired'] = True
+
+    def remember_stored_name(self, instance, **kwargs):
+        """Records the name a row was loaded with, so replacing it can release it"""
+        # Read the raw value: the descriptor would wrap it, or load it if deferred
+        value = instance.__dict__.get(self.attname)
+        self.set_stored_name(instance, value if isinstance(value, str) else None)
+
+    def release_replaced_name(self, instance, created, update_fields=None, **kwargs):
+        """Releases the picture a saved row held before, if it was replaced"""
+        if update_fields is not None and self.name not in update_fields:
+            return
+        previous = instance.__dict__.get(f'_{self.attname}_stored')
+        current = getattr(instance, self.attname).name or None
+        acquired = instance.__dict__.get(f'_{self.attname}_acquired')
+        if previous and not created and (acquired or previous != current):
+            release_picture(self.storage, previous)
+        self.set_stored_name(instance, current)
+
+    def release_stored_name(self, instance, **kwargs):
+        """Releases the picture a deleted row held"""
+        release_picture(self.storage, instance.__dict__.get(f'_{self.attname}_stored'))
+
+    def update_placeholder_fields(self, instance, file):
+        """
+        Sets the placeholder fields from the picture, or clears them.
+
+        Args:
+            instance: Model instance owning the picture
+            file: The instance's ProfilePictureFieldFile
+        """
+        if not (self.blurhash_field or self.color_field):
+            return
+        data = read_placeholder_source(file.storage, file.name) if file else None
+        blurhash, color = render_placeholder(data) if data else (None, None)
+        if self.blurhash_field:
+            setattr(instance, self.blurhash_field, blurhash)
+        if self.color_field:
+            setattr(instance, self.color_field, color)
+
+
+PLACEHOLDER_BATCH_SIZE = 500
+
+
+class BackfillStats:
+    """Counters reported by backfill_placeholders()"""
+
+    def __init__(self):
+        self.updated = 0
+        self.missing = 0
+        self.failed = 0
+        self.elapsed = 0.0
+
+    @property
+    def rate(self):
+        """Profiles updated per second"""
+        return self.updated / self.elapsed if self.elapsed else 0.0
+
+
+def backfill_placeholders(models, recompute=False, workers=None, batch_size=PLACEHOLDER_BATCH_SIZE, log=None):
+    """
+    Computes placeholders for stored pictures that lack them.
+
+    Files are read in this process while a pool of worker processes decodes
+    and encodes them. Each batch is written with one bulk UPDATE per model;
+    profiles sharing a content-addressed picture are computed once.
+
+    Args:
+        models: Profile models whose profile_picture field has placeholder
+            fields
+        recompute: Recompute every picture, not only those without a
+            BlurHash
+        workers: Worker processes; defaults to IMAGE_PROCESSING_WORKERS, and
+            0 computes in this process
+        batch_size: Profiles read, computed and written per batch
+        log: Optional callable receiving a message for each file that is
+            missing or cannot be decoded
+
+    Returns:
+        BackfillStats: Counts and timing for the run
+    """
+    from .cache import bump_generation
+
+    stats = BackfillStats()
+    started = time.perf_counter()
+    workers = settings.IMAGE_PROCESSING_WORKERS if workers is None else workers
+    pool = create_image_pool(workers) if workers > 0 else None
+
+    try:
+        for model in models:
+            field = model._meta.get_field('profile_picture')
+            queryset = model.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='')
+            if not recompute:
+                queryset = queryset.filter(**{f'{field.blurhash_field}__isnull': True})
+            rows = queryset.order_by('pk').values_list('pk', 'profile_picture').iterator(chunk_size=batch_size)
+
+            while batch := list(itertools.islice(rows, batch_size)):
+                results = _compute_placeholders(field.storage, {name for _, name in batch}, pool, stats, log)
+                now = timezone.now()
+                profiles = [
+                    model(pk=pk, updated_at=now, **{
+                        field.blurhash_field: results[name][0],
+                        field.color_field: results[name][1],
+                    })
+                    for pk, name in batch if name in results
+                ]
+                # bulk_update skips auto_now and signals, so refresh updated_at
+                # (and with it ETags) and the search cache by hand
+                model.objects.bulk_update(profiles, [field.blurhash_field, field.color_field, 'updated_at'])
+                bump_generation(model)
+                stats.updated += len(profiles)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def backfill_derivatives(models, log=None):
+    """
+    Stores legacy pictures again so they get derivatives.
+
+    Each picture whose name is not content-addressed is read and saved
+    through its ProfilePictureField, which content-addresses it and renders
+    its derivatives and placeholders; the profile is saved with the new
+    name. The legacy file is left unreferenced for collect_orphan_pictures.
+    Derivatives render in the IMAGE_PROCESSING_WORKERS pool.
+
+    Args:
+        models: Profile models with a profile_picture field
+        log: Optional callable receiving a message for each file that is
+            missing or cannot be decoded
+
+    Returns:
+        BackfillStats: Counts and timing for the run
+    """
+    stats = BackfillStats()
+    started = time.perf_counter()
+
+    for model in models:
+        queryset = model.objects.exclude(profile_picture__isnull=True).exclude(profile_picture='')
+        for profile in queryset.order_by('pk').iterator(chunk_size=PLACEHOLDER_BATCH_SIZE):
+            picture = profile.profile_picture
+            if has_derivatives(picture.name):
+                continue
+            if not picture.storage.exists(picture.name):
+                stats.missing += 1
+                if log:
+                    log(f'missing: {picture.name}')
+                continue
+            with picture.storage.open(picture.name) as file:
+                data = file.read()
+            try:
+                # Roll back the new reference if rendering fails
+                with transaction.atomic():
+                    picture.save(posixpath.basename(picture.name), ContentFile(data))
+            except Exception as exc:
+                stats.failed += 1
+                if log:
+                    log(f'failed: {picture.name}: {exc}')
+                continue
+            stats.updated += 1
+
+    stats.elapsed = time.perf_counter() - started
+    return stats
+
+
+def _compute_placeholders(storage, names, pool, stats, log):
+    """Computes placeholders for a batch of picture names, keyed by name"""
+    pending = {}
+    for name in names:
+        data = read_placeholder_source(storage, name)
+        if data is None:
+            stats.missing += 1
+            if log:
+                log(f'missing: {name}')
+            continue
+        pending[name] = pool.submit(render_placeholder, data) if pool else data
+
+    results = {}
+    for name, job in pending.items():
+        try:
+            results[name] = job.result() if pool else render_placeholder(job)
+        except Exception as exc:
+            stats.failed += 1
+            if log:
+                log(f'failed: {name}: {exc}')
+    return results
@@ -0,0 +1,26 @@
+################################################################################
+# backfill_picture_derivatives Management Command
+# Renders resized derivatives for pictures stored before they existed.
+#
+# Usage:
+#   python manage.py backfill_picture_derivatives
+#   python manage.py backfill_picture_derivatives && python manage.py collect_orphan_pictures
+################################################################################
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Local application imports
+from users.images import backfill_derivatives
+from users.models import AthleteProfile, CoachProfile
+
+
+class Command(BaseCommand):
+    help = 'Stores legacy athlete and coach pictures again, content-addressed with derivatives.'
+
+    def handle(self, *args, **options):
+        stats = backfill_derivatives((AthleteProfile, CoachProfile), log=self.stdout.write)
+        self.stderr.write(
+            f'Updated {stats.updated} profiles in {stats.elapsed:.2f}s ({stats.rate:,.0f} profiles/s); '
+            f'{stats.missing} files missing, {stats.failed} failed'
+        )
@@ -0,0 +1,50 @@
+################################################################################
+# backfill_picture_placeholders Management Command
+# Computes BlurHash and dominant-colour placeholders for stored pictures.
+#
+# Usage:
+#   python manage.py backfill_picture_placeholders
+#   python manage.py backfill_picture_placeholders --workers 8
+#   python manage.py backfill_picture_placeholders --all   # recompute every picture
+################################################################################
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from users.images import PLACEHOLDER_BATCH_SIZE, backfill_placeholders
+from users.models import AthleteProfile, CoachProfile
+
+
+class Command(BaseCommand):
+    help = 'Computes profile picture placeholders for athletes and coaches that lack them.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Recompute every picture, not only those without a placeholder'
+        )
+        parser.add_argument(
+            '--workers', type=int,
+            help='Worker processes (default: IMAGE_PROCESSING_WORKERS; 0 computes in this process)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=PLACEHOLDER_BATCH_SIZE,
+            help=f'Profiles computed and written per batch (default: {PLACEHOLDER_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        stats = backfill_placeholders(
+            (AthleteProfile, CoachProfile),
+            recompute=options['all'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write
+        )
+        self.stderr.write(
+            f'Updated {stats.updated} profiles in {stats.elapsed:.2f}s ({stats.rate:,.0f} profiles/s); '
+            f'{stats.missing} files missing, {stats.failed} failed'
+        )
@@ -0,0 +1,50 @@
+################################################################################
+# check_query_plans Management Command
+# EXPLAINs every search filter combination and fails if any indexed one
+# scans a table; known substring-only scans are listed, not failed.
+#
+# Usage:
+#   python manage.py check_query_plans              # against a production-sized copy
+#   python manage.py check_query_plans --analyze    # refresh statistics first
+#   python manage.py check_query_plans --verbose    # print every plan
+################################################################################
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from users.plans import analyze_tables, check_query_plans
+
+
+class Command(BaseCommand):
+    help = 'Fails if any search query plan falls back to a full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--analyze', action='store_true',
+            help='Refresh the optimizer statistics before explaining'
+        )
+        parser.add_argument(
+            '--verbose', action='store_true',
+            help='Print the plan of every query, not only failing ones'
+        )
+
+    def handle(self, *args, **options):
+        if options['analyze']:
+            analyze_tables()
+
+        results = check_query_plans()
+        failures = [result for result in results if result.failed]
+        known = [result for result in results if result.known_scan and result.scans]
+        for result in results:
+            if result.failed or options['verbose']:
+                status = f'FULL SCAN of {", ".join(result.scans)}' if result.scans else 'ok'
+                self.stdout.write(f'{result.label}: {status}\n{result.plan}\n')
+
+        # Substring-only searches can't use an index; list them every run
+        for result in known:
+            self.stderr.write(f'Known full scan: {result.label} ({", ".join(result.scans)})')
+        checked = len(results) - sum(result.known_scan for result in results)
+        if failures:
+            raise CommandError(f'{len(failures)} of {checked} indexed query plans scan a full table')
+        self.stderr.write(f'All {checked} indexed query plans use an index; {len(known)} known full scans')
@@ -0,0 +1,75 @@
+################################################################################
+# collect_orphan_pictures Management Command
+# Deletes or quarantines profile picture files that no profile references.
+#
+# Usage:
+#   python manage.py collect_orphan_pictures --dry-run
+#   python manage.py collect_orphan_pictures --quarantine /var/scoutbase/orphans
+#   python manage.py collect_orphan_pictures --interval 86400   # run daily
+################################################################################
+
+# Standard library imports
+import time
+
+# Django imports
+from django.core.management.base import BaseCommand, CommandError
+
+# Local application imports
+from users.cleanup import COLLECTION_BATCH_SIZE, collect_orphans
+
+
+class Command(BaseCommand):
+    help = 'Removes profile picture files under MEDIA_ROOT/profile_pictures that no profile references.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Report orphans without removing them'
+        )
+        parser.add_argument(
+            '--quarantine', metavar='DIRECTORY',
+            help='Move orphans here instead of deleting them'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600, metavar='SECONDS',
+            help='Keep files modified more recently than this (default: 3600)'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=COLLECTION_BATCH_SIZE,
+            help=f'Files removed and rows read per batch (default: {COLLECTION_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--interval', type=int, metavar='SECONDS',
+            help='Keep running, collecting again every SECONDS'
+        )
+        parser.add_argument(
+            '--list', action='store_true',
+            help='Print the name of every orphan'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        while True:
+            try:
+                stats = collect_orphans(
+                    dry_run=options['dry_run'],
+                    quarantine=options['quarantine'],
+                    min_age=options['min_age'],
+                    batch_size=options['batch_size'],
+                    log=self.stdout.write if options['list'] else None
+                )
+            except NotImplementedError:
+                raise CommandError(
+                    'Orphan collection scans the local filesystem; with object storage, expire uploads/ with a bucket lifecycle rule'
+                )
+            action = 'Found' if options['dry_run'] else ('Quarantined' if options['quarantine'] else 'Deleted')
+            self.stderr.write(
+                f'{action} {stats.orphans} orphaned files ({stats.orphan_bytes / 1_000_000:.1f} MB) '
+                f'of {stats.scanned} scanned in {stats.elapsed:.2f}s ({stats.rate:,.0f} files/s); '
+                f'{stats.skipped_recent} recent files kept'
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
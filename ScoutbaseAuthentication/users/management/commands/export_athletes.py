@@ -0,0 +1,75 @@
+################################################################################
+# export_athletes Management Command
+# Streams athlete profiles to a file or stdout as NDJSON or CSV.
+#
+# Usage:
+#   python manage.py export_athletes --output csv --filter state=TX > athletes.csv
+#   python manage.py export_athletes --filter positions=SS --file athletes.ndjson
+################################################################################
+
+# Standard library imports
+import time
+
+# Django and DRF imports
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+
+# Local application imports
+from users.export import EXPORT_BATCH_SIZE, EXPORT_ENCODERS
+from users.search import filter_athletes
+
+
+class Command(BaseCommand):
+    help = 'Exports athlete profiles matching the search filters as NDJSON or CSV.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output', choices=sorted(EXPORT_ENCODERS), default='ndjson',
+            help='Output format (default: ndjson)'
+        )
+        parser.add_argument(
+            '--filter', action='append', default=[], metavar='NAME=VALUE',
+            help='SearchAthleteView filter, e.g. state=TX; may be repeated'
+        )
+        parser.add_argument(
+            '--file', help='Write to this path instead of stdout'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=EXPORT_BATCH_SIZE,
+            help=f'Rows fetched per query (default: {EXPORT_BATCH_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        # Parse NAME=VALUE filters into search parameters
+        params = {}
+        for item in options['filter']:
+            name, sep, value = item.partition('=')
+            if not sep:
+                raise CommandError(f"Invalid filter '{item}', expected NAME=VALUE")
+            params[name] = value
+
+        try:
+            queryset = filter_athletes(params)
+        except ValidationError as error:
+            raise CommandError(f'Invalid filter: {error.detail}')
+        encoder = EXPORT_ENCODERS[options['output']]
+
+        # Stream chunks straight to the destination, counting rows per batch
+        rows = 0
+
+        def count_rows(batch_size):
+            nonlocal rows
+            rows += batch_size
+
+        out = open(options['file'], 'w', newline='') if options['file'] else self.stdout
+        started = time.perf_counter()
+        try:
+            for chunk in encoder(queryset, batch_size=options['batch_size'], progress=count_rows):
+                out.write(chunk)
+        finally:
+            if options['file']:
+                out.close()
+
+        elapsed = time.perf_counter() - started
+        rate = rows / elapsed if elapsed else 0
+        self.stderr.write(f'Exported {rows} athletes in {elapsed:.2f}s ({rate:,.0f} rows/s)')
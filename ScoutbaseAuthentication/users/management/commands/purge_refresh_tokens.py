@@ -0,0 +1,35 @@
+################################################################################
+# purge_refresh_tokens Management Command
+# Deletes expired refresh tokens so the RefreshToken table stays bounded.
+#
+# Usage:
+#   python manage.py purge_refresh_tokens
+#   python manage.py purge_refresh_tokens --interval 86400   # run daily
+################################################################################
+
+# Standard library imports
+import time
+
+# Django imports
+from django.core.management.base import BaseCommand
+
+# Local application imports
+from users.tokens import purge_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes refresh tokens past their expiry, including rotated and revoked ones.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=int, metavar='SECONDS',
+            help='Keep running, purging again every SECONDS'
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = purge_refresh_tokens()
+            self.stderr.write(f'Deleted {deleted} expired refresh tokens')
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
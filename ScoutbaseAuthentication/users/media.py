@@ -0,0 +1,190 @@
+################################################################################
+# Media Serving
+# This module serves uploaded files from MEDIA_ROOT in production.
+#
+# Features:
+# - Optional authorization (MEDIA_REQUIRE_AUTHENTICATION) using the JWT
+# - Byte transfer handed to the front proxy with X-Accel-Redirect (nginx) or
+#   X-Sendfile (Apache/lighttpd) when configured
+# - Pure-Python fallback with single-range Range requests, ETag /
+#   If-None-Match and Last-Modified / If-Modified-Since
+# - Far-future immutable caching for content-addressed names, whose bytes
+#   never change, and MEDIA_CACHE_MAX_AGE for everything else
+################################################################################
+
+# Standard library imports
+import mimetypes
+import os
+import re
+import stat
+
+# Django imports
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+from django.views import View
+
+# Local application imports
+from .authentication import JWTAuthentication
+from .storage import CONTENT_NAME_RE
+
+IMMUTABLE_CACHE_CONTROL = 'max-age=31536000, immutable'
+RANGE_CHUNK_SIZE = 64 * 1024
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+def parse_range(header, size):
+    """
+    Parses a single-range Range header.
+
+    Args:
+        header: Range header value
+        size: File size in bytes
+
+    Returns:
+        tuple: (start, end) inclusive byte positions, None to serve the whole
+            file (no header, or a form this view does not support such as
+            multiple ranges), or False if the range cannot be satisfied
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the final N bytes
+        start = max(size - int(last), 0)
+        end = size - 1
+    if start > end or start >= size:
+        return False
+    return start, end
+
+
+def iter_range(file, start, length):
+    """Yields length bytes of file from start, then closes it"""
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(RANGE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+class MediaView(View):
+    """
+    Serves a file from MEDIA_ROOT.
+
+    Endpoints:
+        GET /media/<path>: Returns the file
+
+    Responses:
+        - 200 with the file, or 206 with the requested byte range
+        - 304 when If-None-Match or If-Modified-Since shows the client's copy
+          is current
+        - 401 when MEDIA_REQUIRE_AUTHENTICATION is on and the request has no
+          valid token
+        - 404 for missing files or paths outside MEDIA_ROOT
+        - 416 for unsatisfiable ranges
+    """
+
+    def get(self, request, name):
+        # Authorize before touching the filesystem
+        if settings.MEDIA_REQUIRE_AUTHENTICATION:
+            if JWTAuthentication().authenticate(request) is None:
+                response = HttpResponse(status=401)
+                response['WWW-Authenticate'] = 'Bearer'
+                return response
+
+        try:
+            path = safe_join(settings.MEDIA_ROOT, name)
+        except SuspiciousFileOperation:
+            raise Http404('File not found')
+
+        cache_control = self.cache_control(name)
+
+        # Let the front proxy stream the bytes (and handle Range itself)
+        if settings.MEDIA_X_ACCEL_REDIRECT_PREFIX:
+            response = HttpResponse()
+            response['X-Accel-Redirect'] = settings.MEDIA_X_ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + name.lstrip('/')
+            response['Cache-Control'] = cache_control
+            del response['Content-Type']
+            return response
+
+        try:
+            info = os.stat(path)
+        except (FileNotFoundError, NotADirectoryError):
+            raise Http404('File not found')
+        if not stat.S_ISREG(info.st_mode):
+            raise Http404('File not found')
+
+        etag = quote_etag(f'{info.st_size:x}-{info.st_mtime_ns:x}')
+        last_modified = http_date(info.st_mtime)
+        headers = {'ETag': etag, 'Last-Modified': last_modified, 'Cache-Control': cache_control}
+
+        if self.not_modified(request, etag, info.st_mtime):
+            response = HttpResponseNotModified()
+            for header, value in headers.items():
+                response[header] = value
+            return response
+
+        content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+        if settings.MEDIA_X_SENDFILE:
+            response = HttpResponse(content_type=content_type)
+            response['X-Sendfile'] = path
+        else:
+            response = self.file_response(request, path, info.st_size, etag, last_modified, content_type)
+
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    def cache_control(self, name):
+        """Content-addressed names never change, so they may be cached forever"""
+        visibility = 'private' if settings.MEDIA_REQUIRE_AUTHENTICATION else 'public'
+        if CONTENT_NAME_RE.search(name):
+            return f'{visibility}, {IMMUTABLE_CACHE_CONTROL}'
+        return f'{visibility}, max-age={settings.MEDIA_CACHE_MAX_AGE}'
+
+    def not_modified(self, request, etag, mtime):
+        """Applies If-None-Match, falling back to If-Modified-Since"""
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = parse_etags(if_none_match)
+            return '*' in etags or etag in etags
+        since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+        return since is not None and int(mtime) <= since
+
+    def file_response(self, request, path, size, etag, last_modified, content_type):
+        """Streams the whole file, or the single byte range the client asked for"""
+        byte_range = parse_range(request.headers.get('Range'), size)
+        # If-Range: only honour the range if the client's copy is current
+        if_range = request.headers.get('If-Range')
+        if byte_range and if_range and if_range not in (etag, last_modified):
+            byte_range = None
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        file = open(path, 'rb')
+        if byte_range is None:
+            response = FileResponse(file, content_type=content_type)
+        else:
+            start, end = byte_range
+            response = StreamingHttpResponse(
+                iter_range(file, start, end - start + 1), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(end - start + 1)
+        response['Accept-Ranges'] = 'bytes'
+        return response
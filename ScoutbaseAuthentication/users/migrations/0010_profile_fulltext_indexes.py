@@ -0,0 +1,33 @@
+from django.db import migrations
+
+# FULLTEXT indexes are MySQL-specific and have no Django index class, so
+# they are created with raw SQL and skipped on other backends (e.g. SQLite
+# in tests, where users.search falls back to icontains).
+FULLTEXT_INDEXES = [
+    ('users_athleteprofile', 'athlete_fulltext_idx', ('name', 'high_school_name', 'bio')),
+    ('users_coachprofile', 'coach_fulltext_idx', ('bio', 'school_name', 'team_needs')),
+]
+
+def create_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, index, columns in FULLTEXT_INDEXES:
+        schema_editor.execute(
+            f"CREATE FULLTEXT INDEX `{index}` ON `{table}` ({', '.join(f'`{c}`' for c in columns)})"
+        )
+
+def drop_fulltext_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != 'mysql':
+        return
+    for table, index, _ in FULLTEXT_INDEXES:
+        schema_editor.execute(f"DROP INDEX `{index}` ON `{table}`")
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_coachprofile_division'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fulltext_indexes, drop_fulltext_indexes),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-17 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0010_profile_fulltext_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='athleteprofile',
+            name='batting_arm',
+            field=models.CharField(default='Unknown', help_text='Batting arm of the athlete', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='athleteprofile',
+            name='throwing_arm',
+            field=models.CharField(default='Unknown', help_text='Throwing arm of the athlete', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='coachprofile',
+            name='name',
+            field=models.CharField(default='Unknown', help_text='Name of coach', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['state', 'height'], name='athlete_state_height_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['state', 'weight'], name='athlete_state_weight_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['height'], name='athlete_height_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['weight'], name='athlete_weight_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-17 01:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0011_athleteprofile_range_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Position',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(help_text='Upper-case position code', max_length=32, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='athleteprofile',
+            name='normalized_positions',
+            field=models.ManyToManyField(blank=True, help_text='Positions parsed from the positions field', related_name='athletes', to='users.position'),
+        ),
+    ]
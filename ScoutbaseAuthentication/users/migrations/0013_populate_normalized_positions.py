@@ -0,0 +1,48 @@
+import re
+
+from django.db import migrations
+
+def parse_positions(value):
+    # Frozen copy of users.models.parse_positions
+    codes = []
+    for token in re.split(r'[\s,/;|&+]+', value or ''):
+        code = token.strip().upper()
+        if code and code != 'UNKNOWN' and code not in codes:
+            codes.append(code)
+    return codes
+
+def populate_normalized_positions(apps, schema_editor):
+    AthleteProfile = apps.get_model('users', 'AthleteProfile')
+    Position = apps.get_model('users', 'Position')
+    Through = AthleteProfile.normalized_positions.through
+
+    profiles = list(AthleteProfile.objects.values_list('id', 'positions'))
+    parsed = {profile_id: parse_positions(positions) for profile_id, positions in profiles}
+
+    all_codes = {code for codes in parsed.values() for code in codes}
+    Position.objects.bulk_create([Position(code=code) for code in all_codes], ignore_conflicts=True)
+    position_ids = dict(Position.objects.values_list('code', 'id'))
+
+    Through.objects.bulk_create(
+        [
+            Through(athleteprofile_id=profile_id, position_id=position_ids[code])
+            for profile_id, codes in parsed.items()
+            for code in codes
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+def clear_normalized_positions(apps, schema_editor):
+    AthleteProfile = apps.get_model('users', 'AthleteProfile')
+    AthleteProfile.normalized_positions.through.objects.all().delete()
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0012_position_athleteprofile_normalized_positions'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_normalized_positions, clear_normalized_positions),
+    ]
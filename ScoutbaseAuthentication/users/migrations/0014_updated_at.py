@@ -0,0 +1,30 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0013_populate_normalized_positions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last modification time, used as the row version for ETags'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='athleteprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last modification time, used as the row version for ETags'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='coachprofile',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, help_text='Last modification time, used as the row version for ETags'),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.2 on 2026-10-17 01:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0014_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RefreshToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token_hash', models.CharField(help_text='HMAC-SHA256 of the raw token', max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Issue time')),
+                ('expires_at', models.DateTimeField(help_text='Expiry time')),
+                ('revoked_at', models.DateTimeField(blank=True, help_text='Time the token was rotated or revoked', null=True)),
+                ('user', models.ForeignKey(help_text='User the token was issued to', on_delete=django.db.models.deletion.CASCADE, related_name='refresh_tokens', to='users.user')),
+            ],
+        ),
+    ]
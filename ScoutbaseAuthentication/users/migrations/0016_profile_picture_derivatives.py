@@ -0,0 +1,24 @@
+# Generated by Django 5.1.2 on 2026-10-17 01:54
+
+import users.images
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0015_refreshtoken'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='athleteprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, help_text="Athlete's profile picture", null=True, upload_to='profile_pictures/'),
+        ),
+        migrations.AlterField(
+            model_name='coachprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, help_text="Coach's profile picture", null=True, upload_to='profile_pictures/'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.2 on 2026-10-17 01:56
+
+import users.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0016_profile_picture_derivatives'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredFile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Storage name of the file', max_length=255, unique=True)),
+                ('size', models.PositiveBigIntegerField(help_text='File size in bytes')),
+                ('references', models.PositiveIntegerField(default=0, help_text='Saves of this content not yet deleted')),
+                ('created_at', models.DateTimeField(auto_now_add=True, help_text='Time the content was first stored')),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='athleteprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, help_text="Athlete's profile picture", null=True, storage=users.images.profile_picture_storage, upload_to='profile_pictures/'),
+        ),
+        migrations.AlterField(
+            model_name='coachprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, help_text="Coach's profile picture", null=True, storage=users.images.profile_picture_storage, upload_to='profile_pictures/'),
+        ),
+    ]
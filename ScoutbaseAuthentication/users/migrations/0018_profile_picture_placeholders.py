@@ -0,0 +1,44 @@
+# Generated by Django 5.1.2 on 2026-10-17 02:08
+
+import users.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0017_content_addressed_storage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='athleteprofile',
+            name='profile_picture_blurhash',
+            field=models.CharField(blank=True, help_text='BlurHash placeholder of the profile picture, set on save', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='athleteprofile',
+            name='profile_picture_color',
+            field=models.CharField(blank=True, help_text='Dominant colour of the profile picture as #rrggbb, set on save', max_length=7, null=True),
+        ),
+        migrations.AddField(
+            model_name='coachprofile',
+            name='profile_picture_blurhash',
+            field=models.CharField(blank=True, help_text='BlurHash placeholder of the profile picture, set on save', max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='coachprofile',
+            name='profile_picture_color',
+            field=models.CharField(blank=True, help_text='Dominant colour of the profile picture as #rrggbb, set on save', max_length=7, null=True),
+        ),
+        migrations.AlterField(
+            model_name='athleteprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, blurhash_field='profile_picture_blurhash', color_field='profile_picture_color', help_text="Athlete's profile picture", null=True, storage=users.images.profile_picture_storage, upload_to='profile_pictures/'),
+        ),
+        migrations.AlterField(
+            model_name='coachprofile',
+            name='profile_picture',
+            field=users.images.ProfilePictureField(blank=True, blurhash_field='profile_picture_blurhash', color_field='profile_picture_color', help_text="Coach's profile picture", null=True, storage=users.images.profile_picture_storage, upload_to='profile_pictures/'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.1.2 on 2026-10-17 02:13
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0018_profile_picture_placeholders'),
+    ]
+
+    # Functional indexes need MySQL 8.0.13 or later
+    operations = [
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['batting_arm'], name='athlete_batting_arm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='athleteprofile',
+            index=models.Index(fields=['throwing_arm'], name='athlete_throwing_arm_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(django.db.models.functions.text.Lower('email'), name='user_email_lower_idx'),
+        ),
+        # State is matched by substring, which can't seek on a state prefix;
+        # the height and weight indexes serve the ranges on their own
+        migrations.RemoveIndex(
+            model_name='athleteprofile',
+            name='athlete_state_height_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='athleteprofile',
+            name='athlete_state_weight_idx',
+        ),
+    ]
@@ -6,13 +6,24 @@
 # - Custom user model with email authentication
 # - Role-based access control
 # - Profile models for Athletes, Coaches, and Scouts
-# - Image handling for profile pictures
+# - Image handling for profile pictures, with resized derivatives
+# - Normalized, indexed athlete positions
+# - Indexes matching the search filters, including case-insensitive ones
+# - Hashed, revocable refresh tokens
+# - Reference counts for content-addressed uploads
 ################################################################################
 
+# Standard library imports
+import re
+
 # Django imports
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser, Group, Permission, BaseUserManager
 
+# Local application imports
+from .images import ProfilePictureField, profile_picture_storage
+
 class UserManager(BaseUserManager):
     """
     Custom user manager for email-based authentication.
@@ -20,13 +31,15 @@ class UserManager(BaseUserManager):
     Replaces Django's default username-based authentication with email-based system.
     Handles user creation and superuser creation with appropriate validation.
     """
-    def create_user(self, email, password=None, **extra_fields):
+    def create_user(self, email, password=None, password_hash=None, **extra_fields):
         """
         Creates and saves a new user.
         
         Args:
             email: User's email address (required)
             password: User's password (optional)
+            password_hash: Already-hashed password (optional); stored as-is
+                instead of hashing password, so callers can hash off-thread
             **extra_fields: Additional fields for User model
             
         Returns:
@@ -39,10 +52,28 @@ class UserManager(BaseUserManager):
             raise ValueError('The Email field must be set')
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
+    def filter_by_email(self, email):
+        """
+        Finds users by email, ignoring case.
+
+        Compares LOWER(email), which user_email_lower_idx indexes on every
+        backend, rather than relying on the column's collation.
+
+        Args:
+            email: Email address as entered
+
+        Returns:
+            QuerySet: Users with that address
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.lower())
+
     def create_superuser(self, email, password=None, **extra_fields):
         """
         Creates and saves a new superuser.
@@ -68,6 +99,7 @@ class User(AbstractUser):
         email (EmailField): User's email address (unique)
         password (CharField): Encrypted password
         role (ForeignKey): User's role in the system
+        updated_at (DateTimeField): Last modification time, used for ETags
         groups (ManyToManyField): Django auth groups
         user_permissions (ManyToManyField): Django auth permissions
     
@@ -105,10 +137,20 @@ class User(AbstractUser):
         related_name="users",
         help_text="User's role in the system"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last modification time, used as the row version for ETags"
+    )
 
     # Use custom manager
     objects = UserManager()
 
+    class Meta(AbstractUser.Meta):
+        # Login looks users up case-insensitively (UserManager.filter_by_email)
+        indexes = [
+            models.Index(Lower('email'), name='user_email_lower_idx'),
+        ]
+
     def __str__(self):
         """String representation of user"""
         return self.email
@@ -139,6 +181,43 @@ class Role(models.Model):
         """String representation of role"""
         return self.name
 
+def parse_positions(value):
+    """
+    Splits a free-text positions string into normalized position codes.
+
+    Args:
+        value: Positions string as entered by the athlete, e.g. "C/SP, lf"
+
+    Returns:
+        list: Unique upper-case codes in input order, e.g. ['C', 'SP', 'LF']
+    """
+    codes = []
+    for token in re.split(r'[\s,/;|&+]+', value or ''):
+        code = token.strip().upper()
+        if code and code != 'UNKNOWN' and code not in codes:
+            codes.append(code)
+    return codes
+
+class Position(models.Model):
+    """
+    A single playing position (e.g. "P", "SS", "LF").
+
+    Attributes:
+        code (CharField): Unique upper-case position code
+
+    Rows are created on demand as athletes list new codes, so searching by
+    position is an exact, indexed lookup instead of a substring match.
+    """
+    code = models.CharField(
+        max_length=32,
+        unique=True,
+        help_text="Upper-case position code"
+    )
+
+    def __str__(self):
+        """String representation of position"""
+        return self.code
+
 class AthleteProfile(models.Model):
     """
     Profile model for student athletes.
@@ -147,12 +226,16 @@ class AthleteProfile(models.Model):
         user (OneToOneField): Associated user account
         high_school_name (CharField): Athlete's school
         positions (CharField): Sports positions played
+        normalized_positions (ManyToManyField): Parsed positions, kept in sync on save
         youtube_video_link (URLField): Link to highlight reel
-        profile_picture (ImageField): Athlete's photo
+        profile_picture (ProfilePictureField): Athlete's photo, with resized derivatives
+        profile_picture_blurhash (CharField): BlurHash shown while the photo loads
+        profile_picture_color (CharField): Dominant colour of the photo
         height (FloatField): Height in feet
         weight (IntegerField): Weight in pounds
         bio (TextField): Athlete's biography
         state (CharField): State of residence/school
+        updated_at (DateTimeField): Last modification time
     
     Used to store athlete-specific information and media.
     """
@@ -177,18 +260,39 @@ class AthleteProfile(models.Model):
         default="Unknown",
         help_text="Sports positions played by athlete"
     )
+    normalized_positions = models.ManyToManyField(
+        Position,
+        related_name="athletes",
+        blank=True,
+        help_text="Positions parsed from the positions field"
+    )
     youtube_video_link = models.URLField(
         max_length=500,
         blank=True,
         null=True,
         help_text="Link to athlete's highlight reel"
     )
-    profile_picture = models.ImageField(
+    profile_picture = ProfilePictureField(
         upload_to='profile_pictures/',
+        storage=profile_picture_storage,
+        blurhash_field='profile_picture_blurhash',
+        color_field='profile_picture_color',
         blank=True,
         null=True,
         help_text="Athlete's profile picture"
     )
+    profile_picture_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="BlurHash placeholder of the profile picture, set on save"
+    )
+    profile_picture_color = models.CharField(
+        max_length=7,
+        blank=True,
+        null=True,
+        help_text="Dominant colour of the profile picture as #rrggbb, set on save"
+    )
     height = models.FloatField(
         default=6.0,
         help_text="Height in feet"
@@ -217,6 +321,37 @@ class AthleteProfile(models.Model):
         default="Unknown",
         help_text="Batting arm of the athlete"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last modification time, used as the row version for ETags"
+    )
+
+    class Meta:
+        # Support range searches on height/weight and the exact-match filters.
+        # State is a substring match, which no B-tree index can serve
+        indexes = [
+            models.Index(fields=['height'], name='athlete_height_idx'),
+            models.Index(fields=['weight'], name='athlete_weight_idx'),
+            models.Index(fields=['batting_arm'], name='athlete_batting_arm_idx'),
+            models.Index(fields=['throwing_arm'], name='athlete_throwing_arm_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Saves the profile and re-syncs normalized_positions from positions"""
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'positions' in update_fields:
+            self.sync_positions()
+
+    def sync_positions(self):
+        """Replaces normalized_positions with the codes parsed from positions"""
+        codes = parse_positions(self.positions)
+        existing = set(Position.objects.filter(code__in=codes).values_list('code', flat=True))
+        Position.objects.bulk_create(
+            [Position(code=code) for code in codes if code not in existing],
+            ignore_conflicts=True
+        )
+        self.normalized_positions.set(Position.objects.filter(code__in=codes))
 
 class CoachProfile(models.Model):
     """
@@ -227,10 +362,13 @@ class CoachProfile(models.Model):
         team_needs (CharField): Current team recruitment needs
         school_name (CharField): Coach's school/institution
         bio (TextField): Coach's biography
-        profile_picture (ImageField): Coach's photo
+        profile_picture (ProfilePictureField): Coach's photo, with resized derivatives
+        profile_picture_blurhash (CharField): BlurHash shown while the photo loads
+        profile_picture_color (CharField): Dominant colour of the photo
         state (CharField): State of school/institution
         position_within_org (CharField): Position of the coach within the organization
         division (CharField): Division level of the team
+        updated_at (DateTimeField): Last modification time
     """
     user = models.OneToOneField(
         User,
@@ -258,12 +396,27 @@ class CoachProfile(models.Model):
         null=True,
         help_text="Coach's biography"
     )
-    profile_picture = models.ImageField(
+    profile_picture = ProfilePictureField(
         upload_to='profile_pictures/',
+        storage=profile_picture_storage,
+        blurhash_field='profile_picture_blurhash',
+        color_field='profile_picture_color',
         blank=True,
         null=True,
         help_text="Coach's profile picture"
     )
+    profile_picture_blurhash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        help_text="BlurHash placeholder of the profile picture, set on save"
+    )
+    profile_picture_color = models.CharField(
+        max_length=7,
+        blank=True,
+        null=True,
+        help_text="Dominant colour of the profile picture as #rrggbb, set on save"
+    )
     state = models.CharField(
         max_length=100,
         default="Unknown",
@@ -281,6 +434,10 @@ class CoachProfile(models.Model):
         null=True,
         help_text="Division level of the team"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Last modification time, used as the row version for ETags"
+    )
 
     def __str__(self):
         """String representation of coach profile"""
@@ -305,4 +462,84 @@ class ScoutProfile(models.Model):
 
     def __str__(self):
         """String representation of scout profile"""
-        return self.user.email
\ No newline at end of file
+        return self.user.email
+
+class RefreshToken(models.Model):
+    """
+    Long-lived refresh token used to obtain new access tokens.
+    
+    Attributes:
+        user (ForeignKey): User the token was issued to
+        token_hash (CharField): HMAC-SHA256 of the raw token (unique)
+        created_at (DateTimeField): Issue time
+        expires_at (DateTimeField): Expiry time
+        revoked_at (DateTimeField): Time the token was rotated or revoked
+    
+    Note:
+        Only the hash is stored; the raw token is returned to the client once.
+        Tokens are single-use and rotated on every refresh.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="refresh_tokens",
+        help_text="User the token was issued to"
+    )
+    token_hash = models.CharField(
+        max_length=64,
+        unique=True,
+        help_text="HMAC-SHA256 of the raw token"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Issue time"
+    )
+    expires_at = models.DateTimeField(
+        help_text="Expiry time"
+    )
+    revoked_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        help_text="Time the token was rotated or revoked"
+    )
+
+    def __str__(self):
+        """String representation of refresh token"""
+        return f"Refresh token {self.pk} for user {self.user_id}"
+
+class StoredFile(models.Model):
+    """
+    Reference count for a file in content-addressed storage.
+    
+    Attributes:
+        name (CharField): Storage name of the file (unique)
+        size (PositiveBigIntegerField): File size in bytes
+        references (PositiveIntegerField): Saves of this content not yet
+            deleted; the file is removed when it reaches zero
+        created_at (DateTimeField): Time the content was first stored
+    
+    Note:
+        Maintained by users.storage.ContentAddressedStorage. Files derived
+        from a stored file (its picture derivatives) have no row of their own
+        and are removed with it.
+    """
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        help_text="Storage name of the file"
+    )
+    size = models.PositiveBigIntegerField(
+        help_text="File size in bytes"
+    )
+    references = models.PositiveIntegerField(
+        default=0,
+        help_text="Saves of this content not yet deleted"
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        help_text="Time the content was first stored"
+    )
+
+    def __str__(self):
+        """String representation of stored file"""
+        return f"{self.name} ({self.references} references)"
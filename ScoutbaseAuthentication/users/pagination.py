@@ -0,0 +1,45 @@
+################################################################################
+# Pagination Classes
+# This module defines the pagination styles used by the Scoutbase list endpoints.
+#
+# Features:
+# - Cursor (keyset) pagination for search results
+# - Opaque, tamper-resistant cursors
+# - Client-configurable page size with a hard upper limit
+################################################################################
+
+# Django and DRF imports
+from rest_framework.pagination import CursorPagination
+
+
+class SearchCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the athlete and coach search endpoints.
+
+    Each page is fetched with ``WHERE id > <last seen id> ORDER BY id LIMIT n``
+    instead of ``OFFSET``, so the cost of a page does not grow with how deep
+    the client has paged or with the size of the table.
+
+    Query Parameters:
+        - cursor: string (optional) - opaque cursor from a previous response
+        - page_size: int (optional) - results per page, capped at max_page_size
+
+    Response Body:
+        - next: string - URL of the next page, or null
+        - previous: string - URL of the previous page, or null
+        - results: list - serialized profiles for this page
+
+    Views may define ``get_search_ordering()`` to order by something other
+    than ``id`` (e.g. full-text relevance); the first field is used as the
+    cursor position and the rest break ties.
+    """
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering = 'id'
+
+    def get_ordering(self, request, queryset, view):
+        get_search_ordering = getattr(view, 'get_search_ordering', None)
+        if get_search_ordering is not None:
+            return tuple(get_search_ordering())
+        return super().get_ordering(request, queryset, view)
@@ -0,0 +1,147 @@
+################################################################################
+# Picture Placeholders
+# This module computes what clients show while a profile picture loads.
+#
+# Features:
+# - BlurHash (https://blurha.sh): about 30 characters that decode to a
+#   blurred preview, small enough to ship with every search result
+# - Dominant colour as #rrggbb, for a flat background before that
+# - Computed from a tiny decode of the image, in the request or a worker
+#   process; this module needs only Pillow so spawned workers import it
+#   without setting up Django
+################################################################################
+
+# Standard library imports
+import io
+import math
+
+# Third-party imports
+from PIL import Image, ImageOps
+
+BLURHASH_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~'
+
+# Horizontal and vertical cosine components; 4x3 gives a 28-character hash
+BLURHASH_COMPONENTS = (4, 3)
+
+# Longest side the image is reduced to before encoding
+PLACEHOLDER_SAMPLE_SIZE = 32
+
+
+def _encode83(value, length):
+    """Encodes a non-negative integer as length base-83 digits"""
+    return ''.join(
+        BLURHASH_ALPHABET[(value // 83 ** (length - position)) % 83]
+        for position in range(1, length + 1)
+    )
+
+
+def _to_linear(value):
+    """Converts an sRGB channel value (0-255) to linear light (0-1)"""
+    value /= 255
+    return value / 12.92 if value <= 0.04045 else ((value + 0.055) / 1.055) ** 2.4
+
+
+def _to_srgb(value):
+    """Converts a linear light value (0-1) to an sRGB channel value (0-255)"""
+    value = max(0.0, min(1.0, value))
+    if value <= 0.0031308:
+        return int(value * 12.92 * 255 + 0.5)
+    return int((1.055 * value ** (1 / 2.4) - 0.055) * 255 + 0.5)
+
+
+def _sign_pow(value, exponent):
+    return math.copysign(abs(value) ** exponent, value)
+
+
+def blurhash(image, components=BLURHASH_COMPONENTS):
+    """
+    Encodes an image as a BlurHash.
+
+    Args:
+        image: RGB PIL image, already reduced to a few dozen pixels a side
+        components: (x, y) number of cosine components, each 1-9
+
+    Returns:
+        string: The BlurHash
+    """
+    x_components, y_components = components
+    width, height = image.size
+    pixels = [tuple(_to_linear(channel) for channel in pixel) for pixel in image.getdata()]
+
+    # Precompute the cosine basis for each axis
+    x_basis = [[math.cos(math.pi * i * x / width) for x in range(width)] for i in range(x_components)]
+    y_basis = [[math.cos(math.pi * j * y / height) for y in range(height)] for j in range(y_components)]
+
+    factors = []
+    for j in range(y_components):
+        for i in range(x_components):
+            normalisation = 1 if i == 0 and j == 0 else 2
+            red = green = blue = 0.0
+            for y in range(height):
+                row = y * width
+                vertical = y_basis[j][y]
+                for x in range(width):
+                    basis = x_basis[i][x] * vertical
+                    pixel = pixels[row + x]
+                    red += basis * pixel[0]
+                    green += basis * pixel[1]
+                    blue += basis * pixel[2]
+            scale = normalisation / (width * height)
+            factors.append((red * scale, green * scale, blue * scale))
+
+    dc, ac = factors[0], factors[1:]
+    result = _encode83((x_components - 1) + (y_components - 1) * 9, 1)
+
+    if ac:
+        actual_maximum = max(abs(channel) for factor in ac for channel in factor)
+        quantised_maximum = max(0, min(82, math.floor(actual_maximum * 166 - 0.5)))
+        maximum = (quantised_maximum + 1) / 166
+        result += _encode83(quantised_maximum, 1)
+    else:
+        maximum = 1
+        result += _encode83(0, 1)
+
+    result += _encode83((_to_srgb(dc[0]) << 16) + (_to_srgb(dc[1]) << 8) + _to_srgb(dc[2]), 4)
+
+    for factor in ac:
+        red, green, blue = (
+            max(0, min(18, math.floor(_sign_pow(channel / maximum, 0.5) * 9 + 9.5)))
+            for channel in factor
+        )
+        result += _encode83(red * 19 * 19 + green * 19 + blue, 2)
+    return result
+
+
+def dominant_color(image):
+    """
+    Args:
+        image: RGB PIL image, already reduced to a few dozen pixels a side
+
+    Returns:
+        string: The most common colour after reducing to 8 colours, as #rrggbb
+    """
+    quantized = image.quantize(colors=8, method=Image.Quantize.MEDIANCUT)
+    _, index = max(quantized.getcolors())
+    red, green, blue = quantized.getpalette()[index * 3:index * 3 + 3]
+    return f'#{red:02x}{green:02x}{blue:02x}'
+
+
+def render_placeholder(data):
+    """
+    Computes the placeholders for an encoded image.
+
+    Runs in a worker process, so it takes and returns only plain values.
+
+    Args:
+        data: Encoded image; the smallest derivative is the cheapest input
+
+    Returns:
+        tuple: (BlurHash, dominant colour)
+    """
+    size = (PLACEHOLDER_SAMPLE_SIZE, PLACEHOLDER_SAMPLE_SIZE)
+    with Image.open(io.BytesIO(data)) as original:
+        original.draft('RGB', size)
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail(size, Image.Resampling.BOX)
+        image = image.convert('RGB')
+    return blurhash(image), dominant_color(image)
@@ -0,0 +1,186 @@
+################################################################################
+# Query Plan Checks
+# This module EXPLAINs the search queries and reports any that scan a table.
+#
+# Features:
+# - Every combination of the indexed athlete and coach search filters, and
+#   each athlete substring filter paired with each indexed one, built with
+#   the same filter_athletes()/filter_coaches() and page ordering as the views
+# - The login email lookup
+# - Full-scan detection from SQLite, MySQL and PostgreSQL plans
+# - Substring filters sent on their own reported as known full scans
+#
+# Substring filters (state, division, names, bio, school names) compile to a
+# leading-wildcard LIKE, which no B-tree index can serve. Searching by one of
+# them alone, the usual coach search, reads the whole table; those plans are
+# listed as known scans rather than hidden behind an unrealistic pairing, so
+# a change in their cost stays visible. Free-text search goes through q and
+# FULLTEXT instead.
+################################################################################
+
+# Standard library imports
+import itertools
+import json
+import re
+
+# Django imports
+from django.db import connection
+
+# Local application imports
+from .models import AthleteProfile, CoachProfile, User
+from .pagination import SearchCursorPagination
+from .search import filter_athletes, filter_coaches
+
+# Indexed filters and a sample of the parameters each sends
+ATHLETE_INDEXED_FILTERS = {
+    'user_id': {'user_id': '1'},
+    'height': {'height_min': '6.0', 'height_max': '6.2'},
+    'weight': {'weight_min': '180', 'weight_max': '185'},
+    'batting_arm': {'batting_arm': 'Left'},
+    'throwing_arm': {'throwing_arm': 'Left'},
+    'positions': {'positions': 'C'},
+}
+ATHLETE_SUBSTRING_FILTERS = {
+    'state': {'state': 'tx'},
+    'high_school_name': {'high_school_name': 'Central'},
+    'name': {'name': 'Smith'},
+    'bio': {'bio': 'pitcher'},
+}
+COACH_INDEXED_FILTERS = {
+    'user_id': {'user_id': '1'},
+}
+COACH_SUBSTRING_FILTERS = {
+    'state': {'state': 'tx'},
+    'division': {'division': 'd1'},
+    'name': {'name': 'Smith'},
+    'team_needs': {'team_needs': 'Pitching'},
+    'school_name': {'school_name': 'University'},
+    'position_within_org': {'position_within_org': 'Head'},
+    'bio': {'bio': 'program'},
+}
+
+# Tables whose full scans fail the check
+CHECKED_TABLES = {model._meta.db_table for model in (AthleteProfile, CoachProfile, User)}
+
+SQLITE_SCAN_RE = re.compile(r'\bSCAN (\w+)')
+POSTGRESQL_SCAN_RE = re.compile(r'\bSeq Scan on (\w+)')
+
+
+class PlanResult:
+    """The plan of one checked query"""
+
+    def __init__(self, label, plan, scans, known_scan=False):
+        self.label = label
+        self.plan = plan
+        self.scans = scans
+        self.known_scan = known_scan
+
+    @property
+    def failed(self):
+        """True if the query scans a table it is expected to reach by index"""
+        return bool(self.scans) and not self.known_scan
+
+
+def filter_combinations(indexed, substring=None):
+    """
+    Yields:
+        tuple: (label, params) for every non-empty combination of the
+            indexed filters, then each substring filter with each indexed one
+    """
+    for size in range(1, len(indexed) + 1):
+        for names in itertools.combinations(indexed, size):
+            params = {}
+            for name in names:
+                params.update(indexed[name])
+            yield ' + '.join(names), params
+    for (name, params), (other, other_params) in itertools.product((substring or {}).items(), indexed.items()):
+        yield f'{other} + {name}', {**other_params, **params}
+
+
+def search_page(queryset):
+    """Limits a search queryset to one page, ordered as the views order it"""
+    return queryset.order_by(SearchCursorPagination.ordering)[:SearchCursorPagination.page_size + 1]
+
+
+def checked_queries():
+    """
+    Yields:
+        tuple: (label, queryset, known_scan) for every query the check
+            EXPLAINs; known_scan marks the substring-only searches
+    """
+    for label, params in filter_combinations(ATHLETE_INDEXED_FILTERS, ATHLETE_SUBSTRING_FILTERS):
+        yield f'athletes: {label}', search_page(filter_athletes(params)), False
+    # Coaches have no selective indexed filter to pair substrings with
+    for label, params in filter_combinations(COACH_INDEXED_FILTERS):
+        yield f'coaches: {label}', search_page(filter_coaches(params)), False
+    yield 'login: email', User.objects.filter_by_email('Athlete@Example.com')[:1], False
+
+    for label, params in ATHLETE_SUBSTRING_FILTERS.items():
+        yield f'athletes: {label}', search_page(filter_athletes(params)), True
+    for label, params in COACH_SUBSTRING_FILTERS.items():
+        yield f'coaches: {label}', search_page(filter_coaches(params)), True
+    yield 'coaches: state + division', search_page(filter_coaches(
+        {**COACH_SUBSTRING_FILTERS['state'], **COACH_SUBSTRING_FILTERS['division']}
+    )), True
+
+
+def full_scans(plan, vendor=None):
+    """
+    Args:
+        plan: Output of QuerySet.explain(), in JSON format on MySQL
+        vendor: Database vendor; defaults to the connection's
+
+    Returns:
+        list: Checked tables the plan reads in full, by row or by index
+    """
+    vendor = vendor or connection.vendor
+    if vendor == 'mysql':
+        scans = []
+        stack = [json.loads(plan)]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, dict):
+                # ALL is a table scan and index a full index scan
+                if node.get('access_type') in ('ALL', 'index'):
+                    scans.append(node.get('table_name'))
+                stack.extend(node.values())
+            elif isinstance(node, list):
+                stack.extend(node)
+        tables = scans
+    elif vendor == 'postgresql':
+        tables = POSTGRESQL_SCAN_RE.findall(plan)
+    else:
+        tables = SQLITE_SCAN_RE.findall(plan)
+    return [table for table in tables if table in CHECKED_TABLES]
+
+
+def explain(queryset):
+    """Returns the plan for a queryset, as JSON on MySQL so it can be parsed"""
+    if connection.vendor == 'mysql':
+        return queryset.explain(format='json')
+    return queryset.explain()
+
+
+def analyze_tables():
+    """Refreshes the optimizer's statistics for the checked tables"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'mysql':
+            cursor.execute(f'ANALYZE TABLE {", ".join(sorted(CHECKED_TABLES))}')
+            cursor.fetchall()
+        else:
+            for table in sorted(CHECKED_TABLES):
+                cursor.execute(f'ANALYZE {connection.ops.quote_name(table)}')
+
+
+def check_query_plans():
+    """
+    EXPLAINs every checked query.
+
+    Returns:
+        list: PlanResult for each query, in order; see PlanResult.failed
+    """
+    results = []
+    for label, queryset, known_scan in checked_queries():
+        plan = explain(queryset)
+        results.append(PlanResult(label, plan, full_scans(plan), known_scan))
+    return results
@@ -0,0 +1,94 @@
+################################################################################
+# Role Cache
+# This module keeps the small, rarely-changing Role table in process memory.
+#
+# Features:
+# - Role id <-> name lookups without a database query
+# - Whole-table reload on first use, after ROLE_CACHE_TTL seconds, when a
+#   lookup misses (a role created by another process) and whenever a Role is
+#   saved or deleted in this process (see signals.py)
+################################################################################
+
+# Standard library imports
+import threading
+import time
+
+# Django imports
+from django.conf import settings
+
+# Local application imports
+from .models import Role
+
+
+class RoleCache:
+    """
+    Thread-safe cache of every Role's id and name.
+
+    Args:
+        ttl: Seconds before the table is reloaded
+    """
+
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self._names = None
+        self._ids = None
+        self._expires = 0
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def load(self, force=False):
+        """
+        Returns:
+            tuple: ({role id: name}, {name: role id}), reloaded if stale
+        """
+        with self._lock:
+            if not force and self._names is not None and self._expires > time.monotonic():
+                return self._names, self._ids
+            version = self._version
+
+        roles = list(Role.objects.values_list('id', 'name'))
+        names = dict(roles)
+        ids = {name: role_id for role_id, name in roles}
+
+        with self._lock:
+            # Don't store a table read before a concurrent invalidation
+            if version == self._version:
+                self._names, self._ids = names, ids
+                self._expires = time.monotonic() + self.ttl
+        return names, ids
+
+    def name(self, role_id):
+        """
+        Args:
+            role_id: Role primary key, or None
+
+        Returns:
+            string: The role's name, or None if role_id is None or unknown
+        """
+        if role_id is None:
+            return None
+        names, _ = self.load()
+        if role_id not in names:
+            names, _ = self.load(force=True)
+        return names.get(role_id)
+
+    def id_for(self, name):
+        """
+        Args:
+            name: Role name
+
+        Returns:
+            int: The role's primary key, or None if no role has that name
+        """
+        _, ids = self.load()
+        if name not in ids:
+            _, ids = self.load(force=True)
+        return ids.get(name)
+
+    def clear(self):
+        with self._lock:
+            self._names = self._ids = None
+            self._version += 1
+
+
+role_cache = RoleCache(settings.ROLE_CACHE_TTL)
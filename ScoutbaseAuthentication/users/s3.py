@@ -0,0 +1,80 @@
+################################################################################
+# Object Storage
+# This module stores profile pictures in S3-compatible object storage.
+#
+# Features:
+# - Content addressing and reference counting shared with the filesystem
+#   backend (ContentAddressingMixin), on top of django-storages' S3Storage
+# - Presigned POST uploads limited to one key, one content type and
+#   PROFILE_PICTURE_MAX_UPLOAD_BYTES, so clients send image bytes straight
+#   to the bucket instead of through an app node
+# - Far-future immutable Cache-Control on content-addressed objects
+#
+# Works with AWS S3 and S3-compatible stores (MinIO, Ceph, R2) through
+# endpoint_url. Requires boto3 and django-storages.
+################################################################################
+
+# Standard library imports
+import posixpath
+
+# Third-party imports
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name
+
+# Django imports
+from django.utils.deconstruct import deconstructible
+
+# Local application imports
+from .media import IMMUTABLE_CACHE_CONTROL
+from .storage import CONTENT_NAME_RE, ContentAddressingMixin
+
+
+@deconstructible(path='users.s3.S3ContentAddressedStorage')
+class S3ContentAddressedStorage(ContentAddressingMixin, S3Storage):
+    """
+    S3 storage that names, deduplicates and reference-counts files by content.
+
+    Objects are written with a single PUT, which S3 makes visible atomically,
+    so no temporary name is needed.
+    """
+
+    def get_object_parameters(self, name):
+        parameters = super().get_object_parameters(name)
+        if CONTENT_NAME_RE.search(name):
+            parameters.setdefault('CacheControl', f'public, {IMMUTABLE_CACHE_CONTROL}')
+        return parameters
+
+    def derived_names(self, name):
+        """
+        Returns:
+            list: Names of the stored files derived from a content-addressed file
+        """
+        # Buckets have no directories to check; list just this digest's keys
+        directory = posixpath.dirname(name)
+        prefix = posixpath.join(directory, CONTENT_NAME_RE.search(name).group('digest') + '_')
+        return [
+            posixpath.join(directory, posixpath.basename(entry.key))
+            for entry in self.bucket.objects.filter(Prefix=self._normalize_name(clean_name(prefix)))
+        ]
+
+    def presigned_upload(self, name, content_type, max_bytes, expires):
+        """
+        Authorizes a single direct upload to name.
+
+        Args:
+            name: Storage name the upload is written to, as given
+            content_type: Content type the upload must declare
+            max_bytes: Largest upload accepted
+            expires: Seconds the authorization stays valid
+
+        Returns:
+            dict: 'url' to POST a multipart form to, and the 'fields' to send
+                before the 'file' field
+        """
+        return self.bucket.meta.client.generate_presigned_post(
+            self.bucket_name,
+            self._normalize_name(clean_name(name)),
+            Fields={'Content-Type': content_type},
+            Conditions=[{'Content-Type': content_type}, ['content-length-range', 1, max_bytes]],
+            ExpiresIn=expires
+        )
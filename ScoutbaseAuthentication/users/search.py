@@ -0,0 +1,212 @@
+################################################################################
+# Search Helpers
+# This module builds the filtered querysets behind profile search, including
+# relevance-ranked full-text search over profile fields.
+#
+# Features:
+# - MySQL FULLTEXT search via MATCH ... AGAINST
+# - Relevance annotation for result ordering
+# - Portable icontains fallback for other databases (e.g. SQLite in tests)
+# - Query-parameter filters shared by the search views and exports, with
+#   numeric parameters validated before they reach the ORM and blank ones
+#   ignored
+################################################################################
+
+# Standard library imports
+import operator
+from functools import reduce
+
+# Django imports
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q, Value
+
+# Local application imports
+from .models import AthleteProfile, CoachProfile, parse_positions
+from .serializers import AthleteSearchSerializer, CoachSearchSerializer
+
+# Columns covered by the FULLTEXT indexes created in migration 0010.
+# MATCH() must name exactly the columns of an existing index, so these
+# must be kept in sync with that migration.
+ATHLETE_FULLTEXT_FIELDS = ('name', 'high_school_name', 'bio')
+COACH_FULLTEXT_FIELDS = ('bio', 'school_name', 'team_needs')
+
+
+class MatchAgainst(Func):
+    """
+    MySQL ``MATCH (col, ...) AGAINST (%s IN NATURAL LANGUAGE MODE)`` expression.
+
+    Evaluates to the relevance score of each row for the search terms; rows
+    that do not match score 0.
+    """
+    template = 'MATCH (%(expressions)s) AGAINST (%(terms)s IN NATURAL LANGUAGE MODE)'
+    output_field = FloatField()
+
+    def __init__(self, *fields, terms):
+        super().__init__(*[F(field) for field in fields])
+        self.terms = Value(terms)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        terms_sql, terms_params = compiler.compile(self.terms)
+        sql, params = super().as_sql(compiler, connection, terms=terms_sql, **extra_context)
+        return sql, (*params, *terms_params)
+
+
+def supports_full_text():
+    """
+    Returns:
+        bool: True if the default database can evaluate MatchAgainst
+    """
+    return connection.vendor == 'mysql'
+
+
+def full_text_search(queryset, fields, terms):
+    """
+    Filters a queryset to rows matching the search terms in any of the fields.
+
+    On MySQL the FULLTEXT index is used and each row is annotated with a
+    ``relevance`` score. Elsewhere the terms are matched with ``icontains``
+    against each field and ``relevance`` is a constant, so callers can order
+    on it unconditionally.
+
+    Args:
+        queryset: QuerySet to filter
+        fields: Tuple of column names covered by a FULLTEXT index
+        terms: Free-text search string
+
+    Returns:
+        QuerySet: Filtered queryset annotated with ``relevance``
+    """
+    if supports_full_text():
+        return queryset.annotate(
+            relevance=MatchAgainst(*fields, terms=terms)
+        ).filter(relevance__gt=0)
+
+    condition = reduce(operator.or_, (Q(**{f'{field}__icontains': terms}) for field in fields))
+    return queryset.filter(condition).annotate(relevance=Value(0.0, output_field=FloatField()))
+
+
+def given_params(params):
+    """
+    Drops blank search parameters.
+
+    Clients submitting a search form send empty fields as ``?state=``; these
+    mean "any", not "empty".
+
+    Args:
+        params: QueryDict (or dict) of search parameters
+
+    Returns:
+        dict: The non-blank parameters, last value for each name
+    """
+    return {name: value for name, value in params.items() if value != ''}
+
+
+def validate_search_params(serializer_class, params):
+    """
+    Parses the typed search parameters.
+
+    Args:
+        serializer_class: Serializer declaring the typed parameters
+        params: QueryDict (or dict) of search parameters
+
+    Returns:
+        dict: The typed parameters that were given, converted
+
+    Raises:
+        ValidationError: If a typed parameter is malformed (400 in views)
+    """
+    serializer = serializer_class(data=params)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def filter_athletes(params):
+    """
+    Builds the athlete search queryset for a set of query parameters.
+
+    Args:
+        params: QueryDict (or dict) of search parameters, as documented on
+            SearchAthleteView
+
+    Returns:
+        QuerySet: Filtered AthleteProfile queryset, unordered
+
+    Raises:
+        ValidationError: If a numeric parameter is malformed
+    """
+    queryset = AthleteProfile.objects.all()
+    params = given_params(params)
+    typed = validate_search_params(AthleteSearchSerializer, params)
+
+    # Apply filters based on query parameters
+    filters = {
+        'user_id': typed.get('user_id'),
+        'high_school_name__icontains': params.get('high_school_name'),
+        'state__icontains': params.get('state'),
+        'height': typed.get('height'),
+        'height__gte': typed.get('height_min'),
+        'height__lte': typed.get('height_max'),
+        'weight': typed.get('weight'),
+        'weight__gte': typed.get('weight_min'),
+        'weight__lte': typed.get('weight_max'),
+        'batting_arm': params.get('batting_arm'),
+        'throwing_arm': params.get('throwing_arm'),
+        'bio__icontains': params.get('bio'),
+        'user__name__icontains': params.get('name'),
+    }
+
+    # Apply non-null filters
+    queryset = queryset.filter(**{k: v for k, v in filters.items() if v is not None})
+
+    # Match any of the given position codes via the indexed position table;
+    # a value with no codes in it (e.g. "," or "unknown") filters nothing
+    codes = parse_positions(params.get('positions'))
+    if codes:
+        matching = AthleteProfile.normalized_positions.through.objects.filter(position__code__in=codes)
+        queryset = queryset.filter(id__in=matching.values('athleteprofile_id'))
+
+    # Apply full-text search across name/school/bio fields
+    terms = params.get('q')
+    if terms:
+        queryset = full_text_search(queryset, ATHLETE_FULLTEXT_FIELDS, terms)
+    return queryset
+
+
+def filter_coaches(params):
+    """
+    Builds the coach search queryset for a set of query parameters.
+
+    Args:
+        params: QueryDict (or dict) of search parameters, as documented on
+            SearchCoachView
+
+    Returns:
+        QuerySet: Filtered CoachProfile queryset, unordered
+
+    Raises:
+        ValidationError: If user_id is malformed
+    """
+    queryset = CoachProfile.objects.all()
+    params = given_params(params)
+    typed = validate_search_params(CoachSearchSerializer, params)
+
+    # Apply filters based on query parameters
+    filters = {
+        'user_id': typed.get('user_id'),
+        'name__icontains': params.get('name'),
+        'team_needs__icontains': params.get('team_needs'),
+        'school_name__icontains': params.get('school_name'),
+        'position_within_org__icontains': params.get('position_within_org'),
+        'bio__icontains': params.get('bio'),
+        'state__icontains': params.get('state'),
+        'division__icontains': params.get('division'),
+    }
+
+    # Apply non-null filters
+    queryset = queryset.filter(**{k: v for k, v in filters.items() if v is not None})
+
+    # Apply full-text search across bio/school/team needs fields
+    terms = params.get('q')
+    if terms:
+        queryset = full_text_search(queryset, COACH_FULLTEXT_FIELDS, terms)
+    return queryset
@@ -6,14 +6,52 @@
 # - User data serialization with role management
 # - Profile serialization for Athletes, Coaches, and Scouts
 # - Data validation and transformation
-# - Image handling for profile pictures
+# - Image handling for profile pictures, including resized derivative URLs
+#   and header-only validation of uploads
+# - Validation of the typed search query parameters
 ################################################################################
 
 # Django and DRF imports
+from django.conf import settings
 from rest_framework import serializers
 
 # Local application imports
+from .images import derivative_name, has_derivatives
 from .models import User, Role, AthleteProfile, CoachProfile, ScoutProfile
+from .uploads import ProfilePictureUploadField
+
+class ProfilePictureDerivativesField(serializers.ReadOnlyField):
+    """
+    Read-only URLs of a profile picture's resized derivatives.
+    
+    Output:
+        { "<size>": { "<format>": url, ... }, ... }, or null without a
+        picture or for a legacy picture whose derivatives have not been
+        backfilled yet (clients then use profile_picture)
+    
+    URLs are absolute when the serializer has a request in its context,
+    matching how ImageField renders the original's URL.
+    """
+    def __init__(self, **kwargs):
+        kwargs['source'] = 'profile_picture'
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        if not value or not has_derivatives(value.name):
+            return None
+        request = self.context.get('request')
+
+        def url(name):
+            relative = value.storage.url(name)
+            return request.build_absolute_uri(relative) if request is not None else relative
+
+        return {
+            str(size): {
+                extension: url(derivative_name(value.name, size, extension))
+                for extension in settings.PROFILE_PICTURE_FORMATS
+            }
+            for size in settings.PROFILE_PICTURE_SIZES
+        }
 
 class RoleSerializer(serializers.ModelSerializer):
     """
@@ -97,23 +135,30 @@ class AthleteProfileSerializer(serializers.ModelSerializer):
         - high_school_name: string
         - positions: string
         - youtube_video_link: string (validated)
-        - profile_picture: ImageField (optional)
+        - profile_picture: ProfilePictureUploadField (optional)
+        - profile_picture_derivatives: Resized picture URLs (read-only)
+        - profile_picture_blurhash: BlurHash to show while the picture loads (read-only)
+        - profile_picture_color: Dominant colour of the picture, #rrggbb (read-only)
         - height: integer
         - weight: integer
         - bio: string
         - state: string
+        - user_id: int (read-only)
+        - updated_at: datetime (read-only)
     
     Features:
         - YouTube URL validation
         - Optional profile picture upload
         - Comprehensive athlete details
     """
-    profile_picture = serializers.ImageField(
+    profile_picture = ProfilePictureUploadField(
         required=False,
         allow_null=True,
         allow_empty_file=True
     )
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    profile_picture_derivatives = ProfilePictureDerivativesField()
+    # Read the FK column directly so serializing a row never loads its User
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = AthleteProfile
@@ -124,14 +169,20 @@ class AthleteProfileSerializer(serializers.ModelSerializer):
             'positions',
             'youtube_video_link',
             'profile_picture',
+            'profile_picture_derivatives',
+            'profile_picture_blurhash',
+            'profile_picture_color',
             'height',
             'weight',
             'bio',
             'state',
             'batting_arm',
             'throwing_arm',
-            'user_id'
+            'user_id',
+            'updated_at'
         ]
+        # Computed from the picture when it is saved
+        read_only_fields = ['profile_picture_blurhash', 'profile_picture_color']
 
     def validate_youtube_video_link(self, value):
         """
@@ -158,16 +209,23 @@ class CoachProfileSerializer(serializers.ModelSerializer):
         - team_needs: string
         - school_name: string
         - bio: string
-        - profile_picture: ImageField (optional)
+        - profile_picture: ProfilePictureUploadField (optional)
+        - profile_picture_derivatives: Resized picture URLs (read-only)
+        - profile_picture_blurhash: BlurHash to show while the picture loads (read-only)
+        - profile_picture_color: Dominant colour of the picture, #rrggbb (read-only)
         - state: string
         - division: string
+        - user_id: int (read-only)
+        - updated_at: datetime (read-only)
     """
-    profile_picture = serializers.ImageField(
+    profile_picture = ProfilePictureUploadField(
         required=False,
         allow_null=True,
         allow_empty_file=True
     )
-    user_id = serializers.IntegerField(source='user.id', read_only=True)
+    profile_picture_derivatives = ProfilePictureDerivativesField()
+    # Read the FK column directly so serializing a row never loads its User
+    user_id = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = CoachProfile
@@ -178,11 +236,17 @@ class CoachProfileSerializer(serializers.ModelSerializer):
             'school_name',
             'bio',
             'profile_picture',
+            'profile_picture_derivatives',
+            'profile_picture_blurhash',
+            'profile_picture_color',
             'state',
             'position_within_org',
             'division',
             'user_id',
+            'updated_at',
         ]
+        # Computed from the picture when it is saved
+        read_only_fields = ['profile_picture_blurhash', 'profile_picture_color']
 
 class ScoutProfileSerializer(serializers.ModelSerializer):
     """
@@ -197,3 +261,30 @@ class ScoutProfileSerializer(serializers.ModelSerializer):
     class Meta:
         model = ScoutProfile
         fields = ['id']
+
+class CoachSearchSerializer(serializers.Serializer):
+    """
+    Validates the typed query parameters of coach search.
+    
+    Fields:
+        - user_id: int (optional)
+    
+    Text filters are used as given and are not declared here.
+    """
+    user_id = serializers.IntegerField(required=False)
+
+class AthleteSearchSerializer(CoachSearchSerializer):
+    """
+    Validates the typed query parameters of athlete search and export.
+    
+    Fields:
+        - user_id: int (optional)
+        - height, height_min, height_max: float (optional) - feet
+        - weight, weight_min, weight_max: int (optional) - pounds
+    """
+    height = serializers.FloatField(required=False)
+    height_min = serializers.FloatField(required=False)
+    height_max = serializers.FloatField(required=False)
+    weight = serializers.IntegerField(required=False)
+    weight_min = serializers.IntegerField(required=False)
+    weight_max = serializers.IntegerField(required=False)
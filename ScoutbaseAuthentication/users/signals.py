@@ -0,0 +1,60 @@
+################################################################################
+# Model Signal Handlers
+# This module reacts to model changes to keep derived data consistent.
+#
+# Features:
+# - Search cache invalidation on profile create/update/delete, and on user
+#   updates, which athlete search filters by name
+# - Authenticated-user cache invalidation on user update/delete
+# - Role cache invalidation on role create/update/delete
+# - JWT signing key reload when the key settings change
+################################################################################
+
+# Django imports
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+# Local application imports
+from .authentication import user_cache
+from .cache import bump_generation
+from .models import User, AthleteProfile, CoachProfile, Role
+from .roles import role_cache
+from .tokens import reset_signing_keys
+
+@receiver(post_save, sender=AthleteProfile)
+@receiver(post_delete, sender=AthleteProfile)
+@receiver(m2m_changed, sender=AthleteProfile.normalized_positions.through)
+def invalidate_athlete_search(sender, **kwargs):
+    """Drops cached athlete search results when any athlete profile changes"""
+    bump_generation(AthleteProfile)
+
+@receiver(post_save, sender=CoachProfile)
+@receiver(post_delete, sender=CoachProfile)
+def invalidate_coach_search(sender, **kwargs):
+    """Drops cached coach search results when any coach profile changes"""
+    bump_generation(CoachProfile)
+
+@receiver(post_save, sender=User)
+def invalidate_athlete_search_on_user_change(sender, update_fields=None, **kwargs):
+    """Drops cached athlete search results, which match on the user's name"""
+    if update_fields is None or 'name' in update_fields:
+        bump_generation(AthleteProfile)
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """Drops this process's cached copies of a user resolved from JWTs"""
+    user_cache.invalidate_user(instance.pk)
+
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def invalidate_role_cache(sender, **kwargs):
+    """Reloads this process's copy of the Role table on its next use"""
+    role_cache.clear()
+
+@receiver(setting_changed)
+def reload_signing_keys(sender, setting, **kwargs):
+    """Reloads JWT keys when JWT_SIGNING_KEYS is overridden (e.g. in tests)"""
+    if setting in ('JWT_SIGNING_KEYS', 'SECRET_KEY'):
+        reset_signing_keys()
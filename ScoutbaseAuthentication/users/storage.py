@@ -0,0 +1,218 @@
+################################################################################
+# Content-Addressed Storage
+# This module stores uploads under the SHA-256 of their content.
+#
+# Features:
+# - Names like profile_pictures/ab/cd/abcd...ef.jpg, sharded by the first
+#   two bytes of the hash so no directory grows too large
+# - Identical uploads share one file; saving existing content only adds a
+#   reference (StoredFile row) and refreshes its modification time instead of
+#   writing it again
+# - Deleting releases a reference; the file and every file derived from it
+#   (e.g. <hash>_256.webp thumbnails) are removed with the last reference
+# - Atomic writes through a temporary file, so concurrent uploads of the same
+#   content never expose a partial file
+#
+# Because a name always refers to the same bytes, URLs can be cached forever.
+# The naming and reference counting live in ContentAddressingMixin, so the same
+# scheme works over object storage (see users/s3.py).
+################################################################################
+
+# Standard library imports
+import hashlib
+import os
+import posixpath
+import re
+import time
+import uuid
+
+# Django imports
+from django.core import signing
+from django.core.files.storage import FileSystemStorage
+from django.db import transaction
+from django.db.models import F
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+
+# <dir>/<aa>/<bb>/<aabb...64 hex>[_<derivative suffix>].<ext>
+CONTENT_NAME_RE = re.compile(
+    r'(?:^|/)(?P<a>[0-9a-f]{2})/(?P<b>[0-9a-f]{2})/(?P<digest>(?P=a)(?P=b)[0-9a-f]{60})'
+    r'(?P<suffix>_[^/.]+)?\.[^/.]+$'
+)
+
+DIRECT_UPLOAD_SALT = 'users.storage.direct-upload'
+
+
+def content_hash(content):
+    """
+    Args:
+        content: Django File to hash; read in chunks and left rewound
+
+    Returns:
+        string: Hex SHA-256 of the file's bytes
+    """
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def content_name(name, digest):
+    """
+    Args:
+        name: Name requested for the upload; its directory and extension are
+            kept
+        digest: Hex SHA-256 of the content
+
+    Returns:
+        string: Sharded, content-addressed storage name
+    """
+    directory, filename = posixpath.split(name)
+    extension = os.path.splitext(filename)[1].lower()
+    return posixpath.join(directory, digest[:2], digest[2:4], digest + extension)
+
+
+class ContentAddressingMixin:
+    """
+    Storage mixin that names, deduplicates and reference-counts files by
+    content.
+
+    Names that are already content-addressed are kept as given; a suffix
+    after the hash marks a file derived from that content, which is written
+    once and deleted together with it rather than reference-counted.
+    Combine with a Storage class, which does the actual reads and writes.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # Names are chosen from the content in _save; identical content
+        # intentionally maps to the same name
+        return name
+
+    def _save(self, name, content):
+        match = CONTENT_NAME_RE.search(name)
+        if match and match.group('suffix'):
+            if not self.exists(name):
+                self._write(name, content)
+            return name
+
+        name = content_name(name, content_hash(content))
+        # Take the reference before checking for the file, so a concurrent
+        # delete of the last reference can't remove it after the check
+        self._acquire(name, content.size)
+        if self.exists(name):
+            # Reused content counts as a fresh upload for orphan collection
+            self._touch_content(name)
+        else:
+            self._write(name, content)
+        return name
+
+    def _write(self, name, content):
+        """Writes content under name with the underlying storage"""
+        super()._save(name, content)
+
+    def _acquire(self, name, size):
+        """Adds a reference to name, creating its StoredFile row if needed"""
+        from .models import StoredFile
+
+        # Insert-or-ignore then increment: two statements, no savepoint, and
+        # safe against concurrent first uploads of the same content
+        StoredFile.objects.bulk_create([StoredFile(name=name, size=size)], ignore_conflicts=True)
+        StoredFile.objects.filter(name=name).update(references=F('references') + 1)
+
+    def delete(self, name):
+        match = CONTENT_NAME_RE.search(name or '')
+        if not match:
+            # Files stored before content addressing are deleted as usual
+            return super().delete(name)
+        if match.group('suffix'):
+            # Derived files live exactly as long as the content they came from
+            return None
+
+        from .models import StoredFile
+
+        with transaction.atomic():
+            stored = StoredFile.objects.select_for_update().filter(name=name).first()
+            if stored is not None and stored.references > 1:
+                StoredFile.objects.filter(pk=stored.pk).update(references=F('references') - 1)
+                return None
+            if stored is not None:
+                stored.delete()
+            self.delete_content(name)
+        return None
+
+    def derived_names(self, name):
+        """
+        Returns:
+            list: Names of the stored files derived from a content-addressed file
+        """
+        directory = posixpath.dirname(name)
+        prefix = CONTENT_NAME_RE.search(name).group('digest') + '_'
+        if not self.exists(directory):
+            return []
+        return [
+            posixpath.join(directory, derived)
+            for derived in self.listdir(directory)[1] if derived.startswith(prefix)
+        ]
+
+    def _touch_content(self, name):
+        """Marks reused content as recently uploaded; a no-op by default"""
+
+    def delete_content(self, name):
+        """Removes a content-addressed file and every file derived from it"""
+        for derived in self.derived_names(name):
+            super().delete(derived)
+        super().delete(name)
+
+
+@deconstructible(path='users.storage.ContentAddressedStorage')
+class ContentAddressedStorage(ContentAddressingMixin, FileSystemStorage):
+    """
+    Filesystem storage that names, deduplicates and reference-counts files by
+    content.
+
+    Also stands in for an object store's presigned uploads: the URL it hands
+    out is DirectUploadView, which checks a signed policy much as S3 checks
+    a presigned POST.
+    """
+
+    def _write(self, name, content):
+        """Writes to a temporary name, then atomically moves it into place"""
+        temporary = FileSystemStorage._save(self, f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+
+    def _touch_content(self, name):
+        """Sets the modification time of a file and its derived files to now"""
+        for target in [name, *self.derived_names(name)]:
+            try:
+                os.utime(self.path(target))
+            except FileNotFoundError:
+                pass
+
+    def presigned_upload(self, name, content_type, max_bytes, expires):
+        """
+        Authorizes a single direct upload to name.
+
+        Args:
+            name: Storage name the upload is written to, as given
+            content_type: Content type the upload must declare
+            max_bytes: Largest upload accepted
+            expires: Seconds the authorization stays valid
+
+        Returns:
+            dict: 'url' to POST a multipart form to, and the 'fields' to send
+                before the 'file' field
+        """
+        policy = signing.dumps(
+            {'key': name, 'content_type': content_type, 'max_bytes': max_bytes, 'expires_at': time.time() + expires},
+            salt=DIRECT_UPLOAD_SALT
+        )
+        return {
+            'url': reverse('direct_upload'),
+            'fields': {'key': name, 'Content-Type': content_type, 'policy': policy},
+        }
+
+    def save_direct_upload(self, name, content):
+        """Writes a direct upload under the exact name it was authorized for"""
+        self._write(name, content)
@@ -1,3 +1,1659 @@
-from django.test import TestCase
+################################################################################
+# Endpoint Performance Budget Tests
+# This module guards every route in users/urls.py against performance
+# regressions such as N+1 queries and unbounded response payloads.
+#
+# Features:
+# - Realistic seed data (hundreds of athletes/coaches with roles and pictures)
+# - Explicit SQL query budget per endpoint
+# - Explicit response size budget per endpoint
+# - Captured SQL printed on failure
+# - Picture tests on a two-profile dataset, each with its own MEDIA_ROOT
+################################################################################
 
-# Create your tests here.
+# Standard library imports
+import base64
+import csv
+import datetime
+import importlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+from unittest import mock
+
+# Third-party imports
+import boto3
+import jwt
+import requests
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from moto import mock_aws
+from PIL import Image, ImageCms, ImageFile, PngImagePlugin
+
+# Django and DRF imports
+from django.apps import apps
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+# Local application imports
+from .authentication import user_cache
+from .cache import get_cache_stats
+from .hashing import BoundedHashingPool, HashingPoolSaturated
+from .cleanup import collect_orphans
+from .plans import analyze_tables, check_query_plans, explain, full_scans, search_page
+from .search import filter_athletes, filter_coaches
+from .images import derivative_name, derivative_names
+from .s3 import S3ContentAddressedStorage
+from .storage import CONTENT_NAME_RE
+from .uploads import STRUCTURAL_INFO_KEYS, CappedUploadHandler, UploadTooLarge
+from .roles import role_cache
+from .models import User, Role, Position, AthleteProfile, CoachProfile, ScoutProfile, RefreshToken, StoredFile, parse_positions
+from .tokens import encode_token, hash_refresh_token, issue_access_token
+
+ATHLETE_COUNT = 300
+COACH_COUNT = 300
+STATES = ['TX', 'CA', 'FL', 'GA', 'NC']
+POSITIONS = ['P', 'C', '1B', 'SS/2B', 'LF/CF', 'C/SP/LF', 'RP', '3B']
+DIVISIONS = ['D1', 'D2', 'D3', 'JUCO']
+
+TEST_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def make_image(name='profile.jpg', size=(32, 32), **params):
+    """
+    Builds a small in-memory JPEG upload.
+
+    Args:
+        name: File name reported to the view
+        size: Image width and height in pixels
+        **params: Extra Pillow save options, e.g. exif or icc_profile
+
+    Returns:
+        SimpleUploadedFile: Uploadable image file
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 30, 30)).save(buffer, format='JPEG', **params)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def make_png(size=(32, 32), **params):
+    """
+    Builds a small in-memory PNG upload.
+
+    Args:
+        size: Image width and height in pixels
+        **params: Extra Pillow save options, e.g. pnginfo or icc_profile
+
+    Returns:
+        SimpleUploadedFile: Uploadable image file
+    """
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(30, 30, 200)).save(buffer, format='PNG', **params)
+    return SimpleUploadedFile('profile.png', buffer.getvalue(), content_type='image/png')
+
+
+def make_token(user):
+    """
+    Issues an access token for the user the same way LoginView does.
+
+    Args:
+        user: User to issue the token for
+
+    Returns:
+        string: Encoded JWT
+    """
+    return issue_access_token(user)
+
+
+def make_signing_key(kid, private_key):
+    """
+    Builds a JWT_SIGNING_KEYS entry.
+
+    Args:
+        kid: Key identifier
+        private_key: cryptography private key
+
+    Returns:
+        dict: Settings entry holding the PEM-encoded private key
+    """
+    pem = private_key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return {'kid': kid, 'key': pem.decode()}
+
+
+def public_only(entry):
+    """Returns a copy of a JWT_SIGNING_KEYS entry holding only the public key"""
+    private_key = serialization.load_pem_private_key(entry['key'].encode(), password=None)
+    pem = private_key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return {'kid': entry['kid'], 'key': pem.decode()}
+
+
+class APITestCase(TestCase):
+    """Base test case with a fresh API client and empty per-process caches"""
+
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        # Budgets measure a warm process, where the Role table is already cached
+        role_cache.clear()
+        role_cache.load()
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        """Authenticates the client as the user via the JWT cookie"""
+        self.client.cookies['jwt'] = make_token(user)
+
+
+class MediaRootMixin:
+    """Gives each test its own empty MEDIA_ROOT, removed afterwards"""
+
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = self.settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+
+@override_settings(MEDIA_ROOT=TEST_MEDIA_ROOT)
+class EndpointBudgetTestCase(APITestCase):
+    """
+    Base test case that seeds a realistic dataset and asserts budgets.
+
+    Subclasses call assertWithinBudget() for each request; exceeding either
+    the query or byte budget fails the test and prints the captured SQL.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        roles = {role.name: role for role in Role.objects.all()}
+        password = make_password('password123')
+
+        athlete_users = User.objects.bulk_create([
+            User(email=f'athlete{i}@example.com', name=f'Athlete {i}', password=password, role=roles['Athlete'])
+            for i in range(ATHLETE_COUNT)
+        ])
+        coach_users = User.objects.bulk_create([
+            User(email=f'coach{i}@example.com', name=f'Coach {i}', password=password, role=roles['Coach'])
+            for i in range(COACH_COUNT)
+        ])
+        cls.scout_user = User.objects.create(
+            email='scout@example.com', name='Scout', password=password, role=roles['Scout']
+        )
+        cls.new_user = User.objects.create(email='new@example.com', name='New User', password=password)
+
+        athletes = AthleteProfile.objects.bulk_create([
+            AthleteProfile(
+                user=user,
+                name=user.name,
+                high_school_name=f'High School {i % 40}',
+                positions=POSITIONS[i % len(POSITIONS)],
+                youtube_video_link=f'https://www.youtube.com/watch?v={i}',
+                profile_picture=f'profile_pictures/athlete{i}.jpg',
+                height=5.5 + (i % 12) / 10,
+                weight=150 + i % 80,
+                bio=f'Athlete {i} is a hard-working pitcher and teammate.' if i % 3 == 0 else 'Utility player.',
+                state=STATES[i % len(STATES)],
+                throwing_arm='Right' if i % 4 else 'Left',
+                batting_arm='Left' if i % 3 else 'Right',
+            )
+            for i, user in enumerate(athlete_users)
+        ])
+        for athlete in athletes[:len(POSITIONS)]:
+            athlete.sync_positions()
+        Through = AthleteProfile.normalized_positions.through
+        position_ids = dict(Position.objects.values_list('code', 'id'))
+        Through.objects.bulk_create([
+            Through(athleteprofile_id=athlete.id, position_id=position_ids[code])
+            for athlete in athletes[len(POSITIONS):]
+            for code in athlete.positions.split('/')
+        ])
+
+        CoachProfile.objects.bulk_create([
+            CoachProfile(
+                user=user,
+                name=user.name,
+                team_needs='Pitching' if i % 2 else 'Catcher',
+                school_name=f'University {i % 50}',
+                bio=f'Coach {i} has led the program for {i % 20} seasons.',
+                profile_picture=f'profile_pictures/coach{i}.jpg',
+                state=STATES[i % len(STATES)],
+                position_within_org='Head Coach' if i % 5 == 0 else 'Assistant Coach',
+                division=DIVISIONS[i % len(DIVISIONS)],
+            )
+            for i, user in enumerate(coach_users)
+        ])
+
+        cls.athlete_user = athlete_users[0]
+        cls.coach_user = coach_users[0]
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEST_MEDIA_ROOT, ignore_errors=True)
+
+    def assertWithinBudget(self, method, url, max_queries, max_bytes, status=200, **kwargs):
+        """
+        Performs a request and asserts its status, query count and size.
+
+        Args:
+            method: Client method name ('get', 'post', 'put', 'delete')
+            url: Request path
+            max_queries: Maximum number of SQL queries allowed
+            max_bytes: Maximum response body size in bytes
+            status: Expected HTTP status code
+            **kwargs: Extra arguments for the client method
+
+        Returns:
+            Response: The response, for further assertions
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, method)(url, **kwargs)
+
+        self.assertEqual(response.status_code, status, getattr(response, 'data', response.content))
+
+        if len(queries) > max_queries:
+            captured = '\n'.join(
+                f'{number}. {query["sql"]}' for number, query in enumerate(queries.captured_queries, start=1)
+            )
+            self.fail(
+                f'{method.upper()} {url} ran {len(queries)} queries, budget is {max_queries}:\n{captured}'
+            )
+
+        size = len(response.content)
+        self.assertLessEqual(
+            size, max_bytes,
+            f'{method.upper()} {url} returned {size} bytes, budget is {max_bytes}'
+        )
+        return response
+
+
+class PictureTestCase(MediaRootMixin, APITestCase):
+    """
+    Base test case for profile pictures: one athlete and one coach, whose
+    pictures use legacy names that don't exist in the empty MEDIA_ROOT.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        roles = {role.name: role for role in Role.objects.all()}
+        password = make_password('password123')
+        cls.athlete_user = User.objects.create(
+            email='athlete0@example.com', name='Athlete 0', password=password, role=roles['Athlete']
+        )
+        cls.coach_user = User.objects.create(
+            email='coach0@example.com', name='Coach 0', password=password, role=roles['Coach']
+        )
+        AthleteProfile.objects.create(
+            user=cls.athlete_user, name='Athlete 0', high_school_name='High School 0', positions='P',
+            profile_picture='profile_pictures/athlete0.jpg', state='TX'
+        )
+        CoachProfile.objects.create(
+            user=cls.coach_user, name='Coach 0', school_name='University 0',
+            profile_picture='profile_pictures/coach0.jpg', state='TX', division='D1'
+        )
+
+
+class AuthenticationBudgetTests(EndpointBudgetTestCase):
+    """Budgets for register, login, user and logout"""
+
+    def test_register(self):
+        self.assertWithinBudget('post', '/scoutbase/register', 2, 512, data={
+            'email': 'register@example.com', 'password': 'password123', 'name': 'Register Me'
+        }, format='json')
+
+    def test_login(self):
+        self.assertWithinBudget('post', '/scoutbase/login', 2, 512, data={
+            'email': 'athlete1@example.com', 'password': 'password123'
+        }, format='json')
+
+    def test_user(self):
+        self.client.cookies['jwt'] = make_token(self.athlete_user)
+        self.assertWithinBudget('get', '/scoutbase/user', 1, 512)
+
+    def test_me(self):
+        self.authenticate(self.athlete_user)
+        self.client.get('/scoutbase/user')
+        response = self.assertWithinBudget('get', '/scoutbase/me', 1, 2048)
+        self.assertEqual(response.data['role'], 'Athlete')
+        self.assertEqual(response.data['athlete_profile']['user_id'], self.athlete_user.id)
+        self.assertIsNone(response.data['coach_profile'])
+        self.assertIsNone(response.data['scout_profile'])
+        self.assertWithinBudget('get', '/scoutbase/me', 1, 0, status=304, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_me_requires_token(self):
+        self.assertEqual(self.client.get('/scoutbase/me').status_code, 401)
+
+    def test_logout(self):
+        self.assertWithinBudget('post', '/scoutbase/logout', 0, 256)
+
+    def test_token_refresh(self):
+        login = self.client.post(
+            '/scoutbase/login', {'email': 'athlete1@example.com', 'password': 'password123'}, format='json'
+        )
+        self.assertWithinBudget('post', '/scoutbase/token/refresh', 3, 512, data={
+            'refresh': login.data['refresh']
+        }, format='json')
+
+
+class UserManagementBudgetTests(EndpointBudgetTestCase):
+    """Budgets for role assignment and user lookups"""
+
+    def test_assign_role(self):
+        self.assertWithinBudget('post', '/scoutbase/assignrole', 2, 256, data={
+            'user_id': self.new_user.id, 'role_name': 'Coach'
+        }, format='json')
+
+    def test_fetch_role(self):
+        self.assertWithinBudget('get', f'/scoutbase/fetchrole?user_id={self.coach_user.id}', 1, 128)
+
+    def test_fetch_email(self):
+        self.assertWithinBudget('get', f'/scoutbase/fetch-email/{self.coach_user.id}/', 1, 128)
+
+    def test_fetch_user_attributes(self):
+        self.assertWithinBudget('get', f'/scoutbase/fetch-user-attributes/{self.coach_user.id}/', 1, 256)
+
+    def test_fetch_user_batch(self):
+        self.authenticate(self.coach_user)
+        ids = ','.join(str(user_id) for user_id in User.objects.order_by('id').values_list('id', flat=True)[:100])
+        # One query resolves the caller, one fetches the batch
+        self.assertWithinBudget('get', f'/scoutbase/users/batch?ids={ids}', 2, 8 * 1024)
+
+    def test_fetch_user_batch_requires_authentication(self):
+        response = self.assertWithinBudget('get', f'/scoutbase/users/batch?ids={self.coach_user.id}', 0, 256, status=401)
+        self.assertNotIn(b'@', response.content)
+
+    def test_fetch_user_batch_order_and_missing(self):
+        self.authenticate(self.coach_user)
+        ids = [self.scout_user.id, 999999, self.coach_user.id, self.scout_user.id, self.new_user.id]
+        response = self.client.get(f'/scoutbase/users/batch?ids={",".join(map(str, ids))}')
+        self.assertEqual(
+            [(user['id'], user['role']) for user in response.data['results']],
+            [(self.scout_user.id, 'Scout'), (self.coach_user.id, 'Coach'), (self.new_user.id, None)]
+        )
+        self.assertEqual(response.data['missing'], [999999])
+
+    def test_fetch_user_batch_limits(self):
+        self.authenticate(self.coach_user)
+        too_many = ','.join(str(user_id) for user_id in range(1, 102))
+        self.assertEqual(self.client.get(f'/scoutbase/users/batch?ids={too_many}').status_code, 400)
+        self.assertEqual(self.client.get('/scoutbase/users/batch?ids=1,x').status_code, 400)
+        self.assertEqual(self.client.get('/scoutbase/users/batch').status_code, 400)
+
+
+class ProfileBudgetTests(EndpointBudgetTestCase):
+    """Budgets for creating, editing and deleting profiles"""
+
+    def test_create_athlete_profile(self):
+        self.assertWithinBudget('post', '/scoutbase/athlete/createprofile', 10, 2048, status=201, data={
+            'user_id': self.new_user.id,
+            'high_school_name': 'Central High',
+            'positions': 'SS/2B',
+            'state': 'TX',
+            'height': 6.1,
+            'weight': 185,
+            'profile_picture': make_image(),
+        }, format='multipart')
+
+    def test_create_coach_profile(self):
+        self.assertWithinBudget('post', '/scoutbase/coach/createprofile', 5, 2048, status=201, data={
+            'user_id': self.new_user.id,
+            'school_name': 'State University',
+            'state': 'TX',
+            'division': 'D1',
+            'profile_picture': make_image(),
+        }, format='multipart')
+
+    def test_create_scout_profile(self):
+        self.assertWithinBudget('post', '/scoutbase/scout/createprofile', 3, 128, status=201, data={
+            'user_id': self.new_user.id,
+        }, format='json')
+
+    def test_edit_athlete(self):
+        self.assertWithinBudget('put', f'/scoutbase/editathlete/{self.athlete_user.id}/', 7, 1024, data={
+            'positions': 'P/1B', 'weight': 190
+        }, format='json')
+
+    def test_edit_coach(self):
+        self.assertWithinBudget('put', f'/scoutbase/editcoach/{self.coach_user.id}/', 2, 1024, data={
+            'team_needs': 'Outfield'
+        }, format='json')
+
+    def test_edit_athlete_profile_picture(self):
+        self.assertWithinBudget(
+            'put', f'/scoutbase/edit-athlete-profile-picture/{self.athlete_user.id}/', 7, 256,
+            data={'profile_picture': make_image()}, format='multipart'
+        )
+
+    def test_edit_coach_profile_picture(self):
+        self.assertWithinBudget(
+            'put', f'/scoutbase/edit-coach-profile-picture/{self.coach_user.id}/', 4, 256,
+            data={'profile_picture': make_image()}, format='multipart'
+        )
+
+    def test_profile_picture_upload_form(self):
+        self.authenticate(self.athlete_user)
+        self.assertWithinBudget(
+            'post', '/scoutbase/profile-picture/upload', 5, 2048, status=201,
+            data={'content_type': 'image/jpeg'}, format='json'
+        )
+
+    def test_delete_account(self):
+        self.authenticate(self.athlete_user)
+        self.assertWithinBudget('delete', f'/scoutbase/delete-account/{self.athlete_user.id}/', 13, 256)
+        self.assertFalse(User.objects.filter(id=self.athlete_user.id).exists())
+
+
+class SearchBudgetTests(EndpointBudgetTestCase):
+    """Budgets for athlete and coach search; query count must not grow with page size"""
+
+    def test_search_athletes_default_page(self):
+        response = self.assertWithinBudget('get', '/scoutbase/searchforathlete/', 1, 24 * 1024)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_search_athletes_max_page(self):
+        response = self.assertWithinBudget('get', '/scoutbase/searchforathlete/?page_size=1000', 1, 96 * 1024)
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_search_athletes_next_page(self):
+        first = self.client.get('/scoutbase/searchforathlete/?state=TX').data
+        self.assertWithinBudget('get', first['next'], 1, 24 * 1024)
+
+    def test_search_athletes_combined_filters(self):
+        self.assertWithinBudget(
+            'get',
+            '/scoutbase/searchforathlete/?state=TX&positions=SS&height_min=5.6&weight_max=220&name=Athlete&q=pitcher',
+            1, 24 * 1024
+        )
+
+    def test_search_coaches_default_page(self):
+        response = self.assertWithinBudget('get', '/scoutbase/searchforcoach/', 1, 24 * 1024)
+        self.assertEqual(len(response.data['results']), 25)
+
+    def test_search_coaches_max_page(self):
+        response = self.assertWithinBudget('get', '/scoutbase/searchforcoach/?page_size=1000', 1, 96 * 1024)
+        self.assertEqual(len(response.data['results']), 100)
+
+    def test_search_coaches_combined_filters(self):
+        self.assertWithinBudget(
+            'get', '/scoutbase/searchforcoach/?state=CA&division=D1&school_name=University&q=program',
+            1, 24 * 1024
+        )
+
+    def test_search_rejects_malformed_numbers(self):
+        response = self.assertWithinBudget('get', '/scoutbase/searchforathlete/?height_min=abc', 0, 1024, status=400)
+        self.assertIn('height_min', response.data)
+        self.assertWithinBudget('get', '/scoutbase/searchforcoach/?user_id=x', 0, 1024, status=400)
+
+
+class SearchTests(EndpointBudgetTestCase):
+    """Search pages through every match exactly once and applies each filter"""
+
+    def collect(self, url):
+        """Follows next links from url and returns every result"""
+        results = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.data)
+            results.extend(response.data['results'])
+            url = response.data['next']
+        return results
+
+    def assertSameIds(self, results, queryset):
+        ids = [result['id'] for result in results]
+        self.assertEqual(len(ids), len(set(ids)), 'a row was returned twice')
+        self.assertEqual(sorted(ids), sorted(queryset.values_list('id', flat=True)))
+
+    def test_next_pages_return_every_athlete_once(self):
+        results = self.collect('/scoutbase/searchforathlete/?page_size=40')
+        self.assertSameIds(results, AthleteProfile.objects.all())
+        self.assertEqual([result['id'] for result in results], sorted(result['id'] for result in results))
+
+    def test_next_pages_return_every_matching_coach_once(self):
+        results = self.collect('/scoutbase/searchforcoach/?state=TX&page_size=7')
+        self.assertSameIds(results, CoachProfile.objects.filter(state='TX'))
+
+    def test_profile_deleted_between_pages_skips_nothing(self):
+        first = self.client.get('/scoutbase/searchforathlete/?page_size=50').data
+        # With OFFSET, removing a row already seen would shift the next page past one
+        AthleteProfile.objects.filter(id=first['results'][0]['id']).delete()
+        results = first['results'] + self.collect(first['next'])
+        ids = [result['id'] for result in results]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), ATHLETE_COUNT)
+
+    def test_q_filters_athletes_and_coaches(self):
+        results = self.collect('/scoutbase/searchforathlete/?q=pitcher')
+        self.assertSameIds(results, AthleteProfile.objects.filter(bio__icontains='pitcher'))
+        self.assertEqual(len(results), 100)
+        results = self.collect('/scoutbase/searchforcoach/?q=University+7')
+        self.assertSameIds(results, CoachProfile.objects.filter(school_name='University 7'))
+
+    def test_relevance_ordered_pages_return_every_match_once(self):
+        # Order as on MySQL; every SQLite row ties on relevance, the hardest
+        # case for the cursor
+        with mock.patch('users.views.supports_full_text', return_value=True):
+            results = self.collect('/scoutbase/searchforathlete/?q=pitcher&page_size=7')
+        self.assertSameIds(results, AthleteProfile.objects.filter(bio__icontains='pitcher'))
+
+    def test_range_bounds_are_inclusive(self):
+        height = AthleteProfile.objects.values_list('height', flat=True).first()
+        results = self.collect(f'/scoutbase/searchforathlete/?height_min={height!r}&height_max={height!r}')
+        self.assertSameIds(results, AthleteProfile.objects.filter(height=height))
+        self.assertTrue(results)
+
+        results = self.collect('/scoutbase/searchforathlete/?weight_min=160&weight_max=170&page_size=100')
+        self.assertSameIds(results, AthleteProfile.objects.filter(weight__gte=160, weight__lte=170))
+        self.assertEqual({result['weight'] for result in results}, set(range(160, 171)))
+
+        results = self.collect('/scoutbase/searchforathlete/?weight=229')
+        self.assertSameIds(results, AthleteProfile.objects.filter(weight=229))
+
+    def test_blank_parameters_are_ignored(self):
+        results = self.collect(
+            '/scoutbase/searchforathlete/?state=&positions=&height_min=&weight_max=&name=&q=&page_size=100'
+        )
+        self.assertEqual(len(results), ATHLETE_COUNT)
+        results = self.collect('/scoutbase/searchforcoach/?state=&division=&user_id=&page_size=100')
+        self.assertEqual(len(results), COACH_COUNT)
+
+    def test_positions_match_whole_codes(self):
+        results = self.collect('/scoutbase/searchforathlete/?positions=P&page_size=100')
+        self.assertEqual({result['positions'] for result in results}, {'P'})
+        self.assertSameIds(results, AthleteProfile.objects.filter(positions='P'))
+
+        # Any of several codes, in any case and separator
+        results = self.collect('/scoutbase/searchforathlete/?positions=sp,+1b&page_size=100')
+        self.assertEqual({result['positions'] for result in results}, {'C/SP/LF', '1B'})
+
+        results = self.collect('/scoutbase/searchforathlete/?positions=,&page_size=100')
+        self.assertEqual(len(results), ATHLETE_COUNT)
+
+    def test_migration_populates_positions_from_strings(self):
+        migration = importlib.import_module('users.migrations.0013_populate_normalized_positions')
+        Through = AthleteProfile.normalized_positions.through
+        Through.objects.all().delete()
+        Position.objects.filter(code='DH').delete()
+        athlete = AthleteProfile.objects.first()
+        AthleteProfile.objects.filter(pk=athlete.pk).update(positions='rhp, dh / 1b;DH unknown')
+
+        migration.populate_normalized_positions(apps, None)
+
+        codes = Through.objects.filter(athleteprofile=athlete).values_list('position__code', flat=True)
+        self.assertCountEqual(codes, ['RHP', 'DH', '1B'])
+        self.assertEqual(Through.objects.count(), sum(
+            len(parse_positions(positions)) for positions in AthleteProfile.objects.values_list('positions', flat=True)
+        ))
+
+
+class SearchCacheTests(EndpointBudgetTestCase):
+    """Search responses are served from cache until a profile write invalidates them"""
+
+    def test_repeat_search_is_served_from_cache(self):
+        first = self.assertWithinBudget('get', '/scoutbase/searchforathlete/?state=TX', 1, 24 * 1024)
+        second = self.assertWithinBudget('get', '/scoutbase/searchforathlete/?state=TX', 0, 24 * 1024)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(get_cache_stats(), {'hits': 1, 'misses': 1})
+
+    def test_parameter_order_shares_cache_entry(self):
+        self.client.get('/scoutbase/searchforcoach/?state=TX&division=D1')
+        response = self.client.get('/scoutbase/searchforcoach/?division=D1&state=TX')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_edit_athlete_invalidates_athlete_search(self):
+        url = f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}'
+        self.client.get(url)
+        self.client.put(f'/scoutbase/editathlete/{self.athlete_user.id}/', {'weight': 201}, format='json')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['weight'], 201)
+
+    def test_edit_coach_picture_invalidates_coach_search(self):
+        url = f'/scoutbase/searchforcoach/?user_id={self.coach_user.id}'
+        self.client.get(url)
+        self.client.put(
+            f'/scoutbase/edit-coach-profile-picture/{self.coach_user.id}/',
+            {'profile_picture': make_image('new.jpg')}, format='multipart'
+        )
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+
+    def test_delete_account_invalidates_athlete_search(self):
+        url = f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}'
+        self.client.get(url)
+        self.authenticate(self.athlete_user)
+        self.client.delete(f'/scoutbase/delete-account/{self.athlete_user.id}/')
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'], [])
+
+    def test_user_rename_invalidates_athlete_name_search(self):
+        url = '/scoutbase/searchforathlete/?name=Renamed'
+        self.assertEqual(self.client.get(url).data['results'], [])
+        self.athlete_user.name = 'Renamed Athlete'
+        self.athlete_user.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual([row['user_id'] for row in response.data['results']], [self.athlete_user.id])
+
+    @override_settings(SEARCH_CACHE_ENABLED=False)
+    def test_search_uncached_without_shared_backend(self):
+        self.client.get('/scoutbase/searchforathlete/?state=TX')
+        response = self.assertWithinBudget('get', '/scoutbase/searchforathlete/?state=TX', 1, 24 * 1024)
+        self.assertNotIn('X-Cache', response)
+
+        # Conditional GETs still work, from a hash of the computed page
+        etag = response['ETag']
+        response = self.assertWithinBudget(
+            'get', '/scoutbase/searchforathlete/?state=TX', 1, 0, status=304, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response['ETag'], etag)
+        AthleteProfile.objects.filter(state='TX').update(bio='Edited')
+        response = self.client.get('/scoutbase/searchforathlete/?state=TX', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+
+class ConditionalGetTests(EndpointBudgetTestCase):
+    """Read endpoints return ETags and answer matching If-None-Match with 304"""
+
+    def test_fetch_user_attributes_not_modified(self):
+        url = f'/scoutbase/fetch-user-attributes/{self.coach_user.id}/'
+        etag = self.client.get(url)['ETag']
+        response = self.assertWithinBudget('get', url, 1, 0, status=304, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response['ETag'], etag)
+
+    def test_fetch_email_not_modified(self):
+        url = f'/scoutbase/fetch-email/{self.coach_user.id}/'
+        etag = self.client.get(url)['ETag']
+        self.assertWithinBudget('get', url, 1, 0, status=304, HTTP_IF_NONE_MATCH=etag)
+
+    def test_fetch_role_etag_changes_on_role_assignment(self):
+        url = f'/scoutbase/fetchrole?user_id={self.new_user.id}'
+        etag = self.client.get(url)['ETag']
+        self.client.post('/scoutbase/assignrole', {'user_id': self.new_user.id, 'role_name': 'Scout'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['role'], 'Scout')
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_search_not_modified_without_queries(self):
+        url = '/scoutbase/searchforcoach/?state=TX'
+        etag = self.client.get(url)['ETag']
+        self.assertWithinBudget('get', url, 0, 0, status=304, HTTP_IF_NONE_MATCH=etag)
+
+    def test_search_etag_changes_after_profile_edit(self):
+        url = f'/scoutbase/searchforcoach/?user_id={self.coach_user.id}'
+        etag = self.client.get(url)['ETag']
+        self.client.put(f'/scoutbase/editcoach/{self.coach_user.id}/', {'division': 'D2'}, format='json')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['division'], 'D2')
+
+
+class ProfilePictureDerivativeTests(PictureTestCase):
+    """Uploaded pictures get resized WebP and JPEG copies exposed by the serializers"""
+
+    def upload(self):
+        self.client.put(
+            f'/scoutbase/edit-athlete-profile-picture/{self.athlete_user.id}/',
+            {'profile_picture': make_image('upload.jpg', size=(1600, 1200))}, format='multipart'
+        )
+        return AthleteProfile.objects.get(user=self.athlete_user).profile_picture
+
+    def test_derivatives_are_rendered_on_upload(self):
+        picture = self.upload()
+        for size in (64, 256, 1024):
+            for extension, image_format in (('webp', 'WEBP'), ('jpg', 'JPEG')):
+                with picture.storage.open(derivative_name(picture.name, size, extension)) as file:
+                    with Image.open(file) as image:
+                        self.assertEqual((image.format, max(image.size)), (image_format, size))
+
+    @override_settings(IMAGE_PROCESSING_WORKERS=0)
+    def test_derivatives_rendered_inline_without_workers(self):
+        picture = self.upload()
+        self.assertTrue(all(picture.storage.exists(name) for name in derivative_names(picture.name)))
+
+    def test_serializer_exposes_derivative_urls(self):
+        picture = self.upload()
+        response = self.client.get(f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}')
+        derivatives = response.data['results'][0]['profile_picture_derivatives']
+        self.assertEqual(set(derivatives), {'64', '256', '1024'})
+        self.assertTrue(derivatives['256']['webp'].endswith(picture.url.replace('.jpg', '_256.webp')))
+
+    def test_deleting_picture_deletes_derivatives(self):
+        picture = self.upload()
+        names = derivative_names(picture.name)
+        picture.delete()
+        self.assertFalse(any(picture.storage.exists(name) for name in names))
+
+    def test_legacy_picture_backfilled(self):
+        # Seeded pictures use legacy names, which never had derivatives
+        response = self.client.get(f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}')
+        self.assertIsNone(response.data['results'][0]['profile_picture_derivatives'])
+
+        profile = AthleteProfile.objects.get(user=self.athlete_user)
+        # Written directly, as the storage would content-address it
+        path = profile.profile_picture.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image(size=(300, 200)).read())
+        self.addCleanup(os.remove, path)
+        stderr = io.StringIO()
+        call_command('backfill_picture_derivatives', stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('Updated 1 profiles', stderr.getvalue())
+        self.assertIn('1 files missing', stderr.getvalue())
+
+        picture = AthleteProfile.objects.get(user=self.athlete_user).profile_picture
+        self.assertTrue(CONTENT_NAME_RE.search(picture.name))
+        self.assertTrue(all(picture.storage.exists(name) for name in derivative_names(picture.name)))
+        response = self.client.get(f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}')
+        self.assertEqual(set(response.data['results'][0]['profile_picture_derivatives']), {'64', '256', '1024'})
+
+
+class PicturePlaceholderTests(PictureTestCase):
+    """Pictures get a BlurHash and dominant colour when saved, or by backfill"""
+
+    def test_placeholders_set_on_upload_and_cleared(self):
+        self.client.put(
+            f'/scoutbase/edit-athlete-profile-picture/{self.athlete_user.id}/',
+            {'profile_picture': make_image(size=(60, 40))}, format='multipart'
+        )
+        profile = AthleteProfile.objects.get(user=self.athlete_user)
+        self.assertEqual(len(profile.profile_picture_blurhash), 28)
+        red, green, blue = (int(profile.profile_picture_color[i:i + 2], 16) for i in (1, 3, 5))
+        self.assertTrue(red > 150 and green < 80 and blue < 80, profile.profile_picture_color)
+
+        response = self.client.get(f'/scoutbase/searchforathlete/?user_id={self.athlete_user.id}')
+        result = response.data['results'][0]
+        self.assertEqual(result['profile_picture_blurhash'], profile.profile_picture_blurhash)
+        self.assertEqual(result['profile_picture_color'], profile.profile_picture_color)
+
+        profile.profile_picture.delete()
+        profile.refresh_from_db()
+        self.assertIsNone(profile.profile_picture_blurhash)
+        self.assertIsNone(profile.profile_picture_color)
+
+    def write_picture(self, name):
+        path = os.path.join(self.media_root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image(size=(48, 48)).read())
+
+    def test_backfill_command(self):
+        self.write_picture('profile_pictures/athlete0.jpg')
+        self.write_picture('profile_pictures/coach0.jpg')
+        before = AthleteProfile.objects.get(user=self.athlete_user).updated_at
+
+        stderr = io.StringIO()
+        call_command('backfill_picture_placeholders', workers=2, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('Updated 2 profiles', stderr.getvalue())
+        self.assertIn('0 files missing', stderr.getvalue())
+
+        athlete = AthleteProfile.objects.get(user=self.athlete_user)
+        self.assertEqual(len(athlete.profile_picture_blurhash), 28)
+        self.assertGreater(athlete.updated_at, before)
+        self.assertIsNotNone(CoachProfile.objects.get(user=self.coach_user).profile_picture_color)
+
+        # Only pictures without placeholders are computed unless --all is given
+        stderr = io.StringIO()
+        call_command('backfill_picture_placeholders', workers=0, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('Updated 0 profiles', stderr.getvalue())
+        call_command('backfill_picture_placeholders', '--all', workers=0, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('Updated 2 profiles', stderr.getvalue())
+
+
+class ContentAddressedStorageTests(PictureTestCase):
+    """Pictures are named by content hash, deduplicated and reference-counted"""
+
+    def upload(self, user, kind='athlete', size=(40, 40)):
+        self.client.put(
+            f'/scoutbase/edit-{kind}-profile-picture/{user.id}/',
+            {'profile_picture': make_image('IMG_0001.JPG', size=size)}, format='multipart'
+        )
+        model = AthleteProfile if kind == 'athlete' else CoachProfile
+        return model.objects.get(user=user).profile_picture
+
+    def test_name_is_sharded_content_hash(self):
+        picture = self.upload(self.athlete_user)
+        match = CONTENT_NAME_RE.search(picture.name)
+        self.assertIsNotNone(match)
+        self.assertTrue(picture.name.startswith(f'profile_pictures/{match.group("a")}/{match.group("b")}/'))
+        self.assertTrue(picture.name.endswith('.jpg'))
+
+    def test_identical_uploads_share_one_file(self):
+        athlete_picture = self.upload(self.athlete_user)
+        coach_picture = self.upload(self.coach_user, kind='coach')
+        self.assertEqual(athlete_picture.name, coach_picture.name)
+        self.assertEqual(StoredFile.objects.get(name=athlete_picture.name).references, 2)
+        self.assertNotEqual(self.upload(self.athlete_user, size=(41, 41)).name, coach_picture.name)
+
+    def test_file_removed_with_last_reference(self):
+        athlete_picture = self.upload(self.athlete_user)
+        coach_picture = self.upload(self.coach_user, kind='coach')
+        derivative = derivative_name(athlete_picture.name, 64, 'webp')
+
+        athlete_picture.delete()
+        self.assertTrue(coach_picture.storage.exists(coach_picture.name))
+        self.assertTrue(coach_picture.storage.exists(derivative))
+
+        coach_picture.delete()
+        self.assertFalse(coach_picture.storage.exists(derivative))
+        self.assertFalse(StoredFile.objects.filter(name=derivative).exists())
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_replaced_picture_is_released(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            old = self.upload(self.athlete_user)
+            shared = self.upload(self.coach_user, kind='coach', size=(41, 41))
+            self.upload(self.athlete_user, size=(41, 41))
+        self.assertFalse(old.storage.exists(old.name))
+        self.assertFalse(old.storage.exists(derivative_name(old.name, 64, 'webp')))
+        self.assertFalse(StoredFile.objects.filter(name=old.name).exists())
+        self.assertEqual(StoredFile.objects.get(name=shared.name).references, 2)
+
+        # The same content again replaces the row's reference rather than adding one
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(self.athlete_user, size=(41, 41))
+        self.assertEqual(StoredFile.objects.get(name=shared.name).references, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.upload(self.athlete_user)
+        self.assertEqual(StoredFile.objects.get(name=shared.name).references, 1)
+        self.assertTrue(shared.storage.exists(shared.name))
+
+    def test_deleted_profile_releases_picture(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            picture = self.upload(self.athlete_user)
+        self.authenticate(self.athlete_user)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/scoutbase/delete-account/{self.athlete_user.id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(picture.storage.exists(picture.name))
+        self.assertFalse(StoredFile.objects.exists())
+
+    def test_release_waits_for_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            old = self.upload(self.athlete_user)
+            self.upload(self.athlete_user, size=(41, 41))
+        self.assertEqual(StoredFile.objects.get(name=old.name).references, 1)
+        self.assertEqual(len(callbacks), 1)
+
+
+class OrphanCollectionTests(PictureTestCase):
+    """Picture files no profile refers to are collected"""
+
+    def upload(self, size):
+        self.client.put(
+            f'/scoutbase/edit-athlete-profile-picture/{self.athlete_user.id}/',
+            {'profile_picture': make_image(size=size)}, format='multipart'
+        )
+        return AthleteProfile.objects.get(user=self.athlete_user).profile_picture
+
+    def replaced_picture(self):
+        old = self.upload((40, 40))
+        current = self.upload((50, 50))
+        return old, current
+
+    def test_dry_run_keeps_files(self):
+        old, _ = self.replaced_picture()
+        stats = collect_orphans(dry_run=True, min_age=0)
+        self.assertEqual(stats.orphans, 1 + len(derivative_names(old.name)))
+        self.assertTrue(old.storage.exists(old.name))
+
+    def test_orphans_deleted_with_derivatives(self):
+        old, current = self.replaced_picture()
+        with self.assertNumQueries(3):
+            stats = collect_orphans(min_age=0)
+        self.assertEqual(stats.scanned, 2 * (1 + len(derivative_names(old.name))))
+        self.assertFalse(any(old.storage.exists(name) for name in [old.name, *derivative_names(old.name)]))
+        self.assertTrue(all(current.storage.exists(name) for name in [current.name, *derivative_names(current.name)]))
+        self.assertFalse(StoredFile.objects.filter(name=old.name).exists())
+
+    def test_quarantine_moves_orphans(self):
+        old, _ = self.replaced_picture()
+        quarantine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, quarantine, ignore_errors=True)
+        call_command('collect_orphan_pictures', quarantine=quarantine, min_age=0, stderr=io.StringIO())
+        self.assertFalse(old.storage.exists(old.name))
+        self.assertTrue(os.path.exists(os.path.join(quarantine, old.name)))
+
+    def test_recent_files_are_kept(self):
+        old, _ = self.replaced_picture()
+        stats = collect_orphans()
+        self.assertEqual(stats.orphans, 0)
+        self.assertTrue(old.storage.exists(old.name))
+
+    def test_content_reused_during_collection_is_kept(self):
+        old, _ = self.replaced_picture()
+        reused = []
+
+        def reupload(name):
+            # Runs after the file was judged an orphan, before the batch is removed
+            if not reused:
+                reused.append(self.upload((40, 40)))
+
+        stats = collect_orphans(min_age=0, log=reupload)
+        self.assertEqual(reused[0].name, old.name)
+        self.assertEqual(stats.orphans, 0)
+        self.assertTrue(all(old.storage.exists(name) for name in [old.name, *derivative_names(old.name)]))
+        self.assertTrue(StoredFile.objects.filter(name=old.name).exists())
+
+    def test_legacy_name_with_size_suffix_is_kept(self):
+        # IMG_1024.jpg looks like a 1024px derivative of IMG, but is an original
+        profile = AthleteProfile.objects.get(user=self.athlete_user)
+        profile.profile_picture = 'profile_pictures/IMG_1024.jpg'
+        profile.save()
+        path = profile.profile_picture.path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(make_image().read())
+        stats = collect_orphans(min_age=0)
+        self.assertEqual(stats.orphans, 0)
+        self.assertTrue(os.path.exists(path))
+
+
+class UploadValidationTests(PictureTestCase):
+    """Uploads are capped while streaming, validated from the header and normalized"""
+
+    def put_picture(self, upload):
+        return self.client.put(
+            f'/scoutbase/edit-athlete-profile-picture/{self.athlete_user.id}/',
+            {'profile_picture': upload}, format='multipart'
+        )
+
+    def stored_image(self):
+        picture = AthleteProfile.objects.get(user=self.athlete_user).profile_picture
+        with picture.open('rb') as file:
+            image = Image.open(io.BytesIO(file.read()))
+            image.load()
+            return image
+
+    @override_settings(PROFILE_PICTURE_MAX_UPLOAD_BYTES=1024)
+    def test_oversized_upload_rejected(self):
+        response = self.put_picture(make_image(size=(400, 400)))
+        self.assertEqual(response.status_code, 413)
+
+    @override_settings(PROFILE_PICTURE_MAX_UPLOAD_BYTES=100)
+    def test_stream_cap_without_content_length(self):
+        handler = CappedUploadHandler()
+        handler.new_file('profile_picture', 'profile.jpg', 'image/jpeg', None)
+        handler.receive_data_chunk(b'x' * 100, 0)
+        with self.assertRaises(UploadTooLarge):
+            handler.receive_data_chunk(b'x', 100)
+
+    def test_non_image_rejected(self):
+        upload = SimpleUploadedFile('profile.jpg', b'not an image', content_type='image/jpeg')
+        self.assertEqual(self.put_picture(upload).status_code, 400)
+        upload = SimpleUploadedFile('profile.jpg', b'not an image', content_type='image/jpeg')
+        response = self.client.put(
+            f'/scoutbase/editathlete/{self.athlete_user.id}/', {'profile_picture': upload}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @override_settings(PROFILE_PICTURE_MAX_DECODE_BYTES=40 * 40 * 4 - 1)
+    def test_too_many_pixels_rejected_before_decoding(self):
+        for upload in (make_image(size=(40, 40)), make_png((40, 40))):
+            with mock.patch.object(ImageFile.ImageFile, 'load', side_effect=AssertionError('decoded')):
+                response = self.put_picture(upload)
+            self.assertEqual(response.status_code, 400)
+
+    @override_settings(PROFILE_PICTURE_MAX_DECODE_BYTES=300 * 300 * 4, PROFILE_PICTURE_MAX_DIMENSION=100)
+    def test_jpeg_budgeted_at_reduced_decode_scale(self):
+        # A JPEG decodes at 1/2 scale here, so it fits where a PNG would not
+        self.assertEqual(self.put_picture(make_image(size=(400, 400))).status_code, 200)
+        self.assertEqual(self.put_picture(make_png((400, 400))).status_code, 400)
+
+    def test_all_metadata_stripped(self):
+        xmp = b'<x:xmpmeta xmlns:x="adobe:ns:meta/">secret</x:xmpmeta>'
+        srgb = ImageCms.ImageCmsProfile(ImageCms.createProfile('sRGB')).tobytes()
+        text = PngImagePlugin.PngInfo()
+        text.add_text('Author', 'secret')
+        uploads = [
+            make_png((40, 20), pnginfo=text, icc_profile=srgb),
+            make_image(size=(40, 20), xmp=xmp, comment=b'secret', icc_profile=srgb),
+        ]
+        for upload in uploads:
+            self.assertEqual(self.put_picture(upload).status_code, 200)
+            image = self.stored_image()
+            self.assertEqual(set(image.info) - STRUCTURAL_INFO_KEYS, set(), image.format)
+            self.assertEqual(image.size, (40, 20))
+
+    @override_settings(PROFILE_PICTURE_MAX_DIMENSION=100)
+    def test_large_original_downsized(self):
+        self.put_picture(make_image(size=(400, 300)))
+        self.assertEqual(self.stored_image().size, (100, 75))
+
+    def test_exif_stripped_and_orientation_applied(self):
+        exif = Image.Exif()
+        exif[0x0112] = 6  # Orientation: rotate 90 degrees clockwise
+        exif[0x010F] = 'PhoneMaker'
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 20), color=(10, 200, 10)).save(buffer, format='JPEG', exif=exif)
+        self.put_picture(SimpleUploadedFile('profile.jpg', buffer.getvalue(), content_type='image/jpeg'))
+        image = self.stored_image()
+        self.assertEqual(image.size, (20, 40))
+        self.assertFalse(image.getexif())
+
+
+class DirectUploadTests(PictureTestCase):
+    """Clients upload with a presigned form, then confirm the upload"""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.athlete_user)
+
+    def presign(self, content_type='image/jpeg'):
+        return self.client.post('/scoutbase/profile-picture/upload', {'content_type': content_type}, format='json')
+
+    def upload(self, form, file):
+        return self.client.post(form['url'], {**form['fields'], 'file': file}, format='multipart')
+
+    def confirm(self, key):
+        return self.client.post('/scoutbase/profile-picture/confirm', {'key': key}, format='json')
+
+    def test_upload_and_confirm(self):
+        response = self.presign()
+        self.assertEqual(response.status_code, 201)
+        form = response.data
+        self.assertTrue(form['key'].startswith(f'uploads/{self.athlete_user.id}/'))
+        self.assertEqual(self.upload(form, make_image(size=(60, 40))).status_code, 204)
+
+        self.assertEqual(self.confirm(form['key']).status_code, 200)
+        picture = AthleteProfile.objects.get(user=self.athlete_user).profile_picture
+        self.assertIsNotNone(CONTENT_NAME_RE.search(picture.name))
+        self.assertTrue(picture.name.startswith('profile_pictures/'))
+        self.assertTrue(all(picture.storage.exists(name) for name in derivative_names(picture.name)))
+        self.assertFalse(picture.storage.exists(form['key']))
+
+    def test_upload_must_match_policy(self):
+        form = self.presign().data
+        forged = dict(form, fields=dict(form['fields'], key=f'uploads/{self.athlete_user.id}/{"0" * 32}.jpg'))
+        self.assertEqual(self.upload(forged, make_image()).status_code, 400)
+        tampered = dict(form, fields=dict(form['fields'], policy=form['fields']['policy'] + 'x'))
+        self.assertEqual(self.upload(tampered, make_image()).status_code, 403)
+        with self.settings(DIRECT_UPLOAD_EXPIRES=-1):
+            expired = self.presign().data
+        self.assertEqual(self.upload(expired, make_image()).status_code, 403)
+        self.assertEqual(self.presign('image/gif').status_code, 400)
+
+    def test_confirm_checks_key_and_content(self):
+        form = self.presign().data
+        self.assertEqual(self.confirm(form['key']).status_code, 404)
+
+        self.authenticate(self.coach_user)
+        self.assertEqual(self.confirm(form['key']).status_code, 400)
+
+        self.authenticate(self.athlete_user)
+        self.upload(form, SimpleUploadedFile('profile.jpg', b'not an image', content_type='image/jpeg'))
+        self.assertEqual(self.confirm(form['key']).status_code, 400)
+        self.assertFalse(AthleteProfile.objects.get(user=self.athlete_user).profile_picture.storage.exists(form['key']))
+
+    def test_unconfirmed_uploads_collected(self):
+        form = self.presign().data
+        self.upload(form, make_image())
+        stats = collect_orphans(min_age=0)
+        self.assertEqual(stats.orphans, 1)
+        self.assertEqual(self.confirm(form['key']).status_code, 404)
+
+
+@mock_aws
+class S3StorageTests(TestCase):
+    """Content addressing and presigned uploads work against S3"""
+
+    def setUp(self):
+        boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='pictures')
+        self.storage = S3ContentAddressedStorage(bucket_name='pictures', region_name='us-east-1')
+
+    def object(self, name):
+        return boto3.client('s3', region_name='us-east-1').head_object(Bucket='pictures', Key=name)
+
+    def test_content_addressed_objects(self):
+        content = make_image(size=(40, 40)).read()
+        name = self.storage.save('profile_pictures/a.jpg', io.BytesIO(content))
+        self.assertEqual(self.storage.save('profile_pictures/b.jpg', io.BytesIO(content)), name)
+        self.assertIsNotNone(CONTENT_NAME_RE.search(name))
+        self.assertEqual(StoredFile.objects.get(name=name).references, 2)
+        self.assertIn('immutable', self.object(name)['CacheControl'])
+
+        derivative = derivative_name(name, 64, 'webp')
+        self.storage.save(derivative, io.BytesIO(b'derived'))
+        self.assertEqual(self.storage.derived_names(name), [derivative])
+
+        self.storage.delete(name)
+        self.assertTrue(self.storage.exists(name))
+        self.storage.delete(name)
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(self.storage.exists(derivative))
+
+    def test_presigned_upload(self):
+        form = self.storage.presigned_upload('uploads/1/upload.jpg', 'image/jpeg', 1024, 60)
+        content = make_image().read()
+        response = requests.post(form['url'], data=form['fields'], files={'file': ('upload.jpg', content)})
+        self.assertEqual(response.status_code, 204)
+        with self.storage.open('uploads/1/upload.jpg') as file:
+            self.assertEqual(file.read(), content)
+
+        # The bucket enforces the size limit and content type from the policy
+        conditions = json.loads(base64.b64decode(form['fields']['policy']))['conditions']
+        self.assertIn(['content-length-range', 1, 1024], conditions)
+        self.assertIn({'Content-Type': 'image/jpeg'}, conditions)
+
+
+class MediaServingTests(PictureTestCase):
+    """Media is served with caching headers, conditional GETs and byte ranges"""
+
+    def setUp(self):
+        super().setUp()
+        digest = 'ab' + 'c' * 62
+        self.hashed_name = f'profile_pictures/ab/cc/{digest}.jpg'
+        self.legacy_name = 'profile_pictures/legacy.jpg'
+        for name in (self.hashed_name, self.legacy_name):
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(name)), exist_ok=True)
+            with open(os.path.join(self.media_root, name), 'wb') as file:
+                file.write(bytes(range(100)))
+
+    def test_full_file_with_cache_headers(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(f'/media/{self.hashed_name}')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(100)))
+        self.assertEqual(response['Content-Type'], 'image/jpeg')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['Accept-Ranges'], 'bytes')
+        legacy = self.client.get(f'/media/{self.legacy_name}')
+        self.assertNotIn('immutable', legacy['Cache-Control'])
+
+    def test_conditional_requests(self):
+        response = self.client.get(f'/media/{self.hashed_name}')
+        by_etag = self.client.get(f'/media/{self.hashed_name}', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(by_etag.status_code, 304)
+        by_date = self.client.get(f'/media/{self.hashed_name}', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(by_date.status_code, 304)
+
+    def test_range_requests(self):
+        response = self.client.get(f'/media/{self.hashed_name}', HTTP_RANGE='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(b''.join(response.streaming_content), bytes(range(10, 20)))
+
+        suffix = self.client.get(f'/media/{self.hashed_name}', HTTP_RANGE='bytes=-5')
+        self.assertEqual(b''.join(suffix.streaming_content), bytes(range(95, 100)))
+
+        unsatisfiable = self.client.get(f'/media/{self.hashed_name}', HTTP_RANGE='bytes=200-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+
+        stale = self.client.get(f'/media/{self.hashed_name}', HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"stale"')
+        self.assertEqual(stale.status_code, 200)
+
+    def test_missing_and_outside_media_root(self):
+        self.assertEqual(self.client.get('/media/profile_pictures/missing.jpg').status_code, 404)
+        self.assertEqual(self.client.get('/media/../manage.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/profile_pictures').status_code, 404)
+
+    @override_settings(MEDIA_X_ACCEL_REDIRECT_PREFIX='/protected-media/')
+    def test_accel_redirect_offload(self):
+        response = self.client.get(f'/media/{self.hashed_name}')
+        self.assertEqual(response['X-Accel-Redirect'], f'/protected-media/{self.hashed_name}')
+        self.assertEqual(response.content, b'')
+        self.assertNotIn('Content-Type', response)
+
+    @override_settings(MEDIA_REQUIRE_AUTHENTICATION=True)
+    def test_authentication_required(self):
+        self.assertEqual(self.client.get(f'/media/{self.hashed_name}').status_code, 401)
+        self.authenticate(self.coach_user)
+        response = self.client.get(f'/media/{self.hashed_name}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Cache-Control'].startswith('private'))
+
+
+class QueryPlanTests(TestCase):
+    """Search and login queries use an index on a large, analyzed dataset"""
+
+    @classmethod
+    def setUpTestData(cls):
+        athlete_role = Role.objects.get(name='Athlete')
+        states = ['TX', 'CA', 'FL', 'GA', 'NC', 'NY', 'OH', 'AZ', 'WA', 'IL']
+        users = User.objects.bulk_create([
+            User(email=f'athlete{i}@example.com', name=f'Athlete {i}', password='!', role=athlete_role)
+            for i in range(5000)
+        ])
+        athletes = AthleteProfile.objects.bulk_create([
+            AthleteProfile(
+                user=user,
+                name=user.name,
+                high_school_name=f'High School {i % 400}',
+                positions=POSITIONS[i % len(POSITIONS)],
+                height=5.3 + (i * 7 % 16) / 10,
+                weight=140 + i * 13 % 100,
+                state=states[i % len(states)],
+                batting_arm='Left' if i % 3 == 0 else 'Right',
+                throwing_arm='Left' if i % 4 == 0 else 'Right',
+            )
+            for i, user in enumerate(users)
+        ])
+        for athlete in athletes[:len(POSITIONS)]:
+            athlete.sync_positions()
+        Through = AthleteProfile.normalized_positions.through
+        position_ids = dict(Position.objects.values_list('code', 'id'))
+        Through.objects.bulk_create([
+            Through(athleteprofile_id=athlete.id, position_id=position_ids[code])
+            for athlete in athletes[len(POSITIONS):]
+            for code in athlete.positions.split('/')
+        ])
+
+        users = User.objects.bulk_create([
+            User(email=f'coach{i}@example.com', name=f'Coach {i}', password='!') for i in range(2500)
+        ])
+        CoachProfile.objects.bulk_create([
+            CoachProfile(
+                user=user,
+                name=user.name,
+                school_name=f'University {i}',
+                state=states[i % len(states)],
+                division=DIVISIONS[i % len(DIVISIONS)],
+            )
+            for i, user in enumerate(users)
+        ])
+        analyze_tables()
+
+    def test_search_plans_use_indexes(self):
+        results = check_query_plans()
+        self.assertGreater(len(results), 100)
+        failures = [f'{result.label}:\n{result.plan}' for result in results if result.failed]
+        self.assertEqual(failures, [], '\n\n'.join(failures))
+        # Substring-only searches are reported, not paired away
+        known = {result.label for result in results if result.known_scan and result.scans}
+        self.assertLessEqual({'coaches: state', 'coaches: division', 'athletes: state'}, known)
+
+    def test_full_scans_detected(self):
+        plan = explain(search_page(filter_athletes({'bio': 'pitcher'})))
+        self.assertEqual(full_scans(plan), ['users_athleteprofile'])
+        mysql_plan = json.dumps({'query_block': {'nested_loop': [
+            {'table': {'table_name': 'users_coachprofile', 'access_type': 'ALL'}},
+            {'table': {'table_name': 'users_user', 'access_type': 'eq_ref'}},
+        ]}})
+        self.assertEqual(full_scans(mysql_plan, vendor='mysql'), ['users_coachprofile'])
+        self.assertEqual(full_scans('Seq Scan on users_user  (cost=0.00..1.01)', vendor='postgresql'), ['users_user'])
+
+    def test_command(self):
+        stderr = io.StringIO()
+        call_command('check_query_plans', analyze=True, stdout=io.StringIO(), stderr=stderr)
+        self.assertIn('indexed query plans use an index', stderr.getvalue())
+        self.assertIn('Known full scan: coaches: division', stderr.getvalue())
+
+    def test_case_insensitive_filters_and_login(self):
+        # State and division match substrings on both endpoints, as they always have
+        self.assertEqual(filter_athletes({'state': 'tx'}).count(), 500)
+        AthleteProfile.objects.filter(pk__in=AthleteProfile.objects.values('pk')[:3]).update(state='New Mexico')
+        CoachProfile.objects.filter(pk__in=CoachProfile.objects.values('pk')[:2]).update(state='New Mexico')
+        self.assertEqual(filter_athletes({'state': 'new'}).count(), 3)
+        self.assertEqual(filter_coaches({'state': 'new'}).count(), 2)
+        self.assertEqual(filter_coaches({'division': 'd'}).count(), 1875)
+        user = User.objects.filter_by_email('ATHLETE7@example.COM').get()
+        self.assertEqual(user.email, 'athlete7@example.com')
+        user.set_password('Password123!')
+        user.save()
+        response = self.client.post(
+            '/scoutbase/login', {'email': 'Athlete7@Example.com', 'password': 'Password123!'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class ExportTests(EndpointBudgetTestCase):
+    """Athlete export streams every matching row in a bounded number of queries"""
+
+    def setUp(self):
+        super().setUp()
+        self.authenticate(self.scout_user)
+
+    def stream(self, url, max_queries):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            body = b''.join(response.streaming_content).decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(queries), max_queries)
+        return response, body
+
+    def test_export_ndjson(self):
+        response, body = self.stream('/scoutbase/export-athletes/', 3)
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(rows), ATHLETE_COUNT)
+        self.assertEqual([row['id'] for row in rows], sorted(row['id'] for row in rows))
+
+    def test_export_csv_with_filters(self):
+        _, body = self.stream('/scoutbase/export-athletes/?output=csv&state=TX&positions=SS', 3)
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), AthleteProfile.objects.filter(state='TX', positions__contains='SS').count())
+        self.assertTrue(all(row['state'] == 'TX' for row in rows))
+
+    def test_export_requires_authentication(self):
+        del self.client.cookies['jwt']
+        self.assertEqual(self.client.get('/scoutbase/export-athletes/').status_code, 401)
+
+    def test_export_rejects_unknown_output(self):
+        self.assertEqual(self.client.get('/scoutbase/export-athletes/?output=xml').status_code, 400)
+
+    def test_export_rejects_malformed_numbers(self):
+        self.assertEqual(self.client.get('/scoutbase/export-athletes/?weight_max=heavy').status_code, 400)
+        with self.assertRaises(CommandError):
+            call_command('export_athletes', '--filter', 'height=tall', stdout=io.StringIO())
+
+    def test_export_command(self):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('export_athletes', '--filter', 'state=CA', '--batch-size', '25', stdout=out, stderr=err)
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual(len(rows), ATHLETE_COUNT // len(STATES))
+        self.assertIn(f'Exported {len(rows)} athletes', err.getvalue())
+
+
+class JWTAuthenticationTests(EndpointBudgetTestCase):
+    """The default JWT backend decodes once and serves repeat requests from its user cache"""
+
+    def test_bearer_header_is_accepted(self):
+        token = make_token(self.coach_user)
+        response = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.data, token)
+
+    def test_resolved_user_is_cached(self):
+        self.authenticate(self.coach_user)
+        self.assertWithinBudget('get', '/scoutbase/user', 1, 512)
+        self.assertWithinBudget('get', '/scoutbase/user', 0, 512)
+
+    def test_cached_user_dropped_on_save(self):
+        self.authenticate(self.coach_user)
+        self.client.get('/scoutbase/user')
+        User.objects.get(id=self.coach_user.id).save()
+        self.assertWithinBudget('get', '/scoutbase/user', 1, 512)
+
+    def test_expired_token_is_rejected(self):
+        self.client.cookies['jwt'] = encode_token(
+            {'id': self.coach_user.id, 'exp': datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)}
+        )
+        self.assertEqual(self.client.get('/scoutbase/user').status_code, 401)
+
+    def test_expired_cookie_does_not_block_public_endpoints(self):
+        self.client.cookies['jwt'] = encode_token(
+            {'id': self.coach_user.id, 'exp': datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)}
+        )
+        self.assertWithinBudget('get', '/scoutbase/searchforathlete/?state=TX', 1, 24 * 1024)
+        self.assertEqual(self.client.get(f'/scoutbase/fetchrole?user_id={self.coach_user.id}').status_code, 200)
+
+    def test_shared_secret_token_is_rejected(self):
+        self.client.cookies['jwt'] = jwt.encode({'id': self.coach_user.id}, 'secret', algorithm='HS256')
+        self.assertEqual(self.client.get('/scoutbase/user').status_code, 401)
+
+    def test_malformed_token_is_rejected(self):
+        self.client.cookies['jwt'] = 'not-a-token'
+        self.assertEqual(self.client.get('/scoutbase/user').status_code, 401)
+
+    def test_login_ignores_stale_cookie(self):
+        self.client.cookies['jwt'] = 'not-a-token'
+        response = self.client.post(
+            '/scoutbase/login', {'email': 'coach1@example.com', 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_delete_account_requires_token(self):
+        response = self.client.delete(f'/scoutbase/delete-account/{self.coach_user.id}/')
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(User.objects.filter(id=self.coach_user.id).exists())
+
+
+class RoleClaimTests(EndpointBudgetTestCase):
+    """Access tokens carry the role name and role lookups use the role cache"""
+
+    def test_token_carries_role(self):
+        self.assertEqual(jwt.decode(make_token(self.coach_user), options={'verify_signature': False})['role'], 'Coach')
+        self.assertIsNone(jwt.decode(make_token(self.new_user), options={'verify_signature': False})['role'])
+
+    def test_own_role_answered_from_token(self):
+        self.authenticate(self.coach_user)
+        self.client.get('/scoutbase/user')
+        response = self.assertWithinBudget('get', f'/scoutbase/fetchrole?user_id={self.coach_user.id}', 0, 128)
+        self.assertEqual(response.data['role'], 'Coach')
+        self.assertWithinBudget(
+            'get', f'/scoutbase/fetchrole?user_id={self.coach_user.id}', 0, 0,
+            status=304, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+
+    def test_own_attributes_answered_without_queries(self):
+        self.authenticate(self.coach_user)
+        self.client.get('/scoutbase/user')
+        response = self.assertWithinBudget('get', f'/scoutbase/fetch-user-attributes/{self.coach_user.id}/', 0, 256)
+        self.assertEqual(response.data['role'], 'Coach')
+
+    def test_assigning_own_role_reissues_token(self):
+        self.authenticate(self.new_user)
+        response = self.client.post(
+            '/scoutbase/assignrole', {'user_id': self.new_user.id, 'role_name': 'Scout'}, format='json'
+        )
+        self.assertEqual(response.cookies['jwt'].value, response.data['jwt'])
+        self.assertEqual(jwt.decode(response.data['jwt'], options={'verify_signature': False})['role'], 'Scout')
+        response = self.client.get(f'/scoutbase/fetchrole?user_id={self.new_user.id}')
+        self.assertEqual(response.data['role'], 'Scout')
+
+    def test_role_cache_invalidated_on_role_change(self):
+        role = Role.objects.get(name='Scout')
+        role.name = 'Recruiter'
+        role.save()
+        response = self.client.get(f'/scoutbase/fetchrole?user_id={self.scout_user.id}')
+        self.assertEqual(response.data['role'], 'Recruiter')
+
+    def test_new_role_found_after_cache_miss(self):
+        Role.objects.bulk_create([Role(name='Trainer')])
+        response = self.client.post(
+            '/scoutbase/assignrole', {'user_id': self.new_user.id, 'role_name': 'Trainer'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+
+class SigningKeyTests(EndpointBudgetTestCase):
+    """Tokens are signed with kid-tagged asymmetric keys published as a JWKS"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.rsa_key = make_signing_key('rsa-1', rsa.generate_private_key(public_exponent=65537, key_size=2048))
+        cls.ed_key = make_signing_key('ed-2', ed25519.Ed25519PrivateKey.generate())
+
+    def fetch_jwks(self):
+        return jwt.PyJWKSet.from_dict(self.client.get('/.well-known/jwks.json').json())
+
+    def test_jwks_budget(self):
+        response = self.assertWithinBudget('get', '/.well-known/jwks.json', 0, 1024)
+        self.assertIn('max-age=', response['Cache-Control'])
+        self.assertTrue(response['ETag'])
+
+    def test_jwks_revalidation(self):
+        etag = self.client.get('/.well-known/jwks.json')['ETag']
+        response = self.client.get('/.well-known/jwks.json', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_token_verifies_against_jwks(self):
+        with override_settings(JWT_SIGNING_KEYS=[self.rsa_key]):
+            token = make_token(self.coach_user)
+            header = jwt.get_unverified_header(token)
+            self.assertEqual((header['kid'], header['alg']), ('rsa-1', 'RS256'))
+            key = self.fetch_jwks()[header['kid']]
+            self.assertEqual(jwt.decode(token, key, algorithms=[header['alg']])['id'], self.coach_user.id)
+
+    def test_development_key_refused_in_production(self):
+        with override_settings(JWT_SIGNING_KEYS=[], DEBUG=False, TESTING=False):
+            with self.assertRaises(ImproperlyConfigured):
+                make_token(self.coach_user)
+        with override_settings(JWT_SIGNING_KEYS=[], DEBUG=True, TESTING=False):
+            self.assertEqual(jwt.get_unverified_header(make_token(self.coach_user))['kid'], 'dev')
+
+    def test_rotation(self):
+        # The new key is published before it signs, the old key verifies until it is removed
+        with override_settings(JWT_SIGNING_KEYS=[self.rsa_key, public_only(self.ed_key)]):
+            old_token = make_token(self.coach_user)
+            self.assertEqual({key.key_id for key in self.fetch_jwks().keys}, {'rsa-1', 'ed-2'})
+        with override_settings(JWT_SIGNING_KEYS=[self.ed_key, public_only(self.rsa_key)]):
+            new_token = make_token(self.coach_user)
+            self.assertEqual(jwt.get_unverified_header(new_token)['alg'], 'EdDSA')
+            for token in (old_token, new_token):
+                response = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {token}')
+                self.assertEqual(response.status_code, 200)
+        with override_settings(JWT_SIGNING_KEYS=[self.ed_key]):
+            response = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {old_token}')
+            self.assertEqual(response.status_code, 401)
+
+    def test_unknown_kid_is_rejected(self):
+        with override_settings(JWT_SIGNING_KEYS=[self.rsa_key]):
+            token = make_token(self.coach_user)
+        response = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {token}')
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshTokenTests(EndpointBudgetTestCase):
+    """Refresh tokens are stored hashed, rotate on use and are revoked on logout"""
+
+    def login(self):
+        return self.client.post(
+            '/scoutbase/login', {'email': 'coach1@example.com', 'password': 'password123'}, format='json'
+        ).data
+
+    def test_refresh_token_is_stored_hashed(self):
+        refresh = self.login()['refresh']
+        self.assertFalse(RefreshToken.objects.filter(token_hash=refresh).exists())
+        self.assertTrue(RefreshToken.objects.filter(token_hash=hash_refresh_token(refresh)).exists())
+
+    def test_refresh_issues_working_access_token(self):
+        self.login()
+        self.client.cookies.pop('jwt')
+        response = self.client.post('/scoutbase/token/refresh')
+        self.assertEqual(response.status_code, 200)
+        user = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {response.data["jwt"]}')
+        self.assertEqual(user.status_code, 200)
+
+    def test_refresh_token_is_single_use(self):
+        refresh = self.login()['refresh']
+        rotated = self.client.post('/scoutbase/token/refresh', {'refresh': refresh}, format='json').data['refresh']
+        reused = self.client.post('/scoutbase/token/refresh', {'refresh': refresh}, format='json')
+        self.assertEqual(reused.status_code, 401)
+        # Reuse of a rotated token revokes the whole session
+        response = self.client.post('/scoutbase/token/refresh', {'refresh': rotated}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logout_revokes_refresh_token(self):
+        refresh = self.login()['refresh']
+        self.client.post('/scoutbase/logout', {'refresh': refresh}, format='json')
+        response = self.client.post('/scoutbase/token/refresh', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_unknown_refresh_token_is_rejected(self):
+        response = self.client.post('/scoutbase/token/refresh', {'refresh': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_malformed_refresh_body_is_rejected(self):
+        for body in ({'refresh': 5}, ['refresh']):
+            for url in ('/scoutbase/token/refresh', '/scoutbase/logout'):
+                self.assertEqual(self.client.post(url, body, format='json').status_code, 400)
+
+    def test_purge_deletes_only_expired_tokens(self):
+        refresh = self.login()['refresh']
+        self.client.post('/scoutbase/token/refresh', {'refresh': refresh}, format='json')
+        RefreshToken.objects.create(
+            user=self.coach_user, token_hash='expired', expires_at=datetime.datetime(2020, 1, 1, tzinfo=datetime.timezone.utc)
+        )
+        stderr = io.StringIO()
+        call_command('purge_refresh_tokens', stderr=stderr)
+        self.assertIn('Deleted 1 expired', stderr.getvalue())
+        # The rotated token is kept until it expires, for reuse detection
+        self.assertEqual(RefreshToken.objects.filter(revoked_at__isnull=False).count(), 1)
+        self.assertFalse(RefreshToken.objects.filter(token_hash='expired').exists())
+
+
+class FastPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Low-iteration PBKDF2 so hasher upgrade tests stay fast"""
+    algorithm = 'pbkdf2_fast'
+    iterations = 1000
+
+
+class PasswordHashingTests(EndpointBudgetTestCase):
+    """Hashing runs in a bounded pool, sheds load with 503 and upgrades old hashes"""
+
+    def test_pool_rejects_work_when_saturated(self):
+        pool = BoundedHashingPool(workers=1, max_pending=0)
+        release = threading.Event()
+        running = pool.submit(release.wait)
+        with self.assertRaises(HashingPoolSaturated):
+            pool.submit(make_password, 'password123')
+        release.set()
+        running.result()
+        self.assertTrue(pool.run(make_password, 'password123'))
+
+    def test_login_returns_503_when_saturated(self):
+        saturated = mock.Mock(run=mock.Mock(side_effect=HashingPoolSaturated()))
+        with mock.patch('users.views.get_hashing_pool', return_value=saturated):
+            response = self.client.post(
+                '/scoutbase/login', {'email': 'coach1@example.com', 'password': 'password123'}, format='json'
+            )
+        self.assertEqual(response.status_code, 503)
+
+    @override_settings(PASSWORD_HASHERS=[
+        'users.tests.FastPBKDF2PasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_login_upgrades_outdated_hash(self):
+        response = self.client.post(
+            '/scoutbase/login', {'email': 'coach1@example.com', 'password': 'password123'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertTrue(User.objects.get(email='coach1@example.com').password.startswith('pbkdf2_fast$'))
+
+    def test_async_register_and_login(self):
+        response = self.client.post(
+            '/scoutbase/async/register',
+            {'email': 'async@example.com', 'password': 'password123', 'name': 'Async'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['email'], 'async@example.com')
+
+        response = self.client.post(
+            '/scoutbase/async/login',
+            {'email': 'async@example.com', 'password': 'password123'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('refresh', response.cookies)
+        user = self.client.get('/scoutbase/user', HTTP_AUTHORIZATION=f'Bearer {response.json()["jwt"]}')
+        self.assertEqual(user.status_code, 200)
+
+    def test_async_login_rejects_bad_password(self):
+        response = self.client.post(
+            '/scoutbase/async/login',
+            {'email': 'coach1@example.com', 'password': 'wrong'},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 401)
+
+    def test_async_views_reject_non_object_body(self):
+        for url in ('/scoutbase/async/login', '/scoutbase/async/register'):
+            response = self.client.post(url, ['coach1@example.com'], format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def test_login_rejects_non_string_credentials(self):
+        for url in ('/scoutbase/login', '/scoutbase/async/login'):
+            for body in ({'email': 1, 'password': 'Password123!'}, {'email': 'coach1@example.com', 'password': 1}):
+                response = self.client.post(url, body, format='json')
+                self.assertEqual(response.status_code, 400, (url, body))
@@ -0,0 +1,273 @@
+################################################################################
+# Token Issuing and Verification
+# This module creates and checks the tokens used to authenticate clients.
+#
+# Features:
+# - Short-lived JWT access tokens carrying the user's role name
+# - RS256 or EdDSA signing keys tagged with a kid, so verifiers can pick the
+#   right key during rotation
+# - Public JSON Web Key Set for services that verify tokens locally
+# - Long-lived opaque refresh tokens, stored only as an HMAC
+# - Single-use refresh rotation with reuse detection and revocation
+# - Purging of refresh tokens past their expiry
+################################################################################
+
+# Standard library imports
+import datetime
+import functools
+import hashlib
+import hmac
+import json
+import secrets
+
+# Third-party imports
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+# Django and DRF imports
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+
+# Local application imports
+from .models import RefreshToken
+from .roles import role_cache
+
+
+class SigningKey:
+    """
+    A kid-tagged key pair used to sign and verify access tokens.
+
+    Args:
+        kid: Key identifier written to each token's header
+        pem: PEM-encoded private key, or public key for a verify-only key
+    """
+
+    def __init__(self, kid, pem):
+        self.kid = kid
+        data = pem.encode() if isinstance(pem, str) else pem
+        try:
+            self.private_key = serialization.load_pem_private_key(data, password=None)
+            self.public_key = self.private_key.public_key()
+        except ValueError:
+            self.private_key = None
+            self.public_key = serialization.load_pem_public_key(data)
+
+        if isinstance(self.public_key, rsa.RSAPublicKey):
+            self.algorithm, jwk_algorithm = 'RS256', RSAAlgorithm
+        elif isinstance(self.public_key, ed25519.Ed25519PublicKey):
+            self.algorithm, jwk_algorithm = 'EdDSA', OKPAlgorithm
+        else:
+            raise ImproperlyConfigured(f'JWT signing key {kid!r} must be an RSA or Ed25519 key')
+
+        self.jwk = {
+            **jwk_algorithm.to_jwk(self.public_key, as_dict=True),
+            'kid': kid,
+            'alg': self.algorithm,
+            'use': 'sig'
+        }
+
+
+def _development_key():
+    """
+    Returns:
+        SigningKey: Ed25519 key derived from SECRET_KEY, for local development
+    """
+    seed = hashlib.sha256(f'jwt-signing:{settings.SECRET_KEY}'.encode()).digest()
+    pem = ed25519.Ed25519PrivateKey.from_private_bytes(seed).private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    )
+    return SigningKey('dev', pem)
+
+
+@functools.cache
+def get_signing_keys():
+    """
+    Loads JWT_SIGNING_KEYS once per process (reset when the setting changes).
+
+    Returns:
+        tuple: (active SigningKey, dict of every SigningKey by kid)
+
+    Raises:
+        ImproperlyConfigured: If the active key has no private key, or if no
+            keys are configured outside DEBUG and tests
+    """
+    keys = [SigningKey(entry['kid'], entry['key']) for entry in settings.JWT_SIGNING_KEYS]
+    if not keys:
+        # The development key is derivable by anyone holding SECRET_KEY
+        if not (settings.DEBUG or settings.TESTING):
+            raise ImproperlyConfigured('JWT_SIGNING_KEYS must be set when DEBUG is off')
+        keys = [_development_key()]
+    if keys[0].private_key is None:
+        raise ImproperlyConfigured(f'Active JWT signing key {keys[0].kid!r} has no private key')
+    return keys[0], {key.kid: key for key in keys}
+
+
+@functools.cache
+def get_jwks():
+    """
+    Returns:
+        tuple: (JWKS document as bytes, quoted ETag of the document)
+    """
+    _, keys = get_signing_keys()
+    body = json.dumps({'keys': [key.jwk for key in keys.values()]}).encode()
+    return body, f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def reset_signing_keys():
+    """Drops the loaded keys so they are re-read from settings"""
+    get_signing_keys.cache_clear()
+    get_jwks.cache_clear()
+
+
+def encode_token(payload):
+    """
+    Signs a payload with the active key.
+
+    Args:
+        payload: JWT claims
+
+    Returns:
+        string: Encoded JWT whose header names the signing key's kid
+    """
+    active, _ = get_signing_keys()
+    return jwt.encode(payload, active.private_key, algorithm=active.algorithm, headers={'kid': active.kid})
+
+
+def issue_access_token(user):
+    """
+    Creates a signed access token for a user.
+
+    Args:
+        user: User the token is issued to
+
+    Returns:
+        string: Encoded JWT valid for JWT_ACCESS_TOKEN_LIFETIME, with the
+            user's role name (or None) in its role claim
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    payload = {
+        'id': user.id,
+        'role': role_cache.name(user.role_id),
+        'exp': now + settings.JWT_ACCESS_TOKEN_LIFETIME,
+        'iat': now
+    }
+    return encode_token(payload)
+
+
+def decode_access_token(token):
+    """
+    Verifies and decodes an access token with the key named by its kid.
+
+    Args:
+        token: Encoded JWT
+
+    Returns:
+        dict: Token payload
+
+    Raises:
+        AuthenticationFailed: If the token is expired, invalid or signed by
+            an unknown key
+    """
+    _, keys = get_signing_keys()
+    try:
+        kid = jwt.get_unverified_header(token).get('kid')
+        key = keys.get(kid) if isinstance(kid, str) else None
+        if key is None:
+            raise AuthenticationFailed('Unauthenticated')
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
+    except jwt.InvalidTokenError:
+        raise AuthenticationFailed('Unauthenticated')
+
+
+def hash_refresh_token(raw_token):
+    """
+    Args:
+        raw_token: Refresh token as held by the client
+
+    Returns:
+        string: Hex HMAC-SHA256 of the token, keyed with SECRET_KEY
+    """
+    return hmac.new(settings.SECRET_KEY.encode(), raw_token.encode(), hashlib.sha256).hexdigest()
+
+
+def issue_refresh_token(user):
+    """
+    Creates and stores a new refresh token for a user.
+
+    Args:
+        user: User the token is issued to
+
+    Returns:
+        string: Raw refresh token; only its hash is persisted
+    """
+    raw_token = secrets.token_urlsafe(32)
+    RefreshToken.objects.create(
+        user=user,
+        token_hash=hash_refresh_token(raw_token),
+        expires_at=timezone.now() + settings.JWT_REFRESH_TOKEN_LIFETIME
+    )
+    return raw_token
+
+
+def rotate_refresh_token(raw_token):
+    """
+    Exchanges a refresh token for a new one, revoking the old token.
+
+    Presenting a token that was already rotated or revoked is treated as
+    theft: every outstanding refresh token for that user is revoked.
+
+    Args:
+        raw_token: Refresh token as held by the client
+
+    Returns:
+        tuple: (user, new raw refresh token)
+
+    Raises:
+        AuthenticationFailed: If the token is unknown, expired or revoked
+    """
+    now = timezone.now()
+    token = RefreshToken.objects.select_related('user').filter(
+        token_hash=hash_refresh_token(raw_token or '')
+    ).first()
+    if token is None or token.expires_at <= now or not token.user.is_active:
+        raise AuthenticationFailed('Invalid refresh token')
+
+    # The conditional update makes concurrent refreshes with the same token
+    # race safely: exactly one of them revokes it
+    revoked = RefreshToken.objects.filter(pk=token.pk, revoked_at__isnull=True).update(revoked_at=now)
+    if not revoked:
+        RefreshToken.objects.filter(user_id=token.user_id, revoked_at__isnull=True).update(revoked_at=now)
+        raise AuthenticationFailed('Invalid refresh token')
+
+    return token.user, issue_refresh_token(token.user)
+
+
+def revoke_refresh_token(raw_token):
+    """
+    Revokes a refresh token if it exists and is still active.
+
+    Args:
+        raw_token: Refresh token as held by the client
+    """
+    RefreshToken.objects.filter(
+        token_hash=hash_refresh_token(raw_token), revoked_at__isnull=True
+    ).update(revoked_at=timezone.now())
+
+
+def purge_refresh_tokens():
+    """
+    Deletes refresh tokens past their expiry, revoked or not.
+
+    Revoked tokens are kept until they expire so that presenting a rotated
+    token is still recognised as reuse; after that it is rejected as expired
+    either way.
+
+    Returns:
+        int: Number of tokens deleted
+    """
+    deleted, _ = RefreshToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    return deleted
@@ -0,0 +1,216 @@
+################################################################################
+# Profile Picture Uploads
+# This module validates and normalizes uploaded pictures with bounded memory.
+#
+# Features:
+# - Upload handler that rejects bodies over PROFILE_PICTURE_MAX_UPLOAD_BYTES
+#   from Content-Length, or as soon as the streamed bytes pass the cap
+# - Uploads streamed to temporary files rather than held in memory
+# - Format and decode-size checks from the image header only, so oversized
+#   or decompression-bomb images are rejected before any pixels are decoded
+#   and no accepted upload decodes to more than
+#   PROFILE_PICTURE_MAX_DECODE_BYTES
+# - Originals larger than PROFILE_PICTURE_MAX_DIMENSION downsized (decoding
+#   at reduced scale where the format allows); all metadata (EXIF, XMP, text
+#   chunks, comments, ICC profiles) stripped, converting to sRGB first
+# - Names for direct (presigned) uploads, scoped to the uploading user and
+#   kept apart from stored pictures until the upload is confirmed
+################################################################################
+
+# Standard library imports
+import io
+import re
+import tempfile
+import uuid
+import warnings
+
+# Third-party imports
+from PIL import Image, ImageCms, ImageOps, UnidentifiedImageError
+
+# Django and DRF imports
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import serializers
+from rest_framework.exceptions import APIException, ValidationError
+
+# Pillow formats accepted for profile pictures, with their re-encode options
+PROFILE_PICTURE_FORMATS = {
+    'JPEG': {'quality': 90},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+
+# Image.info keys that describe how to decode the pixels rather than carry
+# metadata; an upload with any other key is re-encoded without it
+STRUCTURAL_INFO_KEYS = {
+    'adobe', 'adobe_transform', 'aspect', 'background', 'dpi', 'duration', 'gamma', 'interlace',
+    'jfif', 'jfif_density', 'jfif_unit', 'jfif_version', 'loop', 'progression', 'progressive',
+    'transparency',
+}
+
+# Pillow holds decoded pixels in at most four bytes each
+DECODED_BYTES_PER_PIXEL = 4
+
+# Headroom for multipart boundaries and the other form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Direct uploads land in uploads/<user id>/ until they are confirmed
+DIRECT_UPLOAD_DIRECTORY = 'uploads'
+DIRECT_UPLOAD_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+}
+DIRECT_UPLOAD_NAME_RE = re.compile(
+    rf'^{DIRECT_UPLOAD_DIRECTORY}/(?P<user_id>\d+)/[0-9a-f]{{32}}\.(?:{"|".join(DIRECT_UPLOAD_EXTENSIONS.values())})$'
+)
+
+
+class UploadTooLarge(APIException):
+    """Raised when an upload exceeds PROFILE_PICTURE_MAX_UPLOAD_BYTES"""
+    status_code = 413
+    default_detail = 'Upload is too large.'
+    default_code = 'payload_too_large'
+
+
+class CappedUploadHandler(FileUploadHandler):
+    """
+    Rejects uploads over PROFILE_PICTURE_MAX_UPLOAD_BYTES while they stream.
+
+    Listed before TemporaryFileUploadHandler in FILE_UPLOAD_HANDLERS; it only
+    counts bytes and passes every chunk on unchanged.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length and content_length > settings.PROFILE_PICTURE_MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+            raise UploadTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+        if self.received > settings.PROFILE_PICTURE_MAX_UPLOAD_BYTES:
+            raise UploadTooLarge()
+        return raw_data
+
+    def file_complete(self, file_size):
+        return None
+
+
+def direct_upload_name(user_id, content_type):
+    """
+    Args:
+        user_id: ID of the uploading user
+        content_type: Declared content type, a key of DIRECT_UPLOAD_EXTENSIONS
+
+    Returns:
+        string: Fresh, unguessable storage name for one direct upload
+    """
+    return f'{DIRECT_UPLOAD_DIRECTORY}/{user_id}/{uuid.uuid4().hex}.{DIRECT_UPLOAD_EXTENSIONS[content_type]}'
+
+
+def is_direct_upload_name(name, user_id):
+    """
+    Returns:
+        bool: Whether name was issued by direct_upload_name() for the user
+    """
+    match = DIRECT_UPLOAD_NAME_RE.match(name or '')
+    return match is not None and int(match.group('user_id')) == user_id
+
+
+def to_srgb(image):
+    """
+    Converts an image tagged with an ICC profile to sRGB, so the profile can
+    be dropped without shifting its colours.
+
+    Args:
+        image: Decoded PIL image
+
+    Returns:
+        Image: The converted image, or the image itself if it has no profile
+            or the profile can't be applied
+    """
+    icc_profile = image.info.get('icc_profile')
+    if not icc_profile or image.mode not in ('RGB', 'RGBA'):
+        return image
+    try:
+        return ImageCms.profileToProfile(
+            image, ImageCms.ImageCmsProfile(io.BytesIO(icc_profile)), ImageCms.createProfile('sRGB'),
+            outputMode=image.mode
+        )
+    except (ImageCms.PyCMSError, OSError):
+        return image
+
+
+def prepare_profile_picture(upload):
+    """
+    Validates an uploaded picture and normalizes it for storage.
+
+    Args:
+        upload: Uploaded file
+
+    Returns:
+        File: The upload itself if it is small enough and carries no
+            metadata, else a re-encoded copy in a temporary file
+
+    Raises:
+        ValidationError: If the file is not a supported image or would
+            decode to more than PROFILE_PICTURE_MAX_DECODE_BYTES
+    """
+    upload.seek(0)
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', Image.DecompressionBombWarning)
+            image = Image.open(upload)
+    except (UnidentifiedImageError, Image.DecompressionBombWarning, Image.DecompressionBombError, OSError):
+        raise ValidationError('Upload a valid JPEG, PNG or WebP image.')
+
+    with image:
+        if image.format not in PROFILE_PICTURE_FORMATS:
+            raise ValidationError('Upload a valid JPEG, PNG or WebP image.')
+        width, height = image.size
+        limit = settings.PROFILE_PICTURE_MAX_DIMENSION
+        image_format = image.format
+
+        # Only JPEG can decode at reduced scale; PNG and WebP decode in full
+        image.draft(image.mode, (limit, limit))
+        decoded_width, decoded_height = image.size
+        if decoded_width * decoded_height * DECODED_BYTES_PER_PIXEL > settings.PROFILE_PICTURE_MAX_DECODE_BYTES:
+            raise ValidationError(f'Image is too large ({width}x{height} pixels).')
+
+        metadata = set(image.info) - STRUCTURAL_INFO_KEYS
+        if max(width, height) <= limit and not metadata and not image.getexif():
+            upload.seek(0)
+            return upload
+
+        # Honour the EXIF orientation, then re-encode without the metadata
+        normalized = to_srgb(ImageOps.exif_transpose(image))
+        normalized.thumbnail((limit, limit), Image.Resampling.LANCZOS)
+        normalized.info = {key: value for key, value in normalized.info.items() if key == 'transparency'}
+
+    output = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    normalized.save(output, image_format, **PROFILE_PICTURE_FORMATS[image_format])
+    size = output.tell()
+    output.seek(0)
+    return UploadedFile(
+        output,
+        name=upload.name,
+        content_type=Image.MIME[image_format],
+        size=size
+    )
+
+
+class ProfilePictureUploadField(serializers.ImageField):
+    """
+    ImageField that validates from the header and normalizes the upload.
+
+    Skips Django's full-file image verification in favour of
+    prepare_profile_picture().
+    """
+
+    def to_internal_value(self, data):
+        upload = serializers.FileField.to_internal_value(self, data)
+        return prepare_profile_picture(upload)
@@ -1,7 +1,8 @@
 ## Import the path function from the django.urls module
 ## Import the RegisterView, LoginView, UserView, and LogoutView classes from the views module
 from django.urls import path
-from .views import RegisterView, LoginView, UserView, LogoutView, AssignRoleView, FetchUserRoleView, CreateCoachView, CreateAthleteView, CreateScoutView, SearchAthleteView, SearchCoachView, EditAthleteView, EditCoachView, DeleteAccountView, FetchUserEmailView, FetchUserAttributesView, EditAthleteProfilePictureView, EditCoachProfilePictureView
+from .async_views import AsyncLoginView, AsyncRegisterView
+from .views import RegisterView, LoginView, TokenRefreshView, UserView, MeView, LogoutView, AssignRoleView, FetchUserRoleView, CreateCoachView, CreateAthleteView, CreateScoutView, SearchAthleteView, SearchCoachView, EditAthleteView, EditCoachView, DeleteAccountView, FetchUserEmailView, FetchUserAttributesView, FetchUserBatchView, EditAthleteProfilePictureView, EditCoachProfilePictureView, ProfilePictureUploadView, ConfirmProfilePictureUploadView, DirectUploadView, ExportAthletesView
 
 # Define the URL patterns for the users app
 # The URL patterns all begin with http://localhost:8000/scoutbase/
@@ -10,7 +11,11 @@ from .views import RegisterView, LoginView, UserView, LogoutView, AssignRoleView
 urlpatterns = [
     path('register', RegisterView.as_view()),
     path('login', LoginView.as_view()),
+    path('token/refresh', TokenRefreshView.as_view()),
+    path('async/register', AsyncRegisterView.as_view()),
+    path('async/login', AsyncLoginView.as_view()),
     path('user', UserView.as_view()),
+    path('me', MeView.as_view()),
     path('logout', LogoutView.as_view()),
     path('assignrole', AssignRoleView.as_view()),
     path('fetchrole', FetchUserRoleView.as_view()),
@@ -19,11 +24,16 @@ urlpatterns = [
     path('scout/createprofile', CreateScoutView.as_view(), name='create_scout_profile'),
     path('searchforathlete/', SearchAthleteView.as_view(), name='search_athlete'),
     path('searchforcoach/', SearchCoachView.as_view(), name='search_coach'),
+    path('export-athletes/', ExportAthletesView.as_view(), name='export_athletes'),
     path('editcoach/<int:pk>/', EditCoachView.as_view(), name='edit_coach'),
     path('editathlete/<int:pk>/', EditAthleteView.as_view(), name='edit_athlete'),
     path('delete-account/<int:pk>/', DeleteAccountView.as_view(), name='delete_account'),
     path('fetch-email/<int:user_id>/', FetchUserEmailView.as_view(), name='fetch_user_email'),
     path('fetch-user-attributes/<int:user_id>/', FetchUserAttributesView.as_view(), name='fetch_user_attributes'),
+    path('users/batch', FetchUserBatchView.as_view(), name='fetch_user_batch'),
     path('edit-coach-profile-picture/<int:user_id>/', EditCoachProfilePictureView.as_view(), name='edit_coach_profile_picture'),
     path('edit-athlete-profile-picture/<int:user_id>/', EditAthleteProfilePictureView.as_view(), name='edit_athlete_profile_picture'),
+    path('profile-picture/upload', ProfilePictureUploadView.as_view(), name='profile_picture_upload'),
+    path('profile-picture/confirm', ConfirmProfilePictureUploadView.as_view(), name='profile_picture_confirm'),
+    path('uploads/direct', DirectUploadView.as_view(), name='direct_upload'),
 ]
@@ -5,20 +5,23 @@
 ################################################################################
 
 # Standard library imports
-import jwt
-import datetime
 import logging
+import posixpath
+import time
 
 # Django and DRF imports
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.response import Response
-from rest_framework.exceptions import AuthenticationFailed, ValidationError, NotFound
-from rest_framework.status import HTTP_200_OK, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
+from rest_framework.exceptions import AuthenticationFailed, ValidationError, NotFound, PermissionDenied
+from rest_framework.status import HTTP_200_OK, HTTP_201_CREATED, HTTP_204_NO_CONTENT, HTTP_400_BAD_REQUEST, HTTP_404_NOT_FOUND
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
+from django.core import signing
 from django.core.mail import send_mail
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.http import HttpResponse, StreamingHttpResponse
 
 # Local application imports
 from .serializers import (
@@ -27,16 +30,119 @@ from .serializers import (
     CoachProfileSerializer, 
     ScoutProfileSerializer
 )
+from .authentication import NoAuthentication, get_token
+from .cache import CachedSearchMixin
+from .conditional import check_not_modified, etag_matches, not_modified, row_etag, value_etag, with_etag
+from .export import EXPORT_CONTENT_TYPES, EXPORT_ENCODERS
+from .hashing import get_hashing_pool, verify_password
+from .images import profile_picture_storage
+from .pagination import SearchCursorPagination
+from .roles import role_cache
+from .storage import DIRECT_UPLOAD_SALT
+from .uploads import (
+    DIRECT_UPLOAD_EXTENSIONS,
+    UploadTooLarge,
+    direct_upload_name,
+    is_direct_upload_name,
+    prepare_profile_picture
+)
+from .tokens import (
+    get_jwks,
+    issue_access_token,
+    issue_refresh_token,
+    revoke_refresh_token,
+    rotate_refresh_token
+)
+from .search import filter_athletes, filter_coaches, supports_full_text
 from .models import (
     User, 
     AthleteProfile, 
     CoachProfile, 
-    ScoutProfile,
-    Role
+    ScoutProfile
 )
 
 logger = logging.getLogger(__name__)
 
+def set_token_cookies(response, access_token, refresh_token):
+    """
+    Sets the access and refresh tokens as httponly cookies.
+    
+    Args:
+        response: Any Django or DRF response
+        access_token: Encoded JWT access token
+        refresh_token: Raw refresh token
+    
+    Returns:
+        The same response
+    """
+    response.set_cookie(key='jwt', value=access_token, httponly=True)
+    response.set_cookie(
+        key='refresh',
+        value=refresh_token,
+        httponly=True,
+        max_age=int(settings.JWT_REFRESH_TOKEN_LIFETIME.total_seconds())
+    )
+    return response
+
+def token_response(access_token, refresh_token):
+    """
+    Builds the login/refresh response carrying both tokens.
+    
+    Args:
+        access_token: Encoded JWT access token
+        refresh_token: Raw refresh token
+    
+    Returns:
+        Response: Tokens in the body and as httponly cookies
+    """
+    response = Response({'jwt': access_token, 'refresh': refresh_token})
+    return set_token_cookies(response, access_token, refresh_token)
+
+def get_refresh_token(request):
+    """
+    Reads the refresh token from the request body or the refresh cookie.
+    
+    Args:
+        request: DRF request
+    
+    Returns:
+        string: The raw refresh token, or None if neither holds one
+    
+    Raises:
+        ValidationError: If the body is not an object or refresh is not a string
+    """
+    if not isinstance(request.data, dict):
+        raise ValidationError("Expected a JSON object.")
+    raw_token = request.data.get('refresh')
+    if raw_token is not None and not isinstance(raw_token, str):
+        raise ValidationError({"refresh": "Must be a string."})
+    return raw_token or request.COOKIES.get('refresh')
+
+def get_credentials(request):
+    """
+    Reads the email and password from a login request body.
+    
+    Args:
+        request: DRF request
+    
+    Returns:
+        tuple: (email, password) strings
+    
+    Raises:
+        ValidationError: If the body is not an object or either field is
+            missing or not a string
+    """
+    if not isinstance(request.data, dict):
+        raise ValidationError("Expected a JSON object.")
+    errors = {
+        field: "Must be a string."
+        for field in ('email', 'password')
+        if not isinstance(request.data.get(field), str)
+    }
+    if errors:
+        raise ValidationError(errors)
+    return request.data['email'], request.data['password']
+
 class RegisterView(APIView):
     """
     Handles user registration.
@@ -49,11 +155,17 @@ class RegisterView(APIView):
         - password: string
         - [additional fields based on UserSerializer]
     """
+    # Must work even when the client still holds an expired or revoked token
+    authentication_classes = [NoAuthentication]
+
     def post(self, request):
-        # Validate and save the user data
+        # Validate the user data
         serializer = UserSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save()
+
+        # Hash the password in the bounded pool, then save
+        password_hash = get_hashing_pool().run(make_password, serializer.validated_data.get('password'))
+        serializer.save(password_hash=password_hash)
         return Response(serializer.data)
 
 class LoginView(APIView):
@@ -68,34 +180,37 @@ class LoginView(APIView):
         - password: string
     
     Returns:
-        - JWT token in both cookie and response body
-        - Token expires in 60 minutes
+        - JWT access token ("jwt") and refresh token ("refresh") in both
+          cookies and the response body
+        - Access token expires after JWT_ACCESS_TOKEN_LIFETIME; use
+          /token/refresh to renew it without re-sending the password
+    
+    Note:
+        The request thread waits while the hashing pool verifies the
+        password. Under ASGI, clients should use /async/login, which frees
+        the worker for other requests in the meantime.
     """
+    # Must work even when the client still holds an expired or revoked token
+    authentication_classes = [NoAuthentication]
+
     def post(self, request):
         # Extract email and password from the request
-        email = request.data['email']
-        password = request.data['password']
+        email, password = get_credentials(request)
 
         # Authenticate user
-        user = User.objects.filter(email=email).first()
+        user = User.objects.filter_by_email(email).first()
         if user is None:
             raise AuthenticationFailed('User not found')
-        if not user.check_password(password):
+
+        # Verify in the bounded hashing pool, upgrading outdated hashes
+        valid, upgraded_hash = get_hashing_pool().run(verify_password, password, user.password)
+        if not valid:
             raise AuthenticationFailed('Invalid password')
+        if upgraded_hash:
+            User.objects.filter(pk=user.pk).update(password=upgraded_hash)
         
-        # Generate JWT token
-        payload = {
-            'id': user.id,
-            'exp': datetime.datetime.utcnow() + datetime.timedelta(minutes=60),
-            'iat': datetime.datetime.utcnow()
-        }
-        token = jwt.encode(payload, 'secret', algorithm='HS256')
-
-        # Set token in cookie and response
-        response = Response()
-        response.set_cookie(key='jwt', value=token, httponly=True)
-        response.data = {'jwt': token}
-        return response
+        # Issue a short-lived access token and a rotating refresh token
+        return token_response(issue_access_token(user), issue_refresh_token(user))
 
 class UserView(APIView):
     """
@@ -105,39 +220,127 @@ class UserView(APIView):
         GET /user/: Returns authenticated user's details
     
     Authentication:
-        - Requires valid JWT token in cookies
+        - Requires valid JWT token in cookies or Authorization header
     """
+    permission_classes = [IsAuthenticated]
+
     def get(self, request):
-        # Retrieve the JWT token from cookies
-        token = request.COOKIES.get('jwt')
-        if not token:
-            raise AuthenticationFailed('Unauthenticated')
-        
-        try: 
-            # Decode the token to get user information
-            payload = jwt.decode(token, 'secret', algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Unauthenticated')
-        
-        # Fetch the user based on the decoded token
-        user = User.objects.filter(id=payload['id']).first()
-        serializer = UserSerializer(user)
-        return Response(token)
+        # JWTAuthentication has already verified the token and loaded the user
+        return Response(get_token(request))
+
+class MeView(APIView):
+    """
+    Returns everything a client needs to bootstrap after login.
+    
+    Endpoints:
+        GET /me: Returns the authenticated user, their role and profiles
+    
+    Response:
+        - user: { id, name, email, role }
+        - role: string or null
+        - athlete_profile, coach_profile, scout_profile: The profile, or null
+          if the user has none of that kind
+    
+    The user, role and all three profiles are loaded with one joined query.
+    Responses carry an ETag; If-None-Match returns 304 when unchanged.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        user = User.objects.select_related(
+            'role', 'athlete_profile', 'coach_profile', 'scout_profile'
+        ).get(pk=request.user.pk)
+
+        def profile(related_name, serializer_class):
+            instance = getattr(user, related_name, None)
+            return serializer_class(instance, context={'request': request}).data if instance else None
+
+        data = {
+            'user': UserSerializer(user).data,
+            'role': user.role.name if user.role else None,
+            'athlete_profile': profile('athlete_profile', AthleteProfileSerializer),
+            'coach_profile': profile('coach_profile', CoachProfileSerializer),
+            'scout_profile': profile('scout_profile', ScoutProfileSerializer),
+        }
+
+        etag = value_etag(data)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(data)
+        response['ETag'] = etag
+        return response
+
+class TokenRefreshView(APIView):
+    """
+    Exchanges a refresh token for a new access token.
+    
+    Endpoints:
+        POST /token/refresh: Rotates the refresh token and issues a new access token
+    
+    Request Body:
+        - refresh: string (optional if the refresh cookie is set)
+    
+    Returns:
+        - New "jwt" and "refresh" tokens, as for login
+        - The presented refresh token is revoked and cannot be used again
+    """
+    # Must work even when the client still holds an expired or revoked token
+    authentication_classes = [NoAuthentication]
+
+    def post(self, request):
+        # Rotate the presented refresh token
+        user, refresh_token = rotate_refresh_token(get_refresh_token(request))
+        return token_response(issue_access_token(user), refresh_token)
 
 class LogoutView(APIView):
     """
-    Handles user logout by removing JWT token.
+    Handles user logout by revoking the refresh token and removing cookies.
     
     Endpoints:
-        POST /logout/: Removes JWT token cookie
+        POST /logout/: Revokes the refresh token and removes token cookies
+    
+    Request Body:
+        - refresh: string (optional if the refresh cookie is set)
     """
+    # Must work even when the client still holds an expired or revoked token
+    authentication_classes = [NoAuthentication]
+
     def post(self, request):
-        # Create a response and delete the JWT cookie
+        # Revoke the refresh token so it can no longer mint access tokens
+        raw_token = get_refresh_token(request)
+        if raw_token:
+            revoke_refresh_token(raw_token)
+
+        # Create a response and delete the token cookies
         response = Response()
         response.delete_cookie('jwt')
+        response.delete_cookie('refresh')
         response.data = {'message': 'success'}
         return response
 
+class JWKSView(APIView):
+    """
+    Publishes the public keys that verify access tokens.
+
+    Endpoints:
+        GET /.well-known/jwks.json: Returns the JSON Web Key Set
+
+    Other services verify Scoutbase tokens locally by matching a token's
+    kid header against this set. Responses may be cached for
+    JWT_JWKS_MAX_AGE seconds and support If-None-Match revalidation.
+    """
+    authentication_classes = [NoAuthentication]
+
+    def get(self, request):
+        body, etag = get_jwks()
+        if etag_matches(request, etag):
+            response = HttpResponse(status=304)
+        else:
+            response = HttpResponse(body, content_type='application/json')
+        response['ETag'] = etag
+        response['Cache-Control'] = f'public, max-age={settings.JWT_JWKS_MAX_AGE}'
+        return response
+
 class AssignRoleView(APIView):
     """
     Assigns roles to users.
@@ -148,6 +351,10 @@ class AssignRoleView(APIView):
     Request Body:
         - user_id: int
         - role_name: string
+    
+    Response:
+        - When callers assign their own role, a new access token carrying the
+          role claim is returned as jwt (body and cookie)
     """
     def post(self, request):
         # Extract user ID and role name from the request
@@ -163,14 +370,21 @@ class AssignRoleView(APIView):
         if not user:
             return Response({"error": "User not found"}, status=404)
 
-        role = Role.objects.filter(name=role_name).first()
-        if not role:
+        role_id = role_cache.id_for(role_name)
+        if role_id is None:
             return Response({"error": f"Role '{role_name}' does not exist"}, status=404)
 
         # Assign role and save
-        user.role = role
+        user.role_id = role_id
         user.save()
-        return Response({"message": f"Role '{role_name}' assigned to user '{user.email}'"}, status=200)
+        response = Response({"message": f"Role '{role_name}' assigned to user '{user.email}'"}, status=200)
+
+        # Reissue the caller's access token so its role claim stays current
+        if request.user.is_authenticated and request.user.pk == user.pk:
+            access_token = issue_access_token(user)
+            response.data['jwt'] = access_token
+            response.set_cookie(key='jwt', value=access_token, httponly=True)
+        return response
 
 class FetchUserRoleView(APIView):
     """
@@ -179,6 +393,12 @@ class FetchUserRoleView(APIView):
     Endpoints:
         GET /user-role/?user_id=<id>: Returns user's role information
     
+    Caching:
+        - Callers asking for their own role are answered from their token's
+          role claim; other users' roles need one query for the role id, with
+          the name read from the role cache
+        - Responses carry an ETag; If-None-Match returns 304 when unchanged
+    
     Query Parameters:
         - user_id: int
     """
@@ -193,15 +413,27 @@ class FetchUserRoleView(APIView):
         except ValueError:
             return Response({"error": "user_id must be a number"}, status=400)
 
-        # Fetch the user and their role
-        user = User.objects.filter(id=user_id).first()
-        if not user:
-            return Response({"error": "User not found"}, status=404)
+        # Answer from the caller's token, or look up only the user's role id
+        token = request.auth if isinstance(request.auth, dict) else {}
+        if token.get('id') == user_id and 'role' in token:
+            role = token['role']
+        else:
+            row = User.objects.filter(id=user_id).values_list('role_id', flat=True)[:1]
+            if not row:
+                return Response({"error": "User not found"}, status=404)
+            role = role_cache.name(row[0])
 
-        if not user.role:
-            return Response({"role": None, "message": "User has no role assigned"}, status=200)
+        if role is None:
+            data = {"role": None, "message": "User has no role assigned"}
+        else:
+            data = {"role": role}
 
-        return Response({"role": user.role.name}, status=200)
+        etag = value_etag(data)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        response = Response(data, status=200)
+        response['ETag'] = etag
+        return response
 
 class CreateCoachView(APIView):
     """
@@ -292,7 +524,7 @@ class CreateScoutView(APIView):
             return Response(ScoutProfileSerializer(scout_profile).data, status=201)
         return Response(serializer.errors, status=400)
 
-class SearchAthleteView(ListAPIView):
+class SearchAthleteView(CachedSearchMixin, ListAPIView):
     """
     Provides filtered search functionality for athlete profiles.
     
@@ -302,36 +534,39 @@ class SearchAthleteView(ListAPIView):
     Query Parameters:
         - user_id: int (optional)
         - high_school_name: string (optional)
-        - positions: string (optional)
+        - positions: string (optional) - one or more codes, e.g. "SS/2B"
         - state: string (optional)
-        - height: int (optional)
+        - height: float (optional)
+        - height_min: float (optional) - minimum height in feet, inclusive
+        - height_max: float (optional) - maximum height in feet, inclusive
         - weight: int (optional)
+        - weight_min: int (optional) - minimum weight in pounds, inclusive
+        - weight_max: int (optional) - maximum weight in pounds, inclusive
         - name: string (optional)
+        - q: string (optional) - full-text search, ordered by relevance
+        - cursor: string (optional)
+        - page_size: int (optional)
+
+    Returns:
+        - Cursor-paginated page of athlete profiles ordered by id
+          (or by relevance when q is given)
+        - Responses are cached until an athlete profile changes
     """
     serializer_class = AthleteProfileSerializer
+    pagination_class = SearchCursorPagination
+    cache_model = AthleteProfile
 
     def get_queryset(self):
-        # Retrieve all athlete profiles
-        queryset = AthleteProfile.objects.all()
-        
-        # Apply filters based on query parameters
-        filters = {
-            'user_id': self.request.query_params.get('user_id'),
-            'high_school_name__icontains': self.request.query_params.get('high_school_name'),
-            'positions__icontains': self.request.query_params.get('positions'),
-            'state__icontains': self.request.query_params.get('state'),
-            'height': self.request.query_params.get('height'),
-            'weight': self.request.query_params.get('weight'),
-            'batting_arm': self.request.query_params.get('batting_arm'),
-            'throwing_arm': self.request.query_params.get('throwing_arm'),
-            'bio__icontains': self.request.query_params.get('bio'),
-            'user__name__icontains': self.request.query_params.get('name'),
-        }
-        
-        # Apply non-null filters
-        return queryset.filter(**{k: v for k, v in filters.items() if v is not None})
+        # Apply the shared athlete search filters to the query parameters
+        return filter_athletes(self.request.query_params)
+
+    def get_search_ordering(self):
+        # Rank full-text matches by relevance when the database can score them
+        if self.request.query_params.get('q') and supports_full_text():
+            return ('-relevance', 'id')
+        return ('id',)
 
-class SearchCoachView(ListAPIView):
+class SearchCoachView(CachedSearchMixin, ListAPIView):
     """
     Provides filtered search functionality for coach profiles.
     
@@ -343,34 +578,68 @@ class SearchCoachView(ListAPIView):
         - team_needs: string (optional)
         - school_name: string (optional)
         - state: string (optional)
+        - division: string (optional)
+        - q: string (optional) - full-text search, ordered by relevance
+        - cursor: string (optional)
+        - page_size: int (optional)
+
+    Returns:
+        - Cursor-paginated page of coach profiles ordered by id
+          (or by relevance when q is given)
+        - Responses are cached until a coach profile changes
     """
     serializer_class = CoachProfileSerializer
+    pagination_class = SearchCursorPagination
+    cache_model = CoachProfile
 
     def get_queryset(self):
-        # Retrieve all coach profiles
-        queryset = CoachProfile.objects.all()
-        
-        # Apply filters based on query parameters
-        filters = {
-            'user_id': self.request.query_params.get('user_id'),
-            'name__icontains': self.request.query_params.get('name'),
-            'team_needs__icontains': self.request.query_params.get('team_needs'),
-            'school_name__icontains': self.request.query_params.get('school_name'),
-            'state__icontains': self.request.query_params.get('state'),
-            'position_within_org__icontains': self.request.query_params.get('position_within_org'),
-            'bio__icontains': self.request.query_params.get('bio'),
-            'division__icontains': self.request.query_params.get('division'),
-        }
-        
-        # Apply non-null filters
-        return queryset.filter(**{k: v for k, v in filters.items() if v is not None})
+        # Apply the shared coach search filters to the query parameters
+        return filter_coaches(self.request.query_params)
 
-    def list(self, request, *args, **kwargs):
-        # Retrieve and serialize the filtered coach profiles
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+    def get_search_ordering(self):
+        # Rank full-text matches by relevance when the database can score them
+        if self.request.query_params.get('q') and supports_full_text():
+            return ('-relevance', 'id')
+        return ('id',)
 
-        return Response(serializer.data)
+class ExportAthletesView(APIView):
+    """
+    Streams every athlete profile matching the search filters.
+    
+    Endpoints:
+        GET /export-athletes/: Returns matching athlete profiles as a file download
+    
+    Query Parameters:
+        - output: string (optional) - "ndjson" (default) or "csv"
+        - [any SearchAthleteView filter]
+    
+    Authentication:
+        - Requires valid JWT token, so the athlete pool can't be scraped
+          anonymously in one request
+    
+    Note:
+        Rows are read in keyset batches and streamed as they are encoded, so
+        memory use does not grow with the number of exported rows.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Pick the encoder for the requested output format
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_ENCODERS:
+            return Response(
+                {"error": f"output must be one of: {', '.join(EXPORT_ENCODERS)}"},
+                status=HTTP_400_BAD_REQUEST
+            )
+
+        # Stream the filtered athletes
+        queryset = filter_athletes(request.query_params)
+        response = StreamingHttpResponse(
+            EXPORT_ENCODERS[output](queryset),
+            content_type=EXPORT_CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = f'attachment; filename="athletes.{output}"'
+        return response
 
 class EditCoachView(APIView):
     """
@@ -428,7 +697,7 @@ class DeleteAccountView(APIView):
         DELETE /delete-account/: Permanently removes user account and related data
     
     Authentication:
-        - Requires valid JWT token
+        - Requires valid JWT token (resolved by JWTAuthentication)
     
     Security:
         - Verifies user ownership via JWT token
@@ -436,22 +705,9 @@ class DeleteAccountView(APIView):
     """
     permission_classes = [IsAuthenticated]
 
-    def delete(self, request):
-        # Verify authentication
-        token = request.COOKIES.get('jwt')
-        if not token:
-            raise AuthenticationFailed('Unauthenticated')
-
-        try:
-            # Decode the JWT token to get user information
-            payload = jwt.decode(token, 'secret', algorithms=['HS256'])
-        except jwt.ExpiredSignatureError:
-            raise AuthenticationFailed('Unauthenticated')
-
-        # Delete user and associated profiles
-        user = User.objects.filter(id=payload['id']).first()
-        if not user:
-            return Response({"error": "User not found"}, status=HTTP_404_NOT_FOUND)
+    def delete(self, request, pk=None):
+        # The account to delete is always the JWT's owner, not the URL pk
+        user = request.user
 
         # Cascade delete all profiles
         AthleteProfile.objects.filter(user=user).delete()
@@ -461,6 +717,7 @@ class DeleteAccountView(APIView):
 
         response = Response({"message": "Account deleted successfully"}, status=HTTP_200_OK)
         response.delete_cookie('jwt')
+        response.delete_cookie('refresh')
         return response
 
 class FetchUserEmailView(APIView):
@@ -470,17 +727,25 @@ class FetchUserEmailView(APIView):
     Endpoints:
         GET /fetch-email/<user_id>/: Returns the user's email information
     
+    Caching:
+        - Responses carry an ETag; If-None-Match returns 304 when unchanged
+    
     Path Parameters:
         - user_id: int
     """
     
     def get(self, request, user_id):
+        # Answer If-None-Match from the user's version alone
+        unchanged = check_not_modified(request, User, user_id)
+        if unchanged:
+            return unchanged
+
         # Fetch the user by ID
         user = User.objects.filter(id=user_id).first()
         if not user:
             return Response({"error": "User not found"}, status=HTTP_404_NOT_FOUND)
 
-        return Response({"email": user.email}, status=HTTP_200_OK)
+        return with_etag(Response({"email": user.email}, status=HTTP_200_OK), user)
 
 class FetchUserAttributesView(APIView):
     """
@@ -489,25 +754,97 @@ class FetchUserAttributesView(APIView):
     Endpoints:
         GET /fetch-user-attributes/<user_id>/: Returns the user's attributes
     
+    Caching:
+        - Callers asking for their own attributes are answered from the
+          authenticated user; the role name always comes from the role cache
+        - Responses carry an ETag; If-None-Match returns 304 when unchanged
+    
     Path Parameters:
         - user_id: int
     """
     
     def get(self, request, user_id):
-        # Fetch the user by ID
-        user = User.objects.filter(id=user_id).first()
-        if not user:
-            return Response({"error": "User not found"}, status=HTTP_404_NOT_FOUND)
+        if request.user.is_authenticated and request.user.pk == user_id:
+            # The caller's own attributes come from the authenticated user
+            user = request.user
+            etag = row_etag(user.pk, user.updated_at)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        else:
+            # Answer If-None-Match from the user's version alone
+            unchanged = check_not_modified(request, User, user_id)
+            if unchanged:
+                return unchanged
+
+            # Fetch the user by ID
+            user = User.objects.filter(id=user_id).first()
+            if not user:
+                return Response({"error": "User not found"}, status=HTTP_404_NOT_FOUND)
 
-        # Prepare the user attributes to return
+        # Prepare the user attributes to return, naming the role from the cache
         user_attributes = {
             "id": user.id,
             "name": user.name,
             "email": user.email,
-            "role": user.role.name if user.role else None,  # Assuming role is a ForeignKey
+            "role": role_cache.name(user.role_id),
         }
 
-        return Response(user_attributes, status=HTTP_200_OK)
+        return with_etag(Response(user_attributes, status=HTTP_200_OK), user)
+
+class FetchUserBatchView(APIView):
+    """
+    Retrieves attributes of many users in one request.
+    
+    Endpoints:
+        GET /users/batch?ids=<id>,<id>,...: Returns each user's attributes
+    
+    Query Parameters:
+        - ids: Comma-separated user IDs (at most USER_BATCH_MAX_IDS); the
+          parameter may also be repeated
+    
+    Response:
+        - results: { id, name, email, role } per found user, in request order
+        - missing: Requested IDs with no matching user
+    
+    Authentication:
+        - Requires a valid JWT; ids are sequential, so an open endpoint would
+          hand out every email address a hundred at a time
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Parse the ids, keeping the first occurrence of each in request order
+        try:
+            ids = list(dict.fromkeys(
+                int(value)
+                for param in request.query_params.getlist('ids')
+                for value in param.split(',') if value.strip()
+            ))
+        except ValueError:
+            return Response({"error": "ids must be comma-separated numbers"}, status=HTTP_400_BAD_REQUEST)
+
+        if not ids:
+            return Response({"error": "ids is required"}, status=HTTP_400_BAD_REQUEST)
+        if len(ids) > settings.USER_BATCH_MAX_IDS:
+            return Response(
+                {"error": f"At most {settings.USER_BATCH_MAX_IDS} ids may be requested at once"},
+                status=HTTP_400_BAD_REQUEST
+            )
+
+        # Fetch every user and their role in a single query
+        users = User.objects.select_related('role').only('id', 'name', 'email', 'role__name').in_bulk(ids)
+
+        results = [
+            {
+                "id": user.id,
+                "name": user.name,
+                "email": user.email,
+                "role": user.role.name if user.role else None,
+            }
+            for user in (users.get(user_id) for user_id in ids) if user
+        ]
+        missing = [user_id for user_id in ids if user_id not in users]
+        return Response({"results": results, "missing": missing}, status=HTTP_200_OK)
 
 class EditCoachProfilePictureView(APIView):
     """
@@ -518,6 +855,10 @@ class EditCoachProfilePictureView(APIView):
     
     Path Parameters:
         - user_id: int
+    
+    Errors:
+        - 400 if the file is not a JPEG, PNG or WebP image or has too many pixels
+        - 413 if the upload exceeds PROFILE_PICTURE_MAX_UPLOAD_BYTES
     """
     def put(self, request, user_id):
         try:
@@ -528,7 +869,7 @@ class EditCoachProfilePictureView(APIView):
 
         # Update the profile picture
         if 'profile_picture' in request.FILES:
-            coach_profile.profile_picture = request.FILES['profile_picture']
+            coach_profile.profile_picture = prepare_profile_picture(request.FILES['profile_picture'])
             coach_profile.save()
             return Response({"message": "Profile picture updated successfully"}, status=200)
 
@@ -543,6 +884,10 @@ class EditAthleteProfilePictureView(APIView):
     
     Path Parameters:
         - user_id: int
+    
+    Errors:
+        - 400 if the file is not a JPEG, PNG or WebP image or has too many pixels
+        - 413 if the upload exceeds PROFILE_PICTURE_MAX_UPLOAD_BYTES
     """
     def put(self, request, user_id):
         try:
@@ -553,9 +898,152 @@ class EditAthleteProfilePictureView(APIView):
 
         # Update the profile picture
         if 'profile_picture' in request.FILES:
-            athlete_profile.profile_picture = request.FILES['profile_picture']
+            athlete_profile.profile_picture = prepare_profile_picture(request.FILES['profile_picture'])
             athlete_profile.save()
             return Response({"message": "Profile picture updated successfully"}, status=200)
 
         return Response({"error": "No profile picture provided"}, status=400)
 
+def get_picture_profile(user):
+    """
+    Finds the profile whose picture a direct upload replaces.
+
+    Args:
+        user: Authenticated user
+
+    Returns:
+        AthleteProfile or CoachProfile: The user's athlete profile, or their
+            coach profile if they have no athlete profile
+
+    Raises:
+        NotFound: If the user has neither
+    """
+    for model in (AthleteProfile, CoachProfile):
+        profile = model.objects.filter(user=user).first()
+        if profile is not None:
+            return profile
+    raise NotFound("Athlete or coach profile not found")
+
+class ProfilePictureUploadView(APIView):
+    """
+    Authorizes a direct upload of a new profile picture.
+    
+    Endpoints:
+        POST /profile-picture/upload: Returns a presigned upload form
+    
+    Request Body:
+        - content_type: image/jpeg, image/png or image/webp
+    
+    Response:
+        - key: Upload name to pass to POST /profile-picture/confirm
+        - url, fields: POST a multipart form with the fields, then the image
+          as 'file', to url
+        - expires_in: Seconds the form stays valid
+    
+    With object storage the form posts straight to the bucket, so image bytes
+    never pass through an app node; the bucket enforces the content type and
+    PROFILE_PICTURE_MAX_UPLOAD_BYTES.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        content_type = request.data.get('content_type')
+        if content_type not in DIRECT_UPLOAD_EXTENSIONS:
+            raise ValidationError({"content_type": "Must be image/jpeg, image/png or image/webp."})
+        # Fail before the client uploads anything it could never confirm
+        get_picture_profile(request.user)
+
+        key = direct_upload_name(request.user.id, content_type)
+        upload = profile_picture_storage().presigned_upload(
+            key, content_type, settings.PROFILE_PICTURE_MAX_UPLOAD_BYTES, settings.DIRECT_UPLOAD_EXPIRES
+        )
+        return Response({
+            "key": key,
+            "url": request.build_absolute_uri(upload['url']),
+            "fields": upload['fields'],
+            "expires_in": settings.DIRECT_UPLOAD_EXPIRES,
+        }, status=HTTP_201_CREATED)
+
+class ConfirmProfilePictureUploadView(APIView):
+    """
+    Makes a completed direct upload the user's profile picture.
+    
+    Endpoints:
+        POST /profile-picture/confirm: Validates and stores the upload
+    
+    Request Body:
+        - key: Upload name returned by POST /profile-picture/upload
+    
+    The upload is validated and normalized exactly like a picture sent to
+    the edit endpoints, stored content-addressed with its derivatives, and
+    then removed, whether or not it was accepted.
+    
+    Errors:
+        - 400 if the key was not issued to this user, or the file is not a
+          JPEG, PNG or WebP image or has too many pixels
+        - 404 if nothing was uploaded under the key
+        - 413 if the upload exceeds PROFILE_PICTURE_MAX_UPLOAD_BYTES
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        key = request.data.get('key')
+        if not is_direct_upload_name(key, request.user.id):
+            raise ValidationError({"key": "Unknown upload."})
+        profile = get_picture_profile(request.user)
+
+        storage = profile_picture_storage()
+        if not storage.exists(key):
+            raise NotFound("Upload not found")
+        try:
+            if storage.size(key) > settings.PROFILE_PICTURE_MAX_UPLOAD_BYTES:
+                raise UploadTooLarge()
+            with storage.open(key) as upload:
+                profile.profile_picture.save(posixpath.basename(key), prepare_profile_picture(upload))
+        finally:
+            storage.delete(key)
+
+        return Response({
+            "message": "Profile picture updated successfully",
+            "profile_picture": profile.profile_picture.url,
+        }, status=HTTP_200_OK)
+
+class DirectUploadView(APIView):
+    """
+    Receives direct uploads when profile pictures are stored on the local
+    filesystem, standing in for an object store's presigned POST.
+    
+    Endpoints:
+        POST /uploads/direct: Stores the 'file' under the form's key
+    
+    The signed policy from ContentAddressedStorage.presigned_upload() is the
+    only authorization, as with S3, so no token is needed.
+    
+    Errors:
+        - 400 if the form does not match the policy or the file is empty
+        - 403 if the policy is forged or has expired
+        - 413 if the upload exceeds the policy's size limit
+    """
+    authentication_classes = [NoAuthentication]
+
+    def post(self, request):
+        storage = profile_picture_storage()
+        if not hasattr(storage, 'save_direct_upload'):
+            raise NotFound("Direct uploads go to object storage")
+        try:
+            policy = signing.loads(request.data.get('policy', ''), salt=DIRECT_UPLOAD_SALT)
+        except signing.BadSignature:
+            raise PermissionDenied("Invalid upload policy")
+        if time.time() > policy['expires_at']:
+            raise PermissionDenied("Upload policy has expired")
+
+        upload = request.FILES.get('file')
+        if request.data.get('key') != policy['key'] or request.data.get('Content-Type') != policy['content_type']:
+            raise ValidationError("Form does not match the upload policy.")
+        if upload is None or upload.size == 0:
+            raise ValidationError({"file": "No file provided."})
+        if upload.size > policy['max_bytes']:
+            raise UploadTooLarge()
+
+        storage.save_direct_upload(policy['key'], upload)
+        return Response(status=HTTP_204_NO_CONTENT)